@@ -1,28 +1,43 @@
+import click
 from flask import Flask
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf import CSRFProtect
 from http import HTTPStatus
 
-from config import DevelopmentConfig
-from app.api import fail
+from config import config_from_env
+from app.api import conditional_get, fail
+from app.utils.replicas import RoutingSession
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 login_manager = LoginManager()
 csrf = CSRFProtect()
 
 
-def create_app(config_object=DevelopmentConfig):
+def create_app(config_object=None):
     app = Flask(__name__, instance_relative_config=False)
-    app.config.from_object(config_object)
+    # без явного профиля (run.py, asgi.py, gunicorn) — по COOKFLOW_CONFIG
+    app.config.from_object(config_object if config_object is not None else config_from_env())
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Flask-Migrate тянет alembic (~0.2 с импорта) — он нужен только командам `flask db`,
+    # а не веб-воркеру. Приложение для CLI создаётся внутри click-контекста.
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
 
+    # SQLITE_PRAGMAS (профиль ProductionConfig) — до первого соединения пула
+    from app.utils.sqlite import init_sqlite
+    init_sqlite(app)
+
+    from app.utils.replicas import init_replicas
+    init_replicas(app)
+
+    from app.utils.admission import init_admission
+    init_admission(app)
+
     # HTML redirect для страниц можно оставить, но для /api мы вернём JSON через unauthorized_handler.
     login_manager.login_view = "pages.login"
 
@@ -33,6 +48,7 @@ def create_app(config_object=DevelopmentConfig):
 
     from app.error_handlers import register_error_handlers
     register_error_handlers(app)
+    app.after_request(conditional_get)
 
     from app.models import User  # noqa: F401
 
@@ -43,15 +59,29 @@ def create_app(config_object=DevelopmentConfig):
     from app.routes.cooking import cooking_bp
     from app.routes.pages import pages_bp
     from app.routes.uploads import uploads_bp
-    from app.cli import seed_command
+    from app.routes.suggest import suggest_bp
+    from app.cli import (
+        backfill_command,
+        expire_challenges_command,
+        prune_comment_events_command,
+        seed_command,
+        sqlite_maintenance_command,
+        worker_command,
+    )
 
     app.cli.add_command(seed_command)
+    app.cli.add_command(expire_challenges_command)
+    app.cli.add_command(sqlite_maintenance_command)
+    app.cli.add_command(prune_comment_events_command)
+    app.cli.add_command(worker_command)
+    app.cli.add_command(backfill_command)
     app.register_blueprint(uploads_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(recipes_bp)
     app.register_blueprint(comments_bp)
     app.register_blueprint(challenges_bp)
     app.register_blueprint(cooking_bp)
+    app.register_blueprint(suggest_bp)
     app.register_blueprint(pages_bp)
 
     return app
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from http import HTTPStatus
 from typing import Any, Optional
 
-from flask import jsonify
+from flask import Response, jsonify, request
 
 
 @dataclass(frozen=True)
@@ -31,3 +31,20 @@ def fail(code: str, message: str, status_code: int):
 
 def fail_exc(err: ApiError):
     return fail(err.code, err.message, err.status_code)
+
+
+def conditional_get(response: Response) -> Response:
+    """
+    after_request: ETag для JSON-ответов GET и 304 на совпавший If-None-Match.
+    Ответ по-прежнему строится целиком — экономятся трафик и разбор на клиенте (кэш в app.js).
+    """
+    if (
+        request.method == "GET"
+        and response.status_code == HTTPStatus.OK
+        and response.mimetype == "application/json"
+        and not response.is_streamed
+    ):
+        response.add_etag()
+        response.headers.setdefault("Cache-Control", "private, no-cache")
+        response.make_conditional(request)
+    return response
@@ -0,0 +1,350 @@
+"""
+Асинхронный режим (ASGI) для читающих эндпоинтов.
+
+Горячие GET-запросы — лента, рецепт, поиск, комментарии, челленджи — обслуживаются
+корутинами на AsyncSession: пока запрос ждёт БД, воркер принимает другие соединения,
+и параллелизм больше не упирается в число воркеров gunicorn.
+Всё остальное (запись, auth, страницы, статика) уходит в обычное Flask-приложение
+через WsgiToAsgi, поэтому синхронные эндпоинты работают без изменений.
+
+Гарантии синхронного пути сохраняются и здесь:
+- допуск (app/utils/admission.py): класс запроса берётся у Flask-view того же URL,
+  действуют те же семафоры классов (общие с Flask-частью процесса) и дедлайн —
+  по истечении корутина отменяется вместе с запросом к БД, ответ 503 DEADLINE_EXCEEDED;
+- реплики (app/utils/replicas.py): если заданы REPLICA_BINDS, чтение идёт с реплики,
+  выбранной тем же ReplicaRouter (лаг, доступность), а в окне read-your-writes
+  (метка в cookie сессии) — с основной БД.
+
+Зависимости опциональные: pip install -r requirements-async.txt
+Запуск: uvicorn asgi:app --workers 4
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import re
+from http import HTTPStatus
+from http.cookies import CookieError, SimpleCookie
+from typing import Any, Optional
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import Flask
+from itsdangerous import BadSignature
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import generate_etag, parse_etags, quote_etag
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload, lazyload
+
+from app import create_app, db
+from app.api import ApiError
+from app.models import Comment, Recipe, user_saved_recipe
+from app.routes.challenges import CHALLENGE_FIELDS, _challenge_item
+from app.routes.comments import _comment_to_dict
+from app.routes.recipes import _recipe_to_dict, _search_statement
+from app.utils.admission import ADMISSION, Admission, _deadline_exceeded
+from app.utils.catalog import Catalog, CatalogStore, group_categories, recipe_category_pairs
+from app.utils.challenge_stats import own_progress_statement, stats_store
+from app.utils.comment_stream import LAST_EVENT_QUERY
+from app.utils.replicas import ReplicaRouter, in_read_your_writes_window
+
+
+# async-драйверы для тех же БД, что и у синхронного приложения
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+# карточкам дети рецепта не нужны — не грузим их selectin'ом
+_CARD_OPTIONS = (lazyload(Recipe.ingredients), lazyload(Recipe.steps), lazyload(Recipe.comments))
+
+
+# fields/include (sparse fieldsets) и servings (масштабирование) обслуживает синхронный путь
+_ALL_CHALLENGE_FIELDS = frozenset(CHALLENGE_FIELDS)
+
+_SYNC_ONLY = re.compile(rb"(?:^|&)(?:fields|include|servings)=")
+
+
+def _wants_stream(scope: dict) -> bool:
+    # потоковый NDJSON (app.utils.streaming) тоже только во Flask
+    return any(name == b"accept" and b"ndjson" in value for name, value in scope.get("headers", []))
+
+
+def async_database_url(flask_app: Flask, bind_key: Optional[str] = None) -> str:
+    """ASYNC_DATABASE_URL (для основной БД) или URL синхронного движка с заменой драйвера."""
+    explicit = flask_app.config.get("ASYNC_DATABASE_URL")
+    if explicit and bind_key is None:
+        return explicit
+    with flask_app.app_context():
+        # берём URL движка, а не конфига: Flask-SQLAlchemy уже привязал путь SQLite к instance/
+        url = db.engines[bind_key].url
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"Нет async-драйвера для {url.get_backend_name()}, задайте ASYNC_DATABASE_URL")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+class _Request:
+    def __init__(self, scope: dict) -> None:
+        self.method = scope["method"]
+        self.path = scope["path"]
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        self.args = {key: values[-1] for key, values in query.items()}
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+
+
+class AsyncReadApp:
+    """ASGI-приложение: свои async-обработчики для чтения, остальное — во Flask."""
+
+    def __init__(self, flask_app: Flask, engine: Optional[AsyncEngine] = None) -> None:
+        self.flask_app = flask_app
+        self.fallback = WsgiToAsgi(flask_app)
+        self.engine = engine or create_async_engine(async_database_url(flask_app), pool_pre_ping=True)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.admission: Optional[Admission] = flask_app.extensions.get(ADMISSION)
+        self.router: Optional[ReplicaRouter] = flask_app.extensions.get("replicas")
+        self.replica_engines: dict[str, AsyncEngine] = {}
+        if self.router is not None:
+            self.replica_engines = {
+                key: create_async_engine(async_database_url(flask_app, key), pool_pre_ping=True)
+                for key in self.router.bind_keys
+            }
+        self.replica_sessions = {
+            key: async_sessionmaker(engine, expire_on_commit=False) for key, engine in self.replica_engines.items()
+        }
+        self._urls = flask_app.url_map.bind("localhost")
+        # справочник общий с синхронной частью того же процесса
+        self.catalog: CatalogStore = flask_app.extensions.setdefault("catalog", CatalogStore())
+        self.challenge_stats = stats_store(flask_app)
+        self.routes = [
+            (re.compile(r"/api/recipes"), self.recipes_feed),
+            (re.compile(r"/api/recipes/search"), self.search),
+            (re.compile(r"/api/recipes/(?P<recipe_id>\d+)"), self.recipe_detail),
+            (re.compile(r"/api/recipes/(?P<recipe_id>\d+)/comments"), self.comments),
+            (re.compile(r"/api/challenges"), self.challenges),
+            (re.compile(r"/api/challenges/(?P<challenge_id>\d+)"), self.challenge_detail),
+        ]
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if (
+            scope["type"] == "http"
+            and scope["method"] in ("GET", "HEAD")
+            and not _SYNC_ONLY.search(scope.get("query_string", b""))
+            and not _wants_stream(scope)
+        ):
+            for pattern, handler in self.routes:
+                m = pattern.fullmatch(scope["path"])
+                if m:
+                    params = {k: int(v) for k, v in m.groupdict().items()}
+                    await self._dispatch(handler, _Request(scope), send, params)
+                    return
+        await self.fallback(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def dispose(self) -> None:
+        for engine in (self.engine, *self.replica_engines.values()):
+            await engine.dispose()
+
+    def _request_class(self, path: str) -> str:
+        # класс — как у Flask-view этого URL (метка request_class), иначе "read"
+        try:
+            endpoint, _ = self._urls.match(path, method="GET")
+        except HTTPException:
+            return "read"
+        return getattr(self.flask_app.view_functions.get(endpoint), "request_class", None) or "read"
+
+    def _session_data(self, req: _Request) -> dict[str, Any]:
+        """Подписанная cookie сессии Flask; пустой словарь — cookie нет или подпись неверна."""
+        try:
+            morsel = SimpleCookie(req.headers.get("cookie", "")).get(self.flask_app.config["SESSION_COOKIE_NAME"])
+        except CookieError:
+            return {}
+        serializer = self.flask_app.session_interface.get_signing_serializer(self.flask_app)
+        if morsel is None or serializer is None:
+            return {}
+        try:
+            return serializer.loads(
+                morsel.value, max_age=int(self.flask_app.permanent_session_lifetime.total_seconds())
+            )
+        except BadSignature:
+            return {}
+
+    def _pick_replica(self) -> Optional[str]:
+        # проверка лага синхронная и кэшируется роутером на REPLICA_CHECK_INTERVAL_SECONDS
+        with self.flask_app.app_context():
+            engines = db.engines
+            engine = self.router.pick(engines)
+        return next((key for key in self.replica_sessions if engines[key] is engine), None)
+
+    async def _sessions_for(self, req: _Request) -> async_sessionmaker:
+        if not self.replica_sessions or in_read_your_writes_window(self._session_data(req)):
+            return self.sessions
+        key = await asyncio.to_thread(self._pick_replica)
+        return self.replica_sessions[key] if key is not None else self.sessions
+
+    async def _dispatch(self, handler, req: _Request, send, params: dict[str, int]) -> None:
+        # тот же конверт и те же коды ошибок, что у ok()/fail() синхронного API
+        extra_headers = []
+        semaphore, deadline = None, None
+        try:
+            if self.admission is not None:
+                name = self._request_class(req.path)
+                deadline = (self.admission.classes.get(name) or {}).get("deadline")
+                semaphore = self.admission.semaphores.get(name)
+                if semaphore is not None and not semaphore.acquire(blocking=False):
+                    semaphore = None  # не наш слот — отпускать нечего
+                    extra_headers.append((b"retry-after", str(self.admission.retry_after).encode()))
+                    raise ApiError("OVERLOADED", "Сервер перегружен, попробуйте позже", HTTPStatus.SERVICE_UNAVAILABLE)
+            sessions = await self._sessions_for(req)
+            async with sessions() as session:
+                call = handler(session, req, **params)
+                try:
+                    data = await (asyncio.wait_for(call, deadline) if deadline else call)
+                except asyncio.TimeoutError:
+                    raise _deadline_exceeded() from None
+            status, payload = HTTPStatus.OK, {"ok": True, "data": data}
+        except ApiError as e:
+            status, payload = e.status_code, {"ok": False, "error": {"code": e.code, "message": e.message}}
+        except Exception:
+            self.flask_app.logger.exception("async read %s failed", req.path)
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+            payload = {"ok": False, "error": {"code": "INTERNAL_SERVER_ERROR", "message": "Внутренняя ошибка сервера"}}
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+        # байт в байт как jsonify — иначе ETag не совпадал бы с синхронным путём
+        body = self.flask_app.json.response(payload).get_data()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"vary", b"Cookie"),
+        ]
+        if status == HTTPStatus.OK:
+            # как conditional_get у Flask: тот же ETag, 304 без тела на совпавший If-None-Match
+            etag = generate_etag(body)
+            headers += [(b"etag", quote_etag(etag).encode()), (b"cache-control", b"private, no-cache")]
+            if parse_etags(req.headers.get("if-none-match")).contains(etag):
+                status, body = HTTPStatus.NOT_MODIFIED, b""
+                headers = [h for h in headers if h[0] not in (b"content-type", b"content-length")]
+        await send({"type": "http.response.start", "status": int(status), "headers": headers + extra_headers})
+        await send({"type": "http.response.body", "body": b"" if req.method == "HEAD" else body})
+
+    def _user_id(self, req: _Request) -> Optional[int]:
+        """id пользователя из cookie сессии Flask (её пишет Flask-Login при входе)."""
+        user_id = self._session_data(req).get("_user_id")
+        return int(user_id) if user_id else None
+
+    async def _catalog(self, session: AsyncSession) -> Catalog:
+        return await self.catalog.current_async(session)
+
+    async def _saved_ids(self, session: AsyncSession, req: _Request, recipe_ids: list[int]) -> set[int]:
+        user_id = self._user_id(req)
+        if user_id is None or not recipe_ids:
+            return set()
+        rows = await session.execute(
+            select(user_saved_recipe.c.recipe_id).where(
+                (user_saved_recipe.c.user_id == user_id)
+                & (user_saved_recipe.c.recipe_id.in_(recipe_ids))
+            )
+        )
+        return set(rows.scalars())
+
+    async def _categories(self, session: AsyncSession, recipe_ids: list[int]) -> dict[int, list[dict[str, Any]]]:
+        if not recipe_ids:
+            return {}
+        catalog = await self._catalog(session)
+        pairs = (await session.execute(recipe_category_pairs(recipe_ids))).all()
+        return group_categories(recipe_ids, pairs, catalog)
+
+    async def _cards(self, session: AsyncSession, req: _Request, recipes) -> list[dict[str, Any]]:
+        ids = [r.id for r in recipes]
+        saved = await self._saved_ids(session, req, ids)
+        categories = await self._categories(session, ids)
+        return [
+            _recipe_to_dict(r, include_children=False, is_saved=r.id in saved, categories=categories[r.id])
+            for r in recipes
+        ]
+
+    async def recipes_feed(self, session: AsyncSession, req: _Request):
+        page = max(int(req.args.get("page", 1)), 1)
+        per_page = min(max(int(req.args.get("per_page", 12)), 1), 50)
+
+        total = (await session.execute(select(func.count()).select_from(Recipe))).scalar_one()
+        recipes = (await session.execute(
+            select(Recipe)
+            .options(*_CARD_OPTIONS)
+            .order_by(Recipe.created_at.desc())
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+        )).scalars().all()
+
+        return {
+            "items": await self._cards(session, req, recipes),
+            "page": page,
+            "pages": math.ceil(total / per_page) if total else 0,
+            "total": total,
+        }
+
+    async def search(self, session: AsyncSession, req: _Request):
+        stmt = _search_statement(req.args.get("q")).options(*_CARD_OPTIONS)
+        recipes = (await session.execute(stmt)).scalars().all()
+        return {"items": await self._cards(session, req, recipes)}
+
+    async def recipe_detail(self, session: AsyncSession, req: _Request, recipe_id: int):
+        recipe = await session.get(Recipe, recipe_id, options=[lazyload(Recipe.comments)])
+        if recipe is None:
+            raise ApiError("RECIPE_NOT_FOUND", "Рецепт не найден", HTTPStatus.NOT_FOUND)
+        saved = await self._saved_ids(session, req, [recipe.id])
+        categories = await self._categories(session, [recipe.id])
+        return _recipe_to_dict(
+            recipe, include_children=True, is_saved=recipe.id in saved, categories=categories[recipe.id]
+        )
+
+    async def comments(self, session: AsyncSession, req: _Request, recipe_id: int):
+        exists = (await session.execute(select(Recipe.id).where(Recipe.id == recipe_id))).first()
+        if not exists:
+            raise ApiError("RECIPE_NOT_FOUND", "Рецепт не найден", HTTPStatus.NOT_FOUND)
+        comments = (await session.execute(
+            select(Comment)
+            .options(joinedload(Comment.user))
+            .where(Comment.recipe_id == recipe_id)
+            .order_by(Comment.created_at.asc())
+        )).scalars().all()
+        last_event_id = (await session.execute(LAST_EVENT_QUERY)).scalar() or 0
+        return {"items": [_comment_to_dict(c) for c in comments], "last_event_id": last_event_id}
+
+    async def _challenge_items(self, session: AsyncSession, req: _Request, challenges) -> list[dict[str, Any]]:
+        ids = [ch["id"] for ch in challenges]
+        stats = await self.challenge_stats.get_async(session, ids)
+        own = {}
+        user_id = self._user_id(req)
+        if user_id is not None:
+            rows = await session.execute(own_progress_statement(user_id))
+            own = {row.challenge_id: row for row in rows}
+        return [_challenge_item(ch, _ALL_CHALLENGE_FIELDS, stats, own) for ch in challenges]
+
+    async def challenges(self, session: AsyncSession, req: _Request):
+        return {"items": await self._challenge_items(session, req, (await self._catalog(session)).challenge_list)}
+
+    async def challenge_detail(self, session: AsyncSession, req: _Request, challenge_id: int):
+        ch = (await self._catalog(session)).challenges.get(challenge_id)
+        if ch is None:
+            raise ApiError("CHALLENGE_NOT_FOUND", "Челлендж не найден", HTTPStatus.NOT_FOUND)
+        [item] = await self._challenge_items(session, req, [ch])
+        return item
+
+
+def create_asgi_app(config_object=None, engine: Optional[AsyncEngine] = None) -> AsyncReadApp:
+    flask_app = create_app(config_object)
+    return AsyncReadApp(flask_app, engine=engine)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import random
+import signal
+import threading
 from datetime import datetime
 
 import click
@@ -9,17 +11,12 @@ from flask.cli import with_appcontext
 
 from app import db
 from app.models import Category, Challenge, Ingredient, Recipe, RecipeStep, User
-
-
-def _get_or_create_category(name: str, slug: str | None = None) -> Category:
-    cat = db.session.query(Category).filter(Category.name == name).first()
-    if cat:
-        if slug and not cat.slug:
-            cat.slug = slug
-        return cat
-    cat = Category(name=name, slug=slug)
-    db.session.add(cat)
-    return cat
+from app.utils.backfill import BACKFILLS, checkpoints, run_backfill
+from app.utils.catalog import resolve_categories
+from app.utils.comment_stream import prune_comment_events
+from app.utils.expiry import sweep_expired_progress
+from app.utils.jobs import work
+from app.utils.sqlite import run_maintenance
 
 
 @click.command("seed")
@@ -35,8 +32,9 @@ def seed_command(drop: bool):
     """
     if drop:
         click.echo("Dropping all tables...")
-        db.drop_all()
-        db.create_all()
+        # только основная БД: реплики (SQLALCHEMY_BINDS) получают схему репликацией
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
         click.echo("Tables recreated.")
     else:
         click.echo("Seeding without dropping tables...")
@@ -55,10 +53,12 @@ def seed_command(drop: bool):
         db.session.add(demo)
 
     # Categories
-    c_breakfast = _get_or_create_category("Завтраки", "breakfast")
-    c_chicken = _get_or_create_category("Курица", "chicken")
-    c_quick = _get_or_create_category("Быстро", "quick")
-    c_dessert = _get_or_create_category("Десерты", "dessert")
+    c_breakfast, c_chicken, c_quick, c_dessert = resolve_categories([
+        ("Завтраки", "breakfast"),
+        ("Курица", "chicken"),
+        ("Быстро", "quick"),
+        ("Десерты", "dessert"),
+    ])
 
     # Challenges
     def ensure_challenge(title: str, category: Category | None, target: int, days: int):
@@ -97,7 +97,10 @@ def seed_command(drop: bool):
         r.categories = categories
 
         for idx, (name, qty) in enumerate(ingredients, start=1):
-            r.ingredients.append(Ingredient(name=name, quantity=qty, order=idx))
+            ing = Ingredient(order=idx)
+            ing.set_name(name)
+            ing.set_quantity(qty)
+            r.ingredients.append(ing)
 
         for idx, st in enumerate(steps, start=1):
             r.steps.append(
@@ -152,3 +155,132 @@ def seed_command(drop: bool):
 
     db.session.commit()
     click.echo("Seed completed. Users: admin@cookflow.local/admin123, demo@cookflow.local/demo123")
+
+
+@click.command("expire-challenges")
+@with_appcontext
+@click.option("--batch-size", default=500, show_default=True, help="Сколько прогрессов помечать за одну транзакцию.")
+@click.option("--sleep", "pause", default=0.0, show_default=True, help="Пауза между пачками, сек.")
+def expire_challenges_command(batch_size: int, pause: float):
+    """
+    Помечает истёкшие челленджи (expired_at) пачками.
+    Безопасно прерывать и перезапускать: каждая пачка коммитится отдельно.
+    Удобно запускать по cron.
+    """
+    def report(challenge_id: int, count: int):
+        click.echo(f"challenge #{challenge_id}: expired {count}")
+
+    total = sweep_expired_progress(batch_size=batch_size, pause_seconds=pause, on_batch=report)
+    click.echo(f"Done. Expired: {total}")
+
+
+@click.command("sqlite-maintenance")
+@with_appcontext
+@click.option(
+    "--checkpoint",
+    type=click.Choice(["PASSIVE", "FULL", "RESTART", "TRUNCATE"]),
+    default="PASSIVE",
+    show_default=True,
+    help="Режим wal_checkpoint. TRUNCATE ещё и обрезает -wal файл (лучше в тихие часы).",
+)
+def sqlite_maintenance_command(checkpoint: str):
+    """
+    PRAGMA optimize + wal_checkpoint для SQLite-баз приложения.
+    Воркеры делают это сами раз в SQLITE_MAINTENANCE_INTERVAL_SECONDS; команда — для cron и ручного запуска.
+    """
+    for bind, engine in db.engines.items():
+        if engine.dialect.name != "sqlite":
+            continue
+        busy, log_frames, checkpointed = run_maintenance(engine, checkpoint)
+        click.echo(f"{bind or 'default'}: wal frames {log_frames}, checkpointed {checkpointed}, busy {busy}")
+
+
+def _parse_queues(values: tuple[str, ...]) -> dict[str, int]:
+    queues: dict[str, int] = {}
+    for value in values:
+        for item in value.split(","):
+            name, _, count = item.strip().partition("=")
+            if name:
+                queues[name] = int(count or 1)
+    return queues
+
+
+@click.command("worker")
+@with_appcontext
+@click.option(
+    "--queue", "queues", multiple=True,
+    help="Очередь и число потоков: images=2 (можно несколько). По умолчанию WORKER_QUEUES.",
+)
+@click.option("--burst", is_flag=True, help="Выйти, когда готовые задачи закончатся (для cron).")
+def worker_command(queues: tuple[str, ...], burst: bool):
+    """
+    Выполняет фоновые задачи из таблицы jobs (app/utils/jobs.py).
+    Воркеров можно запускать сколько угодно: задачи разбираются без повторов.
+    SIGTERM/SIGINT — доделать текущие задачи и выйти.
+    """
+    spec = _parse_queues(queues or (current_app.config.get("WORKER_QUEUES") or "default=1,images=1",))
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    click.echo("Worker: " + ", ".join(f"{q}×{n}" for q, n in spec.items()))
+    # app context команды не нужен потокам — у каждой задачи свой
+    work(current_app._get_current_object(), spec, stop=stop, burst=burst)
+    click.echo("Worker stopped.")
+
+
+@click.command("backfill")
+@with_appcontext
+@click.argument("name", required=False)
+@click.option("--batch-size", type=int, default=None, help="Строк на транзакцию (по умолчанию BACKFILL_BATCH_SIZE).")
+@click.option("--pause", type=float, default=None, help="Пауза между пачками, с (по умолчанию BACKFILL_PAUSE_SECONDS).")
+@click.option("--max-batches", type=int, default=None, help="Остановиться после N пачек (продолжит следующий запуск).")
+@click.option("--restart", is_flag=True, help="Начать заново, забыв сохранённый прогресс.")
+def backfill_command(name: str | None, batch_size: int | None, pause: float | None,
+                     max_batches: int | None, restart: bool):
+    """
+    Пакетное заполнение данных (app/utils/backfill.py) с продолжением с места остановки.
+    Без NAME — список заполнений и их прогресс. SIGTERM/SIGINT — доделать пачку и выйти.
+    """
+    if not name:
+        states = checkpoints(db.engine)
+        for key in BACKFILLS:
+            state = states.get(key)
+            if state is None:
+                status = "not started"
+            else:
+                status = "done" if state.finished_at else f"at key {state.last_key}"
+                status += f", seen {state.rows_seen}, changed {state.rows_changed}"
+            click.echo(f"{key}: {status}")
+        return
+    if name not in BACKFILLS:
+        raise click.BadParameter(f"нет такого заполнения, есть: {', '.join(BACKFILLS)}", param_hint="NAME")
+
+    stop = threading.Event()
+    previous = {sig: signal.signal(sig, lambda *_: stop.set()) for sig in (signal.SIGTERM, signal.SIGINT)}
+
+    config = current_app.config
+    try:
+        result = run_backfill(
+            db.engine,
+            name,
+            batch_size=batch_size or config.get("BACKFILL_BATCH_SIZE", 1000),
+            pause=pause if pause is not None else config.get("BACKFILL_PAUSE_SECONDS", 0),
+            max_batches=max_batches,
+            restart=restart,
+            stop=stop,
+        )
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    status = "done" if result.finished else f"stopped at key {result.last_key}"
+    click.echo(f"{name}: {status}. Batches: {result.batches}, seen: {result.rows_seen}, changed: {result.rows_changed}")
+
+
+@click.command("prune-comment-events")
+@with_appcontext
+@click.option("--days", type=int, default=None, help="Хранить N дней (по умолчанию COMMENT_EVENTS_RETENTION_DAYS).")
+def prune_comment_events_command(days: int | None):
+    """Чистит журнал comment_events (нужен только для возобновления SSE). Удобно запускать по cron."""
+    days = days if days is not None else current_app.config.get("COMMENT_EVENTS_RETENTION_DAYS", 2)
+    click.echo(f"Deleted: {prune_comment_events(days)}")
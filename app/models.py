@@ -15,6 +15,7 @@ user_saved_recipe = db.Table(
     db.Column("user_id", db.Integer, db.ForeignKey("users.id"), primary_key=True),
     db.Column("recipe_id", db.Integer, db.ForeignKey("recipes.id"), primary_key=True),
     db.Column("saved_at", db.DateTime, default=datetime.utcnow, nullable=False),
+    db.Index("ix_user_saved_recipe_recipe_id", "recipe_id"),
 )
 
 # Ассоциативная таблица Recipe <-> Category (many-to-many)
@@ -22,6 +23,7 @@ recipe_category = db.Table(
     "recipe_category",
     db.Column("recipe_id", db.Integer, db.ForeignKey("recipes.id"), primary_key=True),
     db.Column("category_id", db.Integer, db.ForeignKey("categories.id"), primary_key=True),
+    db.Index("ix_recipe_category_category_id", "category_id"),
 )
 
 
@@ -45,32 +47,35 @@ class User(UserMixin, db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    # Коллекции пользователя грузятся только по обращению: User читается на каждый запрос
+    # (user_loader) и как автор каждой карточки, selectin здесь каскадом тянул бы все
+    # рецепты/комментарии/избранное вместе с их детьми.
     recipes = db.relationship(
         "Recipe",
         back_populates="author",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="select",
     )
 
     comments = db.relationship(
         "Comment",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="select",
     )
 
     challenge_progress = db.relationship(
         "ChallengeProgress",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="select",
     )
 
     saved_recipes = db.relationship(
         "Recipe",
         secondary=user_saved_recipe,
         back_populates="saved_by_users",
-        lazy="selectin",
+        lazy="select",
     )
 
     def set_password(self, password: str) -> None:
@@ -93,13 +98,18 @@ class Recipe(db.Model):
     servings = db.Column(db.Integer)
 
     author_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    author = db.relationship("User", back_populates="recipes")
+    # автор нужен в каждой карточке — грузим тем же запросом, без N+1
+    author = db.relationship("User", back_populates="recipes", lazy="joined")
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
 
+    __table_args__ = (
+        db.Index("ix_recipes_author_id_created_at", "author_id", "created_at"),
+    )
+
     ingredients = db.relationship(
         "Ingredient",
         back_populates="recipe",
@@ -124,21 +134,40 @@ class Recipe(db.Model):
         lazy="selectin",
     )
 
+    # категории в ответах берутся из кэша справочника (app.utils.catalog) по парам
+    # recipe_category, поэтому само отношение грузим только когда его действительно трогают
     categories = db.relationship(
         "Category",
         secondary=recipe_category,
         back_populates="recipes",
-        lazy="selectin",
+        lazy="select",
     )
 
+    # не selectin: иначе каждая загрузка рецепта тянет всех, кто его сохранял.
+    # Флаг is_saved считается точечным запросом к user_saved_recipe.
     saved_by_users = db.relationship(
         "User",
         secondary=user_saved_recipe,
         back_populates="saved_recipes",
-        lazy="selectin",
+        lazy="select",
     )
 
 
+class IngredientTerm(db.Model):
+    """Каноническое название ингредиента (app/utils/terms.py); строки не меняются и не удаляются."""
+
+    __tablename__ = "ingredient_terms"
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(200), unique=True, nullable=False)  # term_key(name)
+    name = db.Column(db.String(200), nullable=False)  # как написано в первый раз
+
+
+def normalize_ingredient_name(name: Optional[str]) -> str:
+    # в Python, а не lower() в SQL: SQLite приводит к нижнему регистру только ASCII
+    return (name or "").strip().lower()
+
+
 class Ingredient(db.Model):
     __tablename__ = "ingredients"
 
@@ -148,13 +177,33 @@ class Ingredient(db.Model):
 
     name = db.Column(db.String(200), nullable=False)
     name_norm = db.Column(db.String(200), nullable=False, index=True, default="")
+    # проставляется при flush по name (app/utils/terms.py); поиск и список покупок идут по нему
+    term_id = db.Column(db.Integer, db.ForeignKey("ingredient_terms.id"))
 
     quantity = db.Column(db.String(100))
+    # quantity в разобранном виде (app/utils/quantities.py); NULL — не распознано ("по вкусу")
+    amount = db.Column(db.Float)
+    unit = db.Column(db.String(16))  # канонический: г, мл, шт, ...
+    unit_family = db.Column(db.String(8))  # mass | volume | count
     order = db.Column(db.Integer, nullable=False, default=1)
 
     def set_name(self, name: str):
         self.name = name
-        self.name_norm = (name or "").strip().lower()
+        self.name_norm = normalize_ingredient_name(name)
+
+    def set_quantity(self, quantity: Optional[str]):
+        from app.utils.quantities import parse_quantity
+
+        self.quantity = quantity
+        parsed = parse_quantity(quantity)
+        self.amount = parsed.amount if parsed else None
+        self.unit = parsed.unit if parsed else None
+        self.unit_family = parsed.family if parsed else None
+
+    __table_args__ = (
+        # поиск: term_id -> recipe_id прямо из индекса, без чтения строк ingredients
+        db.Index("ix_ingredients_term_recipe", "term_id", "recipe_id"),
+    )
 
 
 
@@ -200,17 +249,18 @@ class Category(db.Model):
     name = db.Column(db.String(100), unique=True, nullable=False)
     slug = db.Column(db.String(100), unique=True)
 
+    # не selectin: иначе любая загрузка категории тянет все её рецепты
     recipes = db.relationship(
         "Recipe",
         secondary=recipe_category,
         back_populates="categories",
-        lazy="selectin",
+        lazy="select",
     )
 
     challenges = db.relationship(
         "Challenge",
         back_populates="category",
-        lazy="selectin",
+        lazy="select",
     )
 
 
@@ -229,14 +279,22 @@ class Challenge(db.Model):
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=True, index=True)
     category = db.relationship("Category", back_populates="challenges")
 
+    # счётчики для каталога: меняются в транзакциях старта/завершения (app/utils/challenge_stats.py)
+    participants_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    completions_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # не selectin: прогресс всех участников нужен только при удалении челленджа
     progress_entries = db.relationship(
         "ChallengeProgress",
         back_populates="challenge",
         cascade="all, delete-orphan",
-        lazy="selectin",
+        lazy="select",
     )
 
 
+ACTIVE_PROGRESS_SQL = "completed_at IS NULL AND expired_at IS NULL"
+
+
 class ChallengeProgress(db.Model):
     __tablename__ = "challenge_progress"
 
@@ -249,6 +307,8 @@ class ChallengeProgress(db.Model):
 
     started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     completed_at = db.Column(db.DateTime, nullable=True)
+    # проставляется sweeper'ом (flask expire-challenges) или лениво в update_progress
+    expired_at = db.Column(db.DateTime, nullable=True)
 
     user = db.relationship("User", back_populates="challenge_progress")
     challenge = db.relationship("Challenge", back_populates="progress_entries")
@@ -256,4 +316,113 @@ class ChallengeProgress(db.Model):
     __table_args__ = (
         db.UniqueConstraint("user_id", "challenge_id", name="uq_user_challenge_progress"),
         db.CheckConstraint("completed_count >= 0", name="ck_challenge_completed_ge_0"),
+        # частичный индекс только по активным прогрессам: размер O(active), а не O(history)
+        db.Index(
+            "ix_challenge_progress_active_user",
+            "user_id",
+            "started_at",
+            sqlite_where=db.text(ACTIVE_PROGRESS_SQL),
+            postgresql_where=db.text(ACTIVE_PROGRESS_SQL),
+        ),
     )
+
+    @classmethod
+    def active(cls):
+        # те же условия, что и в частичном индексе, чтобы планировщик мог его использовать
+        return db.and_(cls.completed_at.is_(None), cls.expired_at.is_(None))
+
+
+class CookingEvent(db.Model):
+    """Факт завершённой готовки (append-only журнал для аналитики и агрегатов)."""
+
+    __tablename__ = "cooking_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    recipe_id = db.Column(
+        db.Integer, db.ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # ключ идемпотентности от клиента: офлайн-очередь может повторить уже засчитанную готовку
+    client_event_id = db.Column(db.String(64), unique=True)
+
+    __table_args__ = (
+        db.Index("ix_cooking_events_user_id_created_at", "user_id", "created_at"),
+    )
+
+
+class CacheVersion(db.Model):
+    """
+    Версии in-process кэшей. Писатель увеличивает version в той же транзакции,
+    что и изменение данных; воркеры сверяют её раз за запрос и перезагружают кэш при расхождении.
+    """
+    __tablename__ = "cache_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CommentEvent(db.Model):
+    """
+    Журнал изменений комментариев для live-обновлений (SSE). id — номер события
+    для Last-Event-ID; пишется в той же транзакции, что и сам комментарий.
+    """
+
+    __tablename__ = "comment_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipe_id = db.Column(db.Integer, db.ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False)
+    comment_id = db.Column(db.Integer, nullable=False)  # без FK: событие удаления переживает комментарий
+    kind = db.Column(db.String(16), nullable=False)  # created | deleted
+    payload = db.Column(db.Text, nullable=False)  # JSON, как его отдаёт API
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        db.Index("ix_comment_events_recipe_id_id", "recipe_id", "id"),
+    )
+
+
+class Job(db.Model):
+    """
+    Фоновая задача (app/utils/jobs.py). Пишется в транзакции запроса — воркер видит её
+    только после commit. Взятая задача «арендована» до locked_until: если воркер упал,
+    после истечения аренды её заберёт другой.
+    """
+
+    __tablename__ = "jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(32), nullable=False, default="default")
+    name = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default="{}")  # JSON с аргументами задачи
+    status = db.Column(db.String(16), nullable=False, default="queued")  # queued | running | done | failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(64))
+    # повторный enqueue с тем же ключом ничего не добавляет
+    idempotency_key = db.Column(db.String(128), unique=True)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # выборка воркера: очередь, готовые к запуску по времени
+        db.Index("ix_jobs_queue_status_run_at", "queue", "status", "run_at"),
+    )
+
+
+class BackfillCheckpoint(db.Model):
+    """Прогресс пакетного заполнения данных (app/utils/backfill.py): с какого ключа продолжать."""
+
+    __tablename__ = "backfill_checkpoints"
+
+    name = db.Column(db.String(64), primary_key=True)
+    last_key = db.Column(db.BigInteger)  # последний обработанный ключ; NULL — ещё не начинали
+    rows_seen = db.Column(db.Integer, nullable=False, default=0)
+    rows_changed = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime)
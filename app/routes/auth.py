@@ -2,6 +2,7 @@ from http import HTTPStatus
 
 from flask import Blueprint, request
 from flask_login import current_user, login_required, login_user, logout_user
+from flask_wtf.csrf import generate_csrf
 
 from app import db
 from app.api import ApiError, ok
@@ -62,3 +63,9 @@ def get_current_user():
     if not current_user.is_authenticated:
         return ok({"user": None})
     return ok({"user": {"id": current_user.id, "name": current_user.name, "email": current_user.email}})
+
+
+@auth_bp.get("/csrf")
+def get_csrf_token():
+    # страница может прийти из кэша service worker'а со старым токеном в <meta> — app.js берёт свежий здесь
+    return ok({"csrf_token": generate_csrf()})
@@ -7,44 +7,132 @@ from typing import Any, Optional
 from flask import Blueprint, request
 from flask_login import current_user, login_required
 from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
 
 from app import db
 from app.api import ApiError, ok
-from app.models import Category, Challenge, ChallengeProgress
+from app.models import ChallengeProgress, User
+from app.utils.catalog import get_catalog
+from app.utils.db import upsert
+from app.utils.challenge_stats import (
+    ChallengeStats, count_progress, get_challenge_stats, own_progress_statement, record_stats,
+)
+from app.utils.fields import requested
+from app.utils.leaderboard import get_leaderboard, record_progress
+from app.utils.replicas import reads_from_replica
 
 
 challenges_bp = Blueprint("challenges", __name__, url_prefix="/api/challenges")
+reads_from_replica(challenges_bp)
+
+CHALLENGE_FIELDS = (
+    "id", "title", "description", "image_url", "duration_days", "target_count", "category",
+    # счётчики (app/utils/challenge_stats.py) и прогресс текущего пользователя, null без входа
+    "participants", "completions", "my_progress",
+)
+_STATS_FIELDS = frozenset({"participants", "completions"})
+
+# всё, что читают _progress_to_dict и _record: строка Core вместо ORM-объекта
+_PROGRESS_COLUMNS = (
+    ChallengeProgress.id,
+    ChallengeProgress.user_id,
+    ChallengeProgress.challenge_id,
+    ChallengeProgress.completed_count,
+    ChallengeProgress.started_at,
+    ChallengeProgress.completed_at,
+    ChallengeProgress.expired_at,
+)
+
+
+def _get_challenge(challenge_id: int) -> dict[str, Any]:
+    # челленджи читаются из кэша справочника, а не из ORM
+    ch = get_catalog().challenges.get(challenge_id)
+    if ch is None:
+        raise ApiError("CHALLENGE_NOT_FOUND", "Челлендж не найден", HTTPStatus.NOT_FOUND)
+    return ch
 
 
-def _challenge_to_dict(ch: Challenge) -> dict[str, Any]:
-    return {
-        "id": ch.id,
-        "title": ch.title,
-        "description": ch.description,
-        "image_url": ch.image_url,
-        "duration_days": ch.duration_days,
-        "target_count": ch.target_count,
-        "category": (
-            {"id": ch.category.id, "name": ch.category.name, "slug": ch.category.slug}
-            if ch.category else None
-        ),
-    }
+def _is_completed(p, target: Optional[int]) -> bool:
+    return bool(p.completed_at) or (bool(target) and p.completed_count >= target)
 
 
 def _progress_to_dict(p: ChallengeProgress) -> dict[str, Any]:
-    target = p.challenge.target_count or 0
+    ch = _get_challenge(p.challenge_id)
     return {
         "id": p.id,
-        "challenge": _challenge_to_dict(p.challenge),
+        "challenge": ch,
+        "completed_count": p.completed_count,
+        "target_count": ch["target_count"],
+        "started_at": p.started_at.isoformat(),
+        "completed_at": p.completed_at.isoformat() if p.completed_at else None,
+        "is_completed": _is_completed(p, ch["target_count"]),
+        "is_expired": bool(p.expired_at),
+    }
+
+
+def _own_progress_to_dict(p, target: Optional[int]) -> dict[str, Any]:
+    return {
         "completed_count": p.completed_count,
-        "target_count": p.challenge.target_count,
         "started_at": p.started_at.isoformat(),
         "completed_at": p.completed_at.isoformat() if p.completed_at else None,
-        "is_completed": bool(p.completed_at) or (target > 0 and p.completed_count >= target),
+        "is_completed": _is_completed(p, target),
+        "is_expired": bool(p.expired_at),
     }
 
 
+def _challenge_item(
+    ch: dict[str, Any], fields: frozenset[str], stats: dict[int, ChallengeStats], own: dict[int, Any]
+) -> dict[str, Any]:
+    """Словарь справочника (его не меняем — он общий) плюс счётчики и свой прогресс."""
+    item = {key: value for key, value in ch.items() if key in fields}
+    if fields & _STATS_FIELDS:
+        s = stats.get(ch["id"])
+        if "participants" in fields:
+            item["participants"] = s.participants if s else 0
+        if "completions" in fields:
+            item["completions"] = s.completions if s else 0
+    if "my_progress" in fields:
+        p = own.get(ch["id"])
+        item["my_progress"] = _own_progress_to_dict(p, ch["target_count"]) if p else None
+    return item
+
+
+def _challenge_items(challenges: list[dict[str, Any]], fields: frozenset[str]) -> list[dict[str, Any]]:
+    ids = [ch["id"] for ch in challenges]
+    stats = get_challenge_stats(ids) if fields & _STATS_FIELDS else {}
+    own = {}
+    if "my_progress" in fields and current_user.is_authenticated:
+        stmt = own_progress_statement(current_user.id)
+        if len(ids) == 1:
+            stmt = stmt.where(ChallengeProgress.challenge_id == ids[0])
+        own = {row.challenge_id: row for row in db.session.execute(stmt)}
+    return [_challenge_item(ch, fields, stats, own) for ch in challenges]
+
+
+def _requested_fields() -> frozenset[str]:
+    return requested("fields", CHALLENGE_FIELDS, CHALLENGE_FIELDS) | {"id"}
+
+
+def _record(p: ChallengeProgress) -> None:
+    record_progress(p.challenge_id, p.user_id, p.completed_count, p.started_at, p.completed_at)
+
+
+def _with_user_names(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # имена подтягиваем одним запросом на всю страницу лидерборда
+    user_ids = {e["user_id"] for e in entries}
+    names: dict[int, str] = {}
+    if user_ids:
+        names = dict(db.session.execute(select(User.id, User.name).where(User.id.in_(user_ids))).all())
+    return [
+        {
+            "rank": e["rank"],
+            "user": {"id": e["user_id"], "name": names.get(e["user_id"])},
+            "completed_count": e["completed_count"],
+            "time_to_complete_seconds": e["time_to_complete_seconds"],
+        }
+        for e in entries
+    ]
+
+
 def _require_json() -> dict:
     data = request.get_json(silent=True)
     if not isinstance(data, dict):
@@ -54,57 +142,43 @@ def _require_json() -> dict:
 
 @challenges_bp.get("")
 def list_challenges():
-    challenges = db.session.query(Challenge).order_by(Challenge.id.desc()).all()
-    return ok({"items": [_challenge_to_dict(c) for c in challenges]})
+    return ok({"items": _challenge_items(get_catalog().challenge_list, _requested_fields())})
 
 
 @challenges_bp.get("/<int:challenge_id>")
 def get_challenge(challenge_id: int):
-    ch = db.session.get(Challenge, challenge_id)
-    if not ch:
-        raise ApiError("CHALLENGE_NOT_FOUND", "Челлендж не найден", HTTPStatus.NOT_FOUND)
-    return ok(_challenge_to_dict(ch))
+    [item] = _challenge_items([_get_challenge(challenge_id)], _requested_fields())
+    return ok(item)
 
 
 @challenges_bp.post("/<int:challenge_id>/start")
 @login_required
 def start_challenge(challenge_id: int):
-    ch = db.session.get(Challenge, challenge_id)
-    if not ch:
-        raise ApiError("CHALLENGE_NOT_FOUND", "Челлендж не найден", HTTPStatus.NOT_FOUND)
+    _get_challenge(challenge_id)
+    user_id = current_user.id
 
-    existing = db.session.execute(
-        select(ChallengeProgress).where(
-            (ChallengeProgress.user_id == current_user.id)
-            & (ChallengeProgress.challenge_id == challenge_id)
-        )
-    ).scalar_one_or_none()
-
-    if existing:
-        return ok(_progress_to_dict(existing))
+    # уникальность (user_id, challenge_id) держит uq_user_challenge_progress: при гонке
+    # проигравший не падает на IntegrityError, а просто не получает строку из RETURNING
+    p = db.session.execute(
+        upsert(ChallengeProgress.__table__, index_elements=["user_id", "challenge_id"])
+        .values(user_id=user_id, challenge_id=challenge_id, completed_count=0, started_at=datetime.utcnow())
+        .returning(*_PROGRESS_COLUMNS)
+    ).first()
+    if p is not None:
+        count_progress([challenge_id], joined=1)
+    db.session.commit()
 
-    p = ChallengeProgress(
-        user_id=current_user.id,
-        challenge_id=challenge_id,
-        completed_count=0,
-        started_at=datetime.utcnow(),
-        completed_at=None,
-    )
-    db.session.add(p)
-    try:
-        db.session.commit()
-    except IntegrityError:
-        db.session.rollback()
-        # На случай гонки, уникальность задаётся UniqueConstraint [web:93]
+    if p is None:
         existing = db.session.execute(
-            select(ChallengeProgress).where(
-                (ChallengeProgress.user_id == current_user.id)
+            select(*_PROGRESS_COLUMNS).where(
+                (ChallengeProgress.user_id == user_id)
                 & (ChallengeProgress.challenge_id == challenge_id)
             )
-        ).scalar_one()
+        ).one()
         return ok(_progress_to_dict(existing))
 
-    db.session.refresh(p)
+    _record(p)
+    record_stats(challenge_id, joined=1)
     return ok(_progress_to_dict(p), HTTPStatus.CREATED)
 
 
@@ -116,9 +190,7 @@ def update_progress(challenge_id: int):
     В этой версии: клиент присылает delta или абсолютное completed_count.
     Дополнительно: если задан duration_days, после окончания срока можно запрещать инкремент (опционально).
     """
-    ch = db.session.get(Challenge, challenge_id)
-    if not ch:
-        raise ApiError("CHALLENGE_NOT_FOUND", "Челлендж не найден", HTTPStatus.NOT_FOUND)
+    ch = _get_challenge(challenge_id)
 
     p = db.session.execute(
         select(ChallengeProgress).where(
@@ -137,10 +209,15 @@ def update_progress(challenge_id: int):
     if delta is None and completed_count is None:
         raise ApiError("VALIDATION_ERROR", "Нужно передать delta или completed_count", HTTPStatus.BAD_REQUEST)
 
-    # опционально: срок челленджа
-    if ch.duration_days:
-        end_at = p.started_at + timedelta(days=int(ch.duration_days))
-        if datetime.utcnow() > end_at and not p.completed_at:
+    # опционально: срок челленджа. Обычно expired_at уже проставлен sweeper'ом,
+    # но если он ещё не дошёл до этой строки — помечаем здесь же.
+    if p.expired_at:
+        raise ApiError("CHALLENGE_EXPIRED", "Срок челленджа истёк", HTTPStatus.CONFLICT)
+    if ch["duration_days"] and not p.completed_at:
+        end_at = p.started_at + timedelta(days=int(ch["duration_days"]))
+        if datetime.utcnow() > end_at:
+            p.expired_at = datetime.utcnow()
+            db.session.commit()
             raise ApiError("CHALLENGE_EXPIRED", "Срок челленджа истёк", HTTPStatus.CONFLICT)
 
     if completed_count is not None:
@@ -162,11 +239,17 @@ def update_progress(challenge_id: int):
         p.completed_count += delta
 
     # автозавершение при достижении цели
-    if ch.target_count and p.completed_count >= int(ch.target_count) and not p.completed_at:
+    just_completed = False
+    if ch["target_count"] and p.completed_count >= int(ch["target_count"]) and not p.completed_at:
         p.completed_at = datetime.utcnow()
+        just_completed = True
+        count_progress([challenge_id], completed=1)
 
     db.session.commit()
     db.session.refresh(p)
+    _record(p)
+    if just_completed:
+        record_stats(challenge_id, completed=1)
     return ok(_progress_to_dict(p))
 
 
@@ -174,11 +257,50 @@ def update_progress(challenge_id: int):
 @login_required
 def my_challenges():
     # По ТЗ: “Мои активные челленджи”
-    rows = (
+    # фильтр повторяет условие частичного индекса ix_challenge_progress_active_user
+    active = (
         db.session.query(ChallengeProgress)
         .filter(ChallengeProgress.user_id == current_user.id)
+        .filter(ChallengeProgress.active())
         .order_by(ChallengeProgress.started_at.desc())
         .all()
     )
-    active = [p for p in rows if not p.completed_at]
-    return ok({"items": [_progress_to_dict(p) for p in active]})
+
+    items = []
+    for p in active:
+        board = get_leaderboard(p.challenge_id)
+        item = _progress_to_dict(p)
+        item["rank"] = board.rank_of(current_user.id)
+        item["participants"] = len(board)
+        items.append(item)
+    return ok({"items": items})
+
+
+@challenges_bp.get("/<int:challenge_id>/leaderboard")
+def challenge_leaderboard(challenge_id: int):
+    """
+    Query:
+      - limit: размер топа (1..100, по умолчанию 10)
+      - window: сколько соседей сверху/снизу показать вокруг текущего пользователя (0..50)
+    """
+    _get_challenge(challenge_id)
+
+    limit = min(max(int(request.args.get("limit", 10)), 1), 100)
+    window = min(max(int(request.args.get("window", 2)), 0), 50)
+
+    board = get_leaderboard(challenge_id)
+    top = board.top(limit)
+
+    me = None
+    around: list[dict[str, Any]] = []
+    if current_user.is_authenticated:
+        around = board.around(current_user.id, window)
+        me = next((e for e in around if e["user_id"] == current_user.id), None)
+
+    entries = _with_user_names(top + around)
+    return ok({
+        "participants": len(board),
+        "items": entries[:len(top)],
+        "around_me": entries[len(top):],
+        "my_rank": me["rank"] if me else None,
+    })
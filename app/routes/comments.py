@@ -1,18 +1,37 @@
 from __future__ import annotations
 
+import queue
+import time
+from functools import lru_cache
 from http import HTTPStatus
-from typing import Any
+from operator import attrgetter
+from typing import Any, Iterator
 
-import bleach
-from flask import Blueprint, request
+from flask import Blueprint, Response, current_app, request
 from flask_login import current_user, login_required
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, lazyload, load_only
 
 from app import db
-from app.api import ApiError, ok
-from app.models import Comment, Recipe
+from app.api import ApiError, fail, ok
+from app.models import Comment, Recipe, User
+from app.utils.admission import request_class
+from app.utils.comment_stream import (
+    LAST_EVENT_QUERY,
+    CommentBroker,
+    Event,
+    comment_broker,
+    format_event,
+    notify_local_subscribers,
+    record_comment_event,
+)
+from app.utils.fields import compile_getters, iso, requested
+from app.utils.replicas import reads_from_replica
+from app.utils.streaming import STREAM_BATCH, ndjson_response, wants_ndjson
 
 
 comments_bp = Blueprint("comments", __name__)
+reads_from_replica(comments_bp)
 
 
 def _require_json() -> dict:
@@ -23,6 +42,8 @@ def _require_json() -> dict:
 
 
 def _sanitize_comment_text(text: str) -> str:
+    import bleach  # тяжёлый импорт (html5lib) — только при первом комментарии или в warm_up
+
     # bleach.clean предназначен для безопасной обработки фрагментов HTML в HTML-контексте [web:62]
     # strip=True удаляет неразрешённые теги вместо экранирования [web:62]
     cleaned = bleach.clean(text, tags=set(), attributes={}, strip=True, strip_comments=True)
@@ -30,38 +51,174 @@ def _sanitize_comment_text(text: str) -> str:
     return cleaned
 
 
-def _comment_to_dict(c: Comment) -> dict[str, Any]:
-    return {
-        "id": c.id,
-        "recipe_id": c.recipe_id,
-        "user": {"id": c.user.id, "name": c.user.name},
-        "text": c.text,
-        "created_at": c.created_at.isoformat(),
-    }
+COMMENT_FIELDS = ("id", "recipe_id", "user", "text", "created_at")
+
+_COMMENT_GETTERS = {
+    "id": attrgetter("id"),
+    "recipe_id": attrgetter("recipe_id"),
+    "user": lambda c: {"id": c.user.id, "name": c.user.name},
+    "text": attrgetter("text"),
+    "created_at": lambda c: iso(c.created_at),
+}
+_COMMENT_COLUMNS = {
+    "recipe_id": Comment.recipe_id,
+    "user": Comment.user_id,
+    "text": Comment.text,
+    "created_at": Comment.created_at,
+}
+
+
+class CommentSerializer:
+    """Сериализатор комментария под набор fields; автора джойним, только если он запрошен."""
+
+    def __init__(self, fields: frozenset[str]) -> None:
+        fields = fields | {"id"}
+        self.getters = compile_getters(_COMMENT_GETTERS, fields)
+        self.options = (
+            load_only(Comment.id, *(col for name, col in _COMMENT_COLUMNS.items() if name in fields)),
+            joinedload(Comment.user).load_only(User.id, User.name) if "user" in fields else lazyload(Comment.user),
+        )
+
+    def __call__(self, c: Comment) -> dict[str, Any]:
+        return {key: get(c) for key, get in self.getters}
+
+
+@lru_cache(maxsize=32)
+def comment_serializer(fields: frozenset[str]) -> CommentSerializer:
+    return CommentSerializer(fields)
+
+
+_comment_to_dict = comment_serializer(frozenset(COMMENT_FIELDS))
+
+
+def _require_recipe(recipe_id: int) -> None:
+    # только id: get(Recipe) догрузил бы selectin'ом все комментарии, ингредиенты и шаги рецепта
+    if db.session.execute(select(Recipe.id).where(Recipe.id == recipe_id)).scalar() is None:
+        raise ApiError("RECIPE_NOT_FOUND", "Рецепт не найден", HTTPStatus.NOT_FOUND)
 
 
 @comments_bp.get("/api/recipes/<int:recipe_id>/comments")
 def get_comments(recipe_id: int):
-    recipe = db.session.get(Recipe, recipe_id)
-    if not recipe:
-        raise ApiError("RECIPE_NOT_FOUND", "Рецепт не найден", HTTPStatus.NOT_FOUND)
+    _require_recipe(recipe_id)
 
+    serializer = comment_serializer(requested("fields", COMMENT_FIELDS, COMMENT_FIELDS))
+    if wants_ndjson():
+        return _stream_comments(recipe_id, serializer)
     comments = (
         db.session.query(Comment)
+        .options(*serializer.options)
         .filter(Comment.recipe_id == recipe_id)
         .order_by(Comment.created_at.asc())
         .all()
     )
 
-    return ok({"items": [_comment_to_dict(c) for c in comments]})
+    # с этого события клиент подписывается на /comments/stream, не теряя ничего между запросами
+    last_event_id = db.session.execute(LAST_EVENT_QUERY).scalar() or 0
+    return ok({"items": [serializer(c) for c in comments], "last_event_id": last_event_id})
+
+
+def _stream_comments(recipe_id: int, serializer: CommentSerializer) -> Response:
+    """
+    Комментарии строками NDJSON. last_event_id берётся до выборки и уходит заголовком:
+    тела-конверта у потока нет, а событие, пришедшее во время выгрузки, клиент догонит по SSE.
+    """
+    last_event_id = db.session.execute(LAST_EVENT_QUERY).scalar() or 0
+    stmt = (
+        select(Comment)
+        .options(*serializer.options)
+        .where(Comment.recipe_id == recipe_id)
+        .order_by(Comment.created_at.asc())
+        .execution_options(yield_per=STREAM_BATCH)
+    )
+
+    def items() -> Iterator[dict[str, Any]]:
+        for comments in db.session.execute(stmt).scalars().partitions():
+            for comment in comments:
+                yield serializer(comment)
+                # сериализованный комментарий больше не нужен — не копим identity map
+                db.session.expunge(comment)
+
+    return ndjson_response(items(), headers={"X-Last-Event-Id": str(last_event_id)})
+
+
+def _last_event_id() -> int:
+    # EventSource при переподключении шлёт заголовок; первый раз id передаётся в query
+    raw = request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or ""
+    try:
+        return max(int(raw), 0)
+    except ValueError:
+        return 0
+
+
+def _stream(
+    broker: CommentBroker,
+    recipe_id: int,
+    q: queue.Queue,
+    after_id: int,
+    backlog: list[Event],
+    config: dict[str, Any],
+) -> Iterator[str]:
+    try:
+        yield f"retry: {config['SSE_RETRY_MS']}\n\n"
+        sent = set()
+        for event in backlog:
+            sent.add(event.id)
+            yield format_event(event)
+
+        # ограниченная жизнь потока: поток gunicorn освобождается, клиент переподключится с Last-Event-ID
+        deadline = time.monotonic() + config["SSE_STREAM_MAX_SECONDS"]
+        while time.monotonic() < deadline:
+            try:
+                event = q.get(timeout=config["SSE_HEARTBEAT_SECONDS"])
+            except queue.Empty:
+                yield ": ping\n\n"  # heartbeat: прокси не закрывают соединение, обрыв обнаруживается
+                continue
+            # событие до Last-Event-ID клиент уже видел
+            if event.id > after_id and event.id not in sent:
+                yield format_event(event)
+    finally:
+        broker.unsubscribe(recipe_id, q)
+
+
+@comments_bp.get("/api/recipes/<int:recipe_id>/comments/stream")
+@request_class("stream")  # свой лимит SSE_MAX_CONNECTIONS и без дедлайна
+def stream_comments(recipe_id: int):
+    """
+    SSE: comment_created (данные как у GET /comments) и comment_deleted ({"id"}).
+    После Last-Event-ID сначала отдаются пропущенные события.
+    """
+    _require_recipe(recipe_id)
+
+    broker = comment_broker()
+    q = broker.subscribe(recipe_id)
+    if q is None:
+        resp = fail("TOO_MANY_STREAMS", "Слишком много подключений, попробуйте позже", HTTPStatus.SERVICE_UNAVAILABLE)
+        resp.headers["Retry-After"] = "30"
+        return resp
+    after_id = _last_event_id()
+    try:
+        backlog = broker.backlog(recipe_id, after_id)
+    except Exception:
+        broker.unsubscribe(recipe_id, q)
+        raise
+    # соединение сессии возвращаем в пул сейчас, а не после многоминутного потока
+    db.session.remove()
+
+    config = {
+        key: current_app.config.get(key, default)
+        for key, default in (("SSE_RETRY_MS", 3000), ("SSE_STREAM_MAX_SECONDS", 300), ("SSE_HEARTBEAT_SECONDS", 15))
+    }
+    return Response(
+        _stream(broker, recipe_id, q, after_id, backlog, config),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @comments_bp.post("/api/recipes/<int:recipe_id>/comments")
 @login_required
 def add_comment(recipe_id: int):
-    recipe = db.session.get(Recipe, recipe_id)
-    if not recipe:
-        raise ApiError("RECIPE_NOT_FOUND", "Рецепт не найден", HTTPStatus.NOT_FOUND)
+    _require_recipe(recipe_id)
 
     data = _require_json()
     text = (data.get("text") or "").strip()
@@ -76,12 +233,14 @@ def add_comment(recipe_id: int):
 
     comment = Comment(recipe_id=recipe_id, user_id=current_user.id, text=safe_text)
     db.session.add(comment)
-    db.session.commit()
+    db.session.flush()
 
-    # Подтянем user для ответа (на случай если lazy поведение изменится)
-    db.session.refresh(comment)
+    payload = _comment_to_dict(comment)
+    record_comment_event("created", recipe_id, comment.id, payload)
+    db.session.commit()
+    notify_local_subscribers()
 
-    return ok(_comment_to_dict(comment), HTTPStatus.CREATED)
+    return ok(payload, HTTPStatus.CREATED)
 
 
 @comments_bp.delete("/api/comments/<int:comment_id>")
@@ -94,6 +253,8 @@ def delete_comment(comment_id: int):
     if comment.user_id != current_user.id:
         raise ApiError("FORBIDDEN", "Нет прав на удаление комментария", HTTPStatus.FORBIDDEN)
 
+    record_comment_event("deleted", comment.recipe_id, comment.id, {"id": comment.id})
     db.session.delete(comment)
     db.session.commit()
+    notify_local_subscribers()
     return ok({"message": "Удалено"})
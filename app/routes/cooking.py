@@ -3,53 +3,99 @@ from __future__ import annotations
 from datetime import datetime
 from http import HTTPStatus
 
-from flask import Blueprint
+from flask import Blueprint, request
 from flask_login import current_user, login_required
-from sqlalchemy import select
+from sqlalchemy import and_, case, or_, select, update
 
 from app import db
 from app.api import ApiError, ok
-from app.models import ChallengeProgress, Recipe, recipe_category, Challenge
+from app.models import ChallengeProgress, CookingEvent, Recipe, recipe_category, Challenge
+from app.utils.db import insert_ignore
+from app.utils.challenge_stats import count_progress, record_stats
+from app.utils.expiry import within_duration
+from app.utils.leaderboard import record_progress
 
 cooking_bp = Blueprint("cooking", __name__, url_prefix="/api/cooking")
 
 
+def _bump_challenge_progress(user_id: int, recipe_id: int, now: datetime) -> list:
+    """
+    Одним UPDATE ... FROM challenges увеличивает completed_count во всех активных
+    прогрессах пользователя, подходящих рецепту (категория совпадает или не задана),
+    и проставляет completed_at при достижении цели. Прогресс с истёкшим сроком не
+    засчитывается, даже если sweeper ещё не пометил его expired_at.
+    Инкремент выполняется в БД, поэтому параллельные завершения не теряют обновления.
+    Возвращает новое состояние обновлённых прогрессов.
+    """
+    recipe_cats = select(recipe_category.c.category_id).where(recipe_category.c.recipe_id == recipe_id)
+    new_count = ChallengeProgress.completed_count + 1
+    reached = and_(Challenge.target_count > 0, new_count >= Challenge.target_count)
+
+    stmt = (
+        update(ChallengeProgress)
+        .where(ChallengeProgress.challenge_id == Challenge.id)
+        .where(ChallengeProgress.user_id == user_id)
+        .where(ChallengeProgress.active())
+        .where(within_duration(now))
+        .where(or_(Challenge.category_id.is_(None), Challenge.category_id.in_(recipe_cats)))
+        .values(completed_count=new_count, completed_at=case((reached, now), else_=None))
+        .returning(
+            ChallengeProgress.challenge_id,
+            ChallengeProgress.completed_count,
+            ChallengeProgress.started_at,
+            ChallengeProgress.completed_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(stmt).all()
+
+
+def _client_event_id() -> str | None:
+    data = request.get_json(silent=True)
+    value = data.get("client_event_id") if isinstance(data, dict) else None
+    if value is None:
+        return None
+    if not isinstance(value, str) or not 0 < len(value) <= 64:
+        raise ApiError("VALIDATION_ERROR", "client_event_id: строка до 64 символов", HTTPStatus.BAD_REQUEST)
+    return value
+
+
 @cooking_bp.post("/complete/<int:recipe_id>")
 @login_required
 def complete_cooking(recipe_id: int):
-    recipe = db.session.get(Recipe, recipe_id)
-    if not recipe:
+    exists = db.session.execute(select(Recipe.id).where(Recipe.id == recipe_id)).first()
+    if not exists:
         raise ApiError("RECIPE_NOT_FOUND", "Рецепт не найден", HTTPStatus.NOT_FOUND)
 
-    # категории рецепта (id)
-    cat_ids = {c.id for c in recipe.categories}
+    # id запоминаем заранее: после commit обращение к current_user перечитало бы его из БД
+    user_id = current_user.id
+    now = datetime.utcnow()
 
-    # активные прогрессы пользователя
-    progresses = (
-        db.session.query(ChallengeProgress)
-        .filter(ChallengeProgress.user_id == current_user.id)
-        .filter(ChallengeProgress.completed_at.is_(None))
-        .all()
-    )
-
-    updated = 0
-    completed = 0
-
-    for p in progresses:
-        ch = p.challenge  # relationship
-        # если категория не задана — подходит любой рецепт
-        if ch.category_id is None or ch.category_id in cat_ids:
-            p.completed_count += 1
-            updated += 1
-
-            if ch.target_count and p.completed_count >= int(ch.target_count):
-                p.completed_at = datetime.utcnow()
-                completed += 1
+    client_event_id = _client_event_id()
+    if client_event_id:
+        # повтор из офлайн-очереди (ответ на первую попытку мог не дойти) не засчитывается дважды
+        inserted = db.session.execute(insert_ignore(CookingEvent.__table__).values(
+            user_id=user_id, recipe_id=recipe_id, created_at=now, client_event_id=client_event_id,
+        )).rowcount
+        if not inserted:
+            db.session.rollback()
+            return ok({"message": "Готовка уже засчитана", "progress_updated": 0, "challenges_completed": 0})
+    else:
+        db.session.add(CookingEvent(user_id=user_id, recipe_id=recipe_id, created_at=now))
 
+    rows = _bump_challenge_progress(user_id, recipe_id, now)
+    # обновлялись только активные прогрессы: completed_at здесь — только что достигнутая цель
+    completed = [r.challenge_id for r in rows if r.completed_at is not None]
+    count_progress(completed, completed=1)
     db.session.commit()
 
+    for r in rows:
+        record_progress(r.challenge_id, user_id, r.completed_count, r.started_at, r.completed_at)
+    for challenge_id in completed:
+        record_stats(challenge_id, completed=1)
+
     return ok({
         "message": "Готовка засчитана",
-        "progress_updated": updated,
-        "challenges_completed": completed,
+        "progress_updated": len(rows),
+        "challenges_completed": len(completed),
     })
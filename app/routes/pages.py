@@ -1,7 +1,37 @@
-from flask import Blueprint, render_template
+import hashlib
+import os
+from functools import lru_cache
+
+from flask import Blueprint, current_app, render_template, send_from_directory
 
 pages_bp = Blueprint("pages", __name__)
 
+# файлы оболочки, которые service worker кэширует целиком; их хэш — версия кэша
+SHELL_ASSETS = ("js/app.js", "js/sw.js", "css/style.css")
+
+
+@lru_cache(maxsize=None)
+def _asset_version(static_folder: str) -> str:
+    digest = hashlib.sha1()
+    for name in SHELL_ASSETS:
+        with open(os.path.join(static_folder, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+@pages_bp.app_context_processor
+def _inject_asset_version():
+    return {"asset_version": _asset_version(current_app.static_folder)}
+
+
+@pages_bp.get("/sw.js")
+def service_worker():
+    # service worker управляет только путями ниже своего URL, поэтому отдаём его из корня
+    resp = send_from_directory(current_app.static_folder, "js/sw.js", max_age=0)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["Service-Worker-Allowed"] = "/"
+    return resp
+
 
 @pages_bp.get("/")
 def index():
@@ -1,57 +1,219 @@
 from __future__ import annotations
 
+import math
+from datetime import datetime
+from functools import lru_cache
 from http import HTTPStatus
-from typing import Any
+from operator import attrgetter
+from typing import Any, Iterator, Optional
 
 from flask import Blueprint, request
 from flask_login import current_user, login_required
-from sqlalchemy import or_, select
+from sqlalchemy import func, literal, or_, select, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, lazyload, load_only, selectinload
 
 from app import db
 from app.api import ApiError, ok
-from app.models import Category, Ingredient, Recipe, RecipeStep, user_saved_recipe
+from app.models import Category, Ingredient, IngredientTerm, Recipe, RecipeStep, User, user_saved_recipe
+from app.utils.admission import request_class
+from app.utils.catalog import categories_for, resolve_categories
+from app.utils.db import upsert
+from app.utils.fields import compile_getters, requested
+from app.utils.quantities import scale_quantity
+from app.utils.recipe_cards import card_query
+from app.utils.replicas import reads_from_replica
+from app.utils.shopping import shopping_items, shopping_list_statement
+from app.utils.streaming import STREAM_BATCH, ndjson_response, wants_ndjson
+from app.utils.terms import term_key
 from app.utils.uploads import save_image
 
 recipes_bp = Blueprint("recipes", __name__, url_prefix="/api/recipes")
+reads_from_replica(recipes_bp)
 
 
 DIFFICULTIES = {"Легко", "Средне", "Сложно"}
 
 
-def _recipe_to_dict(recipe: Recipe, include_children: bool = True) -> dict[str, Any]:
-    data = {
-        "id": recipe.id,
-        "title": recipe.title,
-        "description": recipe.description,
-        "image_url": recipe.image_url,
-        "cooking_time": recipe.cooking_time,
-        "difficulty": recipe.difficulty,
-        "servings": recipe.servings,
-        "author": {"id": recipe.author.id, "name": recipe.author.name},
-        "created_at": recipe.created_at.isoformat(),
-        "updated_at": recipe.updated_at.isoformat(),
-        "categories": [{"id": c.id, "name": c.name, "slug": c.slug} for c in recipe.categories],
+RECIPE_FIELDS = (
+    "id", "title", "description", "image_url", "cooking_time", "difficulty", "servings",
+    "author", "created_at", "updated_at", "categories", "is_saved",
+)
+RECIPE_INCLUDES = ("ingredients", "steps")
+
+# categories и is_saved считаются для всей страницы сразу и в getters не входят
+_RECIPE_GETTERS = {
+    "id": attrgetter("id"),
+    "title": attrgetter("title"),
+    "description": attrgetter("description"),
+    "image_url": attrgetter("image_url"),
+    "cooking_time": attrgetter("cooking_time"),
+    "difficulty": attrgetter("difficulty"),
+    "servings": attrgetter("servings"),
+    "author": lambda r: {"id": r.author.id, "name": r.author.name},
+    "created_at": lambda r: r.created_at.isoformat(),
+    "updated_at": lambda r: r.updated_at.isoformat(),
+}
+_RECIPE_COLUMNS = {
+    "title": Recipe.title,
+    "description": Recipe.description,
+    "image_url": Recipe.image_url,
+    "cooking_time": Recipe.cooking_time,
+    "difficulty": Recipe.difficulty,
+    "servings": Recipe.servings,
+    "author": Recipe.author_id,
+    "created_at": Recipe.created_at,
+    "updated_at": Recipe.updated_at,
+}
+
+
+class RecipeSerializer:
+    """Сериализатор рецепта под конкретный набор fields/include и опции запроса под него же."""
+
+    def __init__(self, fields: frozenset[str], include: frozenset[str]) -> None:
+        self.fields = fields
+        fields = fields | {"id"}
+        self.getters = compile_getters(_RECIPE_GETTERS, fields)
+        self.with_categories = "categories" in fields
+        self.with_saved = "is_saved" in fields
+        self.include = tuple(name for name in RECIPE_INCLUDES if name in include)
+        self.options = (
+            load_only(Recipe.id, *(col for name, col in _RECIPE_COLUMNS.items() if name in fields)),
+            joinedload(Recipe.author).load_only(User.id, User.name) if "author" in fields else lazyload(Recipe.author),
+            selectinload(Recipe.ingredients) if "ingredients" in include else lazyload(Recipe.ingredients),
+            selectinload(Recipe.steps) if "steps" in include else lazyload(Recipe.steps),
+            lazyload(Recipe.comments),
+        )
+
+    def __call__(
+        self,
+        recipe: Recipe,
+        is_saved: bool = False,
+        categories: Optional[list[dict[str, Any]]] = None,
+    ) -> dict[str, Any]:
+        data = {key: get(recipe) for key, get in self.getters}
+        if self.with_categories:
+            data["categories"] = categories if categories is not None else categories_for([recipe.id])[recipe.id]
+        if self.with_saved:
+            data["is_saved"] = is_saved
+        if "ingredients" in self.include:
+            data["ingredients"] = [_ingredient_to_dict(i) for i in recipe.ingredients]
+        if "steps" in self.include:
+            data["steps"] = [_step_to_dict(s) for s in recipe.steps]
+        return data
+
+
+@lru_cache(maxsize=64)
+def recipe_serializer(fields: frozenset[str], include: frozenset[str]) -> RecipeSerializer:
+    return RecipeSerializer(fields, include)
+
+
+CARD = recipe_serializer(frozenset(RECIPE_FIELDS), frozenset())
+DETAIL = recipe_serializer(frozenset(RECIPE_FIELDS), frozenset(RECIPE_INCLUDES))
+
+
+def _requested_serializer(default_include: tuple[str, ...] = ()) -> RecipeSerializer:
+    """?fields=id,title,image_url&include=steps — по умолчанию полная карточка (детальная — с детьми)."""
+    return recipe_serializer(
+        requested("fields", RECIPE_FIELDS, RECIPE_FIELDS),
+        requested("include", RECIPE_INCLUDES, default_include),
+    )
+
+
+def _recipe_to_dict(
+    recipe: Recipe,
+    include_children: bool = True,
+    is_saved: bool = False,
+    categories: Optional[list[dict[str, Any]]] = None,
+) -> dict[str, Any]:
+    return (DETAIL if include_children else CARD)(recipe, is_saved=is_saved, categories=categories)
+
+
+def _ingredient_to_dict(i: Ingredient) -> dict[str, Any]:
+    return {"id": i.id, "name": i.name, "quantity": i.quantity, "amount": i.amount, "unit": i.unit, "order": i.order}
+
+
+def _step_to_dict(s: RecipeStep) -> dict[str, Any]:
+    return {
+        "id": s.id,
+        "order": s.order,
+        "description": s.description,
+        "image_url": s.image_url,
+        "timer_seconds": s.timer_seconds,
     }
-    if include_children:
-        data["ingredients"] = [
-            {"id": i.id, "name": i.name, "quantity": i.quantity, "order": i.order}
-            for i in recipe.ingredients
-        ]
-        data["steps"] = [
-            {
-                "id": s.id,
-                "order": s.order,
-                "description": s.description,
-                "image_url": s.image_url,
-                "timer_seconds": s.timer_seconds,
-            }
-            for s in recipe.steps
-        ]
-        data["is_saved"] = (
-            current_user.is_authenticated and any(u.id == current_user.id for u in recipe.saved_by_users)
+
+
+def _saved_recipe_ids(recipe_ids: list[int]) -> set[int]:
+    """Какие рецепты страницы в избранном у текущего пользователя (один запрос по PK user_id, recipe_id)."""
+    if not current_user.is_authenticated or not recipe_ids:
+        return set()
+    rows = db.session.execute(
+        select(user_saved_recipe.c.recipe_id).where(
+            (user_saved_recipe.c.user_id == current_user.id)
+            & (user_saved_recipe.c.recipe_id.in_(recipe_ids))
         )
-    return data
+    ).scalars()
+    return set(rows)
+
+
+def _is_saved(recipe_id: int) -> bool:
+    if not current_user.is_authenticated:
+        return False
+    return db.session.execute(
+        select(user_saved_recipe.c.recipe_id).where(
+            (user_saved_recipe.c.user_id == current_user.id)
+            & (user_saved_recipe.c.recipe_id == recipe_id)
+        )
+    ).first() is not None
+
+
+def _recipes_to_cards(
+    recipes: list[Recipe], all_saved: bool = False, serializer: RecipeSerializer = CARD
+) -> list[dict[str, Any]]:
+    ids = [r.id for r in recipes]
+    saved: set[int] = set()
+    if serializer.with_saved:
+        saved = set(ids) if all_saved else _saved_recipe_ids(ids)
+    categories = categories_for(ids) if serializer.with_categories else {}
+    return [serializer(r, is_saved=r.id in saved, categories=categories.get(r.id)) for r in recipes]
+
+
+def _iter_cards(
+    serializer: RecipeSerializer, narrow, all_saved: bool = False, yield_per: Optional[int] = None
+) -> Iterator[dict[str, Any]]:
+    """
+    Карточки списка. narrow(stmt) навешивает на SELECT условия, порядок и LIMIT конкретного списка.
+    Обычно это один Core-запрос (app.utils.recipe_cards); с include=ingredients/steps — ORM с selectin.
+    yield_per — читать пачками (поток NDJSON): ORM-объекты пачки после сериализации убираются из сессии.
+    """
+    if serializer.include:
+        stmt = narrow(select(Recipe).options(*serializer.options))
+        if yield_per:
+            stmt = stmt.execution_options(yield_per=yield_per)
+        result = db.session.execute(stmt).scalars()
+        for recipes in (result.partitions() if yield_per else [result.all()]):
+            cards = _recipes_to_cards(recipes, all_saved=all_saved, serializer=serializer)
+            if yield_per:
+                for recipe in recipes:
+                    db.session.expunge(recipe)
+            yield from cards
+        return
+    query = card_query(serializer.fields)
+    saved_by = None
+    if query.with_saved and not all_saved and current_user.is_authenticated:
+        saved_by = current_user.id
+    stmt = narrow(query.select(saved_by=saved_by))
+    if yield_per:
+        stmt = stmt.execution_options(yield_per=yield_per)
+    # строки Core не попадают в identity map — держать нечего
+    yield from query.iter_cards(db.session.execute(stmt), all_saved=all_saved)
+
+
+def _cards_response(serializer: RecipeSerializer, narrow, all_saved: bool = False):
+    """ok({"items": [...]}) или, для Accept: application/x-ndjson, поток карточек."""
+    if wants_ndjson():
+        return ndjson_response(_iter_cards(serializer, narrow, all_saved, yield_per=STREAM_BATCH))
+    return ok({"items": list(_iter_cards(serializer, narrow, all_saved))})
 
 
 def _require_json() -> dict:
@@ -61,25 +223,111 @@ def _require_json() -> dict:
     return data
 
 
+def _ingredient_fields(ing: Any, idx: int, partial: bool = False) -> dict[str, Any]:
+    """Валидирует ингредиент из запроса. partial=True (PATCH) — только переданные поля."""
+    if not isinstance(ing, dict):
+        raise ApiError("VALIDATION_ERROR", f"Ингредиент #{idx}: ожидается объект", HTTPStatus.BAD_REQUEST)
+    fields: dict[str, Any] = {}
+    if not partial or "name" in ing:
+        name = (ing.get("name") or "").strip()
+        if not name:
+            raise ApiError("VALIDATION_ERROR", f"Ингредиент #{idx}: name обязателен", HTTPStatus.BAD_REQUEST)
+        fields["name"] = name
+    if not partial or "quantity" in ing:
+        fields["quantity"] = (ing.get("quantity") or "").strip() or None
+    if not partial or "order" in ing:
+        fields["order"] = int(ing.get("order") or idx)
+    return fields
+
+
+def _step_fields(st: Any, idx: int, partial: bool = False) -> dict[str, Any]:
+    """Валидирует шаг из запроса. partial=True (PATCH) — только переданные поля."""
+    if not isinstance(st, dict):
+        raise ApiError("VALIDATION_ERROR", f"Шаг #{idx}: ожидается объект", HTTPStatus.BAD_REQUEST)
+    fields: dict[str, Any] = {}
+    if not partial or "description" in st:
+        desc = (st.get("description") or "").strip()
+        if not desc:
+            raise ApiError("VALIDATION_ERROR", f"Шаг #{idx}: description обязателен", HTTPStatus.BAD_REQUEST)
+        fields["description"] = desc
+    if not partial or "timer_seconds" in st:
+        timer = int(st.get("timer_seconds") or 0)
+        if timer < 0:
+            raise ApiError("VALIDATION_ERROR", f"Шаг #{idx}: timer_seconds >= 0", HTTPStatus.BAD_REQUEST)
+        fields["timer_seconds"] = timer
+    if not partial or "image_url" in st:
+        fields["image_url"] = (st.get("image_url") or "").strip() or None
+    if not partial or "order" in st:
+        fields["order"] = int(st.get("order") or idx)
+    return fields
+
+
+def _assign(obj: Ingredient | RecipeStep, fields: dict[str, Any]) -> None:
+    # пишем только отличающиеся значения, чтобы неизменённая строка не попала в UPDATE
+    for key, value in fields.items():
+        if getattr(obj, key) == value:
+            continue
+        if key == "name":
+            obj.set_name(value)  # держит name_norm в синхроне с name
+        elif key == "quantity":
+            obj.set_quantity(value)  # и amount/unit — с quantity
+        else:
+            setattr(obj, key, value)
+
+
+def _sync_children(collection: list, items: list, parse, factory) -> None:
+    """
+    Приводит коллекцию детей рецепта к items минимальным набором INSERT/UPDATE/DELETE.
+    Элемент сопоставляется со строкой сначала по id, затем (если id нет или он чужой)
+    по order; несопоставленные элементы вставляются, оставшиеся строки удаляются
+    (delete-orphan). Так правка одного таймера обновляет одну строку, а id остальных не меняются.
+    """
+    parsed = [parse(item, idx) for idx, item in enumerate(items, start=1)]
+
+    by_id = {child.id: child for child in collection}
+    by_order: dict[int, Any] = {}
+    for child in collection:
+        by_order.setdefault(child.order, child)
+
+    matched: list = [None] * len(items)
+    used: set[int] = set()
+    for pos, item in enumerate(items):
+        child = by_id.get(item.get("id"))
+        if child is not None and child.id not in used:
+            matched[pos] = child
+            used.add(child.id)
+    for pos, fields in enumerate(parsed):
+        if matched[pos] is None:
+            child = by_order.get(fields["order"])
+            if child is not None and child.id not in used:
+                matched[pos] = child
+                used.add(child.id)
+
+    for child in list(collection):
+        if child.id not in used:
+            collection.remove(child)
+
+    for child, fields in zip(matched, parsed):
+        if child is None:
+            child = factory()
+            collection.append(child)
+        _assign(child, fields)
+
+    # order_by отношения применяется только при загрузке — упорядочиваем ответ сами
+    collection.sort(key=lambda c: c.order)
+
+
 def _get_or_create_categories(items: list[dict]) -> list[Category]:
-    categories: list[Category] = []
+    pairs = []
     for obj in items:
+        if not isinstance(obj, dict):
+            raise ApiError("VALIDATION_ERROR", "Категория: ожидается объект", HTTPStatus.BAD_REQUEST)
         name = (obj.get("name") or "").strip()
         slug = (obj.get("slug") or "").strip() or None
         if not name:
             raise ApiError("VALIDATION_ERROR", "Категория: name обязателен", HTTPStatus.BAD_REQUEST)
-
-        existing = db.session.execute(select(Category).where(Category.name == name)).scalar_one_or_none()
-        if existing:
-            if slug and not existing.slug:
-                existing.slug = slug
-            categories.append(existing)
-            continue
-
-        cat = Category(name=name, slug=slug)
-        db.session.add(cat)
-        categories.append(cat)
-    return categories
+        pairs.append((name, slug))
+    return resolve_categories(pairs)
 
 
 @recipes_bp.get("")
@@ -87,19 +335,53 @@ def get_all_recipes():
     page = max(int(request.args.get("page", 1)), 1)
     per_page = min(max(int(request.args.get("per_page", 12)), 1), 50)
 
-    q = db.session.query(Recipe).order_by(Recipe.created_at.desc())
-    pagination = q.paginate(page=page, per_page=per_page, error_out=False)
-
-    items = [_recipe_to_dict(r, include_children=False) for r in pagination.items]
-    return ok({"items": items, "page": pagination.page, "pages": pagination.pages, "total": pagination.total})
+    serializer = _requested_serializer()
+    total = db.session.execute(select(func.count()).select_from(Recipe)).scalar()
+    items = list(_iter_cards(
+        serializer,
+        lambda stmt: stmt.order_by(Recipe.created_at.desc()).limit(per_page).offset((page - 1) * per_page),
+    ))
+    return ok({"items": items, "page": page, "pages": math.ceil(total / per_page), "total": total})
 
 
 @recipes_bp.get("/<int:recipe_id>")
 def get_recipe_by_id(recipe_id: int):
-    recipe = db.session.get(Recipe, recipe_id)
+    serializer = _requested_serializer(default_include=RECIPE_INCLUDES)
+    servings = _requested_servings()
+    recipe = db.session.get(Recipe, recipe_id, options=serializer.options)
     if not recipe:
         raise ApiError("RECIPE_NOT_FOUND", "Рецепт не найден", HTTPStatus.NOT_FOUND)
-    return ok(_recipe_to_dict(recipe, include_children=True))
+    data = serializer(recipe, is_saved=serializer.with_saved and _is_saved(recipe.id))
+    if servings is not None:
+        _scale(data, recipe.servings, servings)
+    return ok(data)
+
+
+def _requested_servings() -> Optional[int]:
+    raw = request.args.get("servings")
+    if raw is None:
+        return None
+    try:
+        servings = int(raw)
+    except ValueError:
+        servings = 0
+    if not 1 <= servings <= 100:
+        raise ApiError("VALIDATION_ERROR", "servings: целое число от 1 до 100", HTTPStatus.BAD_REQUEST)
+    return servings
+
+
+def _scale(data: dict[str, Any], base: Optional[int], servings: int) -> None:
+    """?servings=N: количества ингредиентов пересчитываются с base порций на N."""
+    if not base:
+        raise ApiError("VALIDATION_ERROR", "У рецепта не указано число порций", HTTPStatus.BAD_REQUEST)
+    factor = servings / base
+    for ing in data.get("ingredients", ()):
+        ing["quantity"] = scale_quantity(ing["quantity"], factor)
+        if ing["amount"] is not None:
+            ing["amount"] = round(ing["amount"] * factor, 2)
+    if "servings" in data:
+        data["servings"] = servings
+        data["base_servings"] = base
 
 
 @recipes_bp.post("")
@@ -154,33 +436,14 @@ def create_recipe():
 
     # дочерние записи
     for idx, ing in enumerate(ingredients, start=1):
-        name = (ing.get("name") or "").strip()
-        if not name:
-            raise ApiError("VALIDATION_ERROR", f"Ингредиент #{idx}: name обязателен", HTTPStatus.BAD_REQUEST)
-
-        ing_obj = Ingredient(
-            quantity=(ing.get("quantity") or "").strip() or None,
-            order=int(ing.get("order") or idx),
-        )
-        ing_obj.set_name(name)  # <-- ВОТ СЮДА
+        ing_obj = Ingredient()
+        _assign(ing_obj, _ingredient_fields(ing, idx))
         recipe.ingredients.append(ing_obj)
 
     for idx, st in enumerate(steps, start=1):
-        desc = (st.get("description") or "").strip()
-        if not desc:
-            raise ApiError("VALIDATION_ERROR", f"Шаг #{idx}: description обязателен", HTTPStatus.BAD_REQUEST)
-        timer = int(st.get("timer_seconds") or 0)
-        if timer < 0:
-            raise ApiError("VALIDATION_ERROR", f"Шаг #{idx}: timer_seconds >= 0", HTTPStatus.BAD_REQUEST)
-
-        recipe.steps.append(
-            RecipeStep(
-                order=int(st.get("order") or idx),
-                description=desc,
-                image_url=(st.get("image_url") or "").strip() or None,
-                timer_seconds=timer,
-            )
-        )
+        step_obj = RecipeStep()
+        _assign(step_obj, _step_fields(st, idx))
+        recipe.steps.append(step_obj)
 
     # категории
     recipe.categories = _get_or_create_categories(categories_in)
@@ -230,44 +493,18 @@ def update_recipe(recipe_id: int):
     if "image_url" in data:
         recipe.image_url = (data.get("image_url") or "").strip() or None
 
-    # Полная замена ингредиентов/шагов, если переданы
+    # Переданные ингредиенты/шаги применяются диффом к существующим строкам
     if "ingredients" in data:
         ingredients = data.get("ingredients") or []
         if not isinstance(ingredients, list):
             raise ApiError("VALIDATION_ERROR", "ingredients должен быть массивом", HTTPStatus.BAD_REQUEST)
-        recipe.ingredients.clear()
-        for idx, ing in enumerate(ingredients, start=1):
-            name = (ing.get("name") or "").strip()
-            if not name:
-                raise ApiError("VALIDATION_ERROR", f"Ингредиент #{idx}: name обязателен", HTTPStatus.BAD_REQUEST)
-
-            ing_obj = Ingredient(
-                quantity=(ing.get("quantity") or "").strip() or None,
-                order=int(ing.get("order") or idx),
-            )
-            ing_obj.set_name(name)  # <-- ВОТ СЮДА
-            recipe.ingredients.append(ing_obj)
+        _sync_children(recipe.ingredients, ingredients, _ingredient_fields, Ingredient)
 
     if "steps" in data:
         steps = data.get("steps") or []
         if not isinstance(steps, list):
             raise ApiError("VALIDATION_ERROR", "steps должен быть массивом", HTTPStatus.BAD_REQUEST)
-        recipe.steps.clear()
-        for idx, st in enumerate(steps, start=1):
-            desc = (st.get("description") or "").strip()
-            if not desc:
-                raise ApiError("VALIDATION_ERROR", f"Шаг #{idx}: description обязателен", HTTPStatus.BAD_REQUEST)
-            timer = int(st.get("timer_seconds") or 0)
-            if timer < 0:
-                raise ApiError("VALIDATION_ERROR", f"Шаг #{idx}: timer_seconds >= 0", HTTPStatus.BAD_REQUEST)
-            recipe.steps.append(
-                RecipeStep(
-                    order=int(st.get("order") or idx),
-                    description=desc,
-                    image_url=(st.get("image_url") or "").strip() or None,
-                    timer_seconds=timer,
-                )
-            )
+        _sync_children(recipe.steps, steps, _step_fields, RecipeStep)
 
     if "categories" in data:
         categories_in = data.get("categories") or []
@@ -281,7 +518,54 @@ def update_recipe(recipe_id: int):
         db.session.rollback()
         raise ApiError("DB_CONFLICT", "Конфликт данных при сохранении", HTTPStatus.CONFLICT)
 
-    return ok(_recipe_to_dict(recipe, include_children=True))
+    return ok(_recipe_to_dict(recipe, include_children=True, is_saved=_is_saved(recipe.id)))
+
+
+def _get_own_child(model, recipe_id: int, child_id: int, code: str, message: str):
+    row = db.session.execute(
+        select(model, Recipe.author_id)
+        .join(Recipe, Recipe.id == model.recipe_id)
+        .where(model.id == child_id, model.recipe_id == recipe_id)
+    ).first()
+    if row is None:
+        raise ApiError(code, message, HTTPStatus.NOT_FOUND)
+    child, author_id = row
+    if author_id != current_user.id:
+        raise ApiError("FORBIDDEN", "Нет прав на изменение рецепта", HTTPStatus.FORBIDDEN)
+    return child
+
+
+def _commit_child(child, recipe_id: int) -> None:
+    # правка дочерней строки — тоже изменение рецепта
+    if db.session.is_modified(child):
+        db.session.execute(
+            update(Recipe).where(Recipe.id == recipe_id).values(updated_at=datetime.utcnow())
+        )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise ApiError("DB_CONFLICT", "Конфликт данных при сохранении", HTTPStatus.CONFLICT)
+
+
+@recipes_bp.patch("/<int:recipe_id>/ingredients/<int:ingredient_id>")
+@login_required
+def patch_ingredient(recipe_id: int, ingredient_id: int):
+    """Частичное обновление одного ингредиента (автосохранение редактора)."""
+    ing = _get_own_child(Ingredient, recipe_id, ingredient_id, "INGREDIENT_NOT_FOUND", "Ингредиент не найден")
+    _assign(ing, _ingredient_fields(_require_json(), ing.order, partial=True))
+    _commit_child(ing, recipe_id)
+    return ok(_ingredient_to_dict(ing))
+
+
+@recipes_bp.patch("/<int:recipe_id>/steps/<int:step_id>")
+@login_required
+def patch_step(recipe_id: int, step_id: int):
+    """Частичное обновление одного шага (автосохранение редактора)."""
+    step = _get_own_child(RecipeStep, recipe_id, step_id, "STEP_NOT_FOUND", "Шаг не найден")
+    _assign(step, _step_fields(_require_json(), step.order, partial=True))
+    _commit_child(step, recipe_id)
+    return ok(_step_to_dict(step))
 
 
 @recipes_bp.delete("/<int:recipe_id>")
@@ -298,66 +582,95 @@ def delete_recipe(recipe_id: int):
     return ok({"message": "Удалено"})
 
 
-@recipes_bp.get("/search")
-def search_by_ingredients():
-    q = (request.args.get("q") or "").strip()
+def _search_filter(q: str):
+    """Условие «рецепт содержит один из ингредиентов строки q» ("сыр, курица")."""
+    q = (q or "").strip()
     if not q:
         raise ApiError("VALIDATION_ERROR", "Параметр q обязателен", HTTPStatus.BAD_REQUEST)
 
-    parts = [p.strip() for p in q.split(",") if p.strip()]
-    if not parts:
+    keys = list(dict.fromkeys(k for k in (term_key(p) for p in q.split(",")) if k))
+    if not keys:
         raise ApiError("VALIDATION_ERROR", "Не заданы ингредиенты для поиска", HTTPStatus.BAD_REQUEST)
 
-    # Нормализуем запрос (lower) и ищем по name_norm.
-    # Это нужно, потому что SQLite case-insensitive поиск для Unicode (кириллица) ненадёжен [web:91]
-    parts_norm = [p.lower() for p in parts]
-    conds = [Ingredient.name_norm.like(f"%{p}%") for p in parts_norm]
+    # подстрока ищется по словарю терминов (он мал), ингредиенты — по индексу (term_id, recipe_id).
+    # Ключи нормализованы в Python: SQLite case-insensitive поиск для Unicode (кириллица) ненадёжен [web:91]
+    term_ids = select(IngredientTerm.id).where(or_(*(IngredientTerm.key.contains(k, autoescape=True) for k in keys)))
+    return Recipe.id.in_(select(Ingredient.recipe_id).where(Ingredient.term_id.in_(term_ids)))
 
-    recipe_ids = (
-        db.session.query(Ingredient.recipe_id)
-        .filter(or_(*conds))
-        .distinct()
-        .subquery()
-    )
 
-    recipes = (
-        db.session.query(Recipe)
-        .filter(Recipe.id.in_(select(recipe_ids.c.recipe_id)))
-        .order_by(Recipe.created_at.desc())
-        .all()
-    )
+def _search_statement(q: str):
+    """SELECT рецептов по ингредиентам; общий для sync и async путей."""
+    return select(Recipe).where(_search_filter(q)).order_by(Recipe.created_at.desc())
+
+
+@recipes_bp.get("/search")
+@request_class("search")
+def search_by_ingredients():
+    serializer = _requested_serializer()
+    condition = _search_filter(request.args.get("q"))
+    return _cards_response(serializer, lambda stmt: stmt.where(condition).order_by(Recipe.created_at.desc()))
+
+
+@recipes_bp.get("/shopping-list")
+def shopping_list():
+    """
+    Список покупок: ?ids=1,2,3 (до 50 рецептов) или ?saved=1 — по избранному.
+    ?servings=N пересчитывает каждый рецепт на N порций.
+    Одинаковые ингредиенты (один термин словаря) с одной единицей складываются одним GROUP BY в БД.
+    """
+    servings = _requested_servings()
+    if request.args.get("saved"):
+        if not current_user.is_authenticated:
+            raise ApiError("UNAUTHORIZED", "Требуется аутентификация", HTTPStatus.UNAUTHORIZED)
+        recipe_ids = select(user_saved_recipe.c.recipe_id).where(user_saved_recipe.c.user_id == current_user.id)
+    else:
+        try:
+            recipe_ids = sorted({int(i) for i in (request.args.get("ids") or "").split(",") if i.strip()})
+        except ValueError:
+            raise ApiError("VALIDATION_ERROR", "ids: список id через запятую", HTTPStatus.BAD_REQUEST)
+        if not 1 <= len(recipe_ids) <= 50:
+            raise ApiError("VALIDATION_ERROR", "ids: от 1 до 50 рецептов", HTTPStatus.BAD_REQUEST)
 
-    return ok({"items": [_recipe_to_dict(r, include_children=False) for r in recipes]})
+    rows = db.session.execute(shopping_list_statement(recipe_ids, servings)).all()
+    return ok({"items": shopping_items(rows)})
 
 
 @recipes_bp.get("/my")
 @login_required
 def my_saved_recipes():
-    return ok({"items": [_recipe_to_dict(r, include_children=False) for r in current_user.saved_recipes]})
+    serializer = _requested_serializer()
+    user_id = current_user.id
+    return _cards_response(
+        serializer,
+        lambda stmt: stmt.join(user_saved_recipe, user_saved_recipe.c.recipe_id == Recipe.id)
+        .where(user_saved_recipe.c.user_id == user_id),
+        # здесь все рецепты в избранном по определению — отдельный запрос не нужен
+        all_saved=True,
+    )
 
 
 @recipes_bp.post("/<int:recipe_id>/save")
 @login_required
 def save_recipe(recipe_id: int):
-    recipe = db.session.get(Recipe, recipe_id)
-    if not recipe:
-        raise ApiError("RECIPE_NOT_FOUND", "Рецепт не найден", HTTPStatus.NOT_FOUND)
-
-    # вставка в ассоц. таблицу (если уже есть — игнорируем)
-    exists = db.session.execute(
-        select(user_saved_recipe.c.user_id).where(
-            (user_saved_recipe.c.user_id == current_user.id)
-            & (user_saved_recipe.c.recipe_id == recipe_id)
+    # INSERT ... SELECT FROM recipes ON CONFLICT DO NOTHING RETURNING: одна команда проверяет
+    # рецепт, вставляет и сообщает, была ли вставка; повторные сохранения не падают на PK
+    saved = db.session.execute(
+        upsert(user_saved_recipe)
+        .from_select(
+            ["user_id", "recipe_id", "saved_at"],
+            select(literal(current_user.id), Recipe.id, literal(datetime.utcnow(), db.DateTime))
+            .where(Recipe.id == recipe_id),
         )
+        .returning(user_saved_recipe.c.recipe_id)
     ).first()
-    if exists:
-        return ok({"message": "Уже в избранном"})
-
-    db.session.execute(
-        user_saved_recipe.insert().values(user_id=current_user.id, recipe_id=recipe_id)
-    )
     db.session.commit()
-    return ok({"message": "Сохранено"})
+    if saved:
+        return ok({"message": "Сохранено"})
+
+    # ничего не вставлено: либо уже в избранном, либо рецепта нет
+    if db.session.execute(select(Recipe.id).where(Recipe.id == recipe_id)).first() is None:
+        raise ApiError("RECIPE_NOT_FOUND", "Рецепт не найден", HTTPStatus.NOT_FOUND)
+    return ok({"message": "Уже в избранном"})
 
 
 @recipes_bp.delete("/<int:recipe_id>/save")
@@ -375,10 +688,8 @@ def unsave_recipe(recipe_id: int):
 @recipes_bp.get("/mine")
 @login_required
 def my_authored_recipes():
-    recipes = (
-        db.session.query(Recipe)
-        .filter(Recipe.author_id == current_user.id)
-        .order_by(Recipe.created_at.desc())
-        .all()
+    serializer = _requested_serializer()
+    user_id = current_user.id
+    return _cards_response(
+        serializer, lambda stmt: stmt.where(Recipe.author_id == user_id).order_by(Recipe.created_at.desc())
     )
-    return ok({"items": [_recipe_to_dict(r, include_children=False) for r in recipes]})
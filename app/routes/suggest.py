@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from http import HTTPStatus
+
+from flask import Blueprint, current_app, request
+
+from app.api import ApiError, ok
+from app.utils.suggest import KINDS, MAX_LIMIT, get_suggestions
+
+
+suggest_bp = Blueprint("suggest", __name__, url_prefix="/api/suggest")
+
+
+@suggest_bp.get("")
+def suggest():
+    """
+    Подсказки по префиксу из индекса в памяти (app/utils/suggest.py), без запросов к БД.
+    Ответ не зависит от пользователя — его можно кэшировать по URL в браузере и на прокси.
+    """
+    kind = request.args.get("kind") or ""
+    if kind not in KINDS:
+        raise ApiError("VALIDATION_ERROR", "kind: ingredient или title", HTTPStatus.BAD_REQUEST)
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        raise ApiError("VALIDATION_ERROR", f"limit: целое число от 1 до {MAX_LIMIT}", HTTPStatus.BAD_REQUEST)
+    limit = min(max(limit, 1), MAX_LIMIT)
+    prefix = request.args.get("prefix") or ""
+
+    resp = ok({"kind": kind, "prefix": prefix, "items": get_suggestions(kind, prefix, limit)})
+    resp.headers["Cache-Control"] = f"public, max-age={current_app.config.get('SUGGEST_MAX_AGE_SECONDS', 60)}"
+    return resp
@@ -5,7 +5,9 @@ from http import HTTPStatus
 from flask import Blueprint, request
 from flask_login import login_required
 
+from app import db
 from app.api import ApiError, ok
+from app.utils.admission import request_class
 from app.utils.uploads import save_image
 
 
@@ -13,6 +15,7 @@ uploads_bp = Blueprint("uploads", __name__, url_prefix="/api/uploads")
 
 
 @uploads_bp.post("/image")
+@request_class("upload")
 @login_required
 def upload_image():
     """
@@ -26,4 +29,5 @@ def upload_image():
         raise ApiError("VALIDATION_ERROR", "Нужно передать file", HTTPStatus.BAD_REQUEST)
 
     url = save_image(file)
+    db.session.commit()  # задача optimize_image видна воркеру только после commit
     return ok({"url": url}, HTTPStatus.CREATED)
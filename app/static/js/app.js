@@ -27,6 +27,14 @@ const CookFlow = (() => {
     return document.querySelector('meta[name="csrf-token"]')?.getAttribute("content") || null;
   }
 
+  async function refreshCsrfToken() {
+    const res = await fetch("/api/auth/csrf", { credentials: "same-origin", cache: "no-store" });
+    const json = await res.json().catch(() => null);
+    const token = json?.data?.csrf_token;
+    const meta = document.querySelector('meta[name="csrf-token"]');
+    if (token && meta) meta.setAttribute("content", token);
+  }
+
   async function apiFetch(url, options = {}) {
     const opts = {
       headers: {
@@ -50,8 +58,20 @@ const CookFlow = (() => {
     }
 
     const res = await fetch(url, opts);
+    if (options.meta) {
+      options.meta.status = res.status;
+      options.meta.etag = res.headers.get("ETag");
+    }
+    // 304 приходит только на If-None-Match из cachedGet — данные берутся из кэша
+    if (res.status === 304) return null;
     const json = await res.json().catch(() => null);
 
+    // страница могла прийти из кэша service worker'а со старым токеном — берём свежий и повторяем один раз
+    if (json?.error?.code === "CSRF_FAILED" && !options.csrfRetried) {
+      await refreshCsrfToken();
+      return apiFetch(url, { ...options, csrfRetried: true });
+    }
+
     if (!res.ok) {
       const msg = json?.error?.message || "Ошибка запроса";
       const code = json?.error?.code || "HTTP_ERROR";
@@ -66,21 +86,124 @@ const CookFlow = (() => {
       throw new Error(msg);
     }
 
+    if (!["GET", "HEAD"].includes(method)) invalidateCache(url);
     return json?.data ?? json;
   }
 
+  // -----------------------------
+  // Client cache (GET)
+  // -----------------------------
+  // Ответы GET лежат в sessionStorage (переживают переход между страницами вкладки):
+  // страница рисуется из кэша сразу, а запрос с If-None-Match обновляет её в фоне.
+  // Одинаковые одновременные запросы склеиваются, изменения (POST/PUT/PATCH/DELETE)
+  // сбрасывают затронутые URL.
+  const CACHE_PREFIX = "cookflow.api:";
+  const FRESH_MS = 10000; // столько данные считаются свежими и не перепроверяются вовсе
+  const memoryCache = new Map();
+  const inflight = new Map();
+
+  // какие закэшированные URL (по префиксу) устаревают после изменения; "" — все
+  const INVALIDATES = [
+    [/^\/api\/auth\//, [""]],
+    [/^\/api\/(recipes|comments|uploads)/, ["/api/recipes"]],
+    [/^\/api\/(challenges|cooking)/, ["/api/challenges"]],
+  ];
+
+  function readCache(url) {
+    if (memoryCache.has(url)) return memoryCache.get(url);
+    try {
+      const entry = JSON.parse(sessionStorage.getItem(CACHE_PREFIX + url));
+      if (entry) memoryCache.set(url, entry);
+      return entry;
+    } catch (e) {
+      return null;
+    }
+  }
+
+  function writeCache(url, entry) {
+    memoryCache.set(url, entry);
+    try {
+      sessionStorage.setItem(CACHE_PREFIX + url, JSON.stringify(entry));
+    } catch (e) {
+      // переполнен sessionStorage — хватит кэша в памяти
+    }
+  }
+
+  function invalidateCache(mutatedUrl) {
+    const path = new URL(mutatedUrl, window.location.origin).pathname;
+    const rule = INVALIDATES.find(([re]) => re.test(path));
+    const prefixes = rule ? rule[1] : [""];
+    const stale = (url) => prefixes.some(p => url.startsWith(p));
+
+    for (const url of [...memoryCache.keys()]) {
+      if (stale(url)) memoryCache.delete(url);
+    }
+    for (let i = sessionStorage.length - 1; i >= 0; i--) {
+      const key = sessionStorage.key(i);
+      if (key.startsWith(CACHE_PREFIX) && stale(key.slice(CACHE_PREFIX.length))) sessionStorage.removeItem(key);
+    }
+  }
+
+  function cachedGet(url) {
+    if (inflight.has(url)) return inflight.get(url);
+
+    const cached = readCache(url);
+    const meta = {};
+    const request = apiFetch(url, {
+      method: "GET",
+      headers: cached?.etag ? { "If-None-Match": cached.etag } : {},
+      meta,
+    })
+      .then(data => {
+        if (meta.status === 304 && cached) {
+          writeCache(url, { ...cached, time: Date.now() });
+          return cached.data;
+        }
+        writeCache(url, { data, etag: meta.etag, time: Date.now() });
+        return data;
+      })
+      .finally(() => inflight.delete(url));
+
+    inflight.set(url, request);
+    return request;
+  }
+
+  // render вызывается сразу с данными из кэша (если есть) и ещё раз, если сервер вернул другие
+  async function apiGet(url, render) {
+    const cached = readCache(url);
+    if (!cached) {
+      const data = await cachedGet(url);
+      render(data);
+      return data;
+    }
+
+    render(cached.data);
+    if (Date.now() - cached.time >= FRESH_MS) {
+      const before = JSON.stringify(cached.data);
+      cachedGet(url)
+        .then(data => { if (JSON.stringify(data) !== before) render(data); })
+        .catch(() => {});
+    }
+    return cached.data;
+  }
+
   // -----------------------------
   // Auth
   // -----------------------------
   async function getCurrentUser() {
-    const data = await apiFetch("/api/auth/user", { method: "GET" });
-    currentUser = data.user;
+    await apiGet("/api/auth/user", (data) => { currentUser = data.user; });
     return currentUser;
   }
 
   async function initAuthUI() {
-    await getCurrentUser();
+    await apiGet("/api/auth/user", (data) => {
+      currentUser = data.user;
+      renderAuthUI();
+    });
+    if (currentUser) flushPendingCompletions();
+  }
 
+  function renderAuthUI() {
     const badge = document.getElementById("userBadge");
     const loginLink = document.getElementById("loginLink");
     const registerLink = document.getElementById("registerLink");
@@ -138,6 +261,7 @@ const CookFlow = (() => {
     const img = r.image_url ? `<img class="card-img" src="${r.image_url}" alt="">` : "";
     const diff = r.difficulty ? `<span class="pill">${escapeHtml(r.difficulty)}</span>` : "";
     const time = r.cooking_time ? `<span class="pill">${escapeHtml(r.cooking_time)} мин</span>` : "";
+    const saved = r.is_saved ? `<span class="pill pill-ok"><i class="fa-solid fa-bookmark"></i></span>` : "";
     return `
       <a class="card" href="/recipe/${r.id}">
         ${img}
@@ -146,7 +270,7 @@ const CookFlow = (() => {
             <h3 class="card-title">${escapeHtml(r.title)}</h3>
             <span class="muted">${escapeHtml(r.author?.name || "")}</span>
           </div>
-          <div class="row">${diff}${time}</div>
+          <div class="row">${diff}${time}${saved}</div>
         </div>
       </a>
     `;
@@ -155,8 +279,7 @@ const CookFlow = (() => {
   let recipesPage = 1;
   const perPage = 12;
 
-  async function loadRecipes() {
-    const data = await apiFetch(`/api/recipes?page=${recipesPage}&per_page=${perPage}`, { method: "GET" });
+  function renderRecipesPage(data) {
     const grid = document.getElementById("recipesGrid");
     if (grid) grid.innerHTML = (data.items || []).map(recipeCard).join("");
 
@@ -167,6 +290,13 @@ const CookFlow = (() => {
     if (pageInfo) pageInfo.textContent = `Страница ${data.page} из ${data.pages}`;
     if (prev) prev.disabled = data.page <= 1;
     if (next) next.disabled = data.page >= data.pages;
+  }
+
+  async function loadRecipes() {
+    await apiGet(`/api/recipes?page=${recipesPage}&per_page=${perPage}`, renderRecipesPage);
+
+    const prev = document.getElementById("prevPage");
+    const next = document.getElementById("nextPage");
 
     if (prev && !prev.dataset.bound) {
       prev.dataset.bound = "1";
@@ -266,9 +396,10 @@ const CookFlow = (() => {
   }
 
   async function loadSavedRecipes() {
-    const data = await apiFetch("/api/recipes/my", { method: "GET" });
-    const grid = document.getElementById("savedGrid");
-    if (grid) grid.innerHTML = (data.items || []).map(recipeCard).join("");
+    await apiGet("/api/recipes/my", (data) => {
+      const grid = document.getElementById("savedGrid");
+      if (grid) grid.innerHTML = (data.items || []).map(recipeCard).join("");
+    });
   }
 
   async function loadMyAuthoredRecipes() {
@@ -280,23 +411,59 @@ const CookFlow = (() => {
   // -----------------------------
   // Comments
   // -----------------------------
+  function commentHtml(c) {
+    return `
+      <div class="comment" data-comment-id="${c.id}">
+        <div class="row row-between">
+          <strong>${escapeHtml(c.user.name)}</strong>
+          <span class="muted">${new Date(c.created_at).toLocaleString("ru-RU")}</span>
+        </div>
+        <div>${escapeHtml(c.text)}</div>
+      </div>
+    `;
+  }
+
+  function renderEmptyComments(list) {
+    if (!list.querySelector(".comment")) list.innerHTML = `<div class="muted">Пока нет комментариев</div>`;
+  }
+
+  function appendComment(c) {
+    const list = document.getElementById("commentsList");
+    if (!list || list.querySelector(`[data-comment-id="${c.id}"]`)) return;
+    if (!list.querySelector(".comment")) list.innerHTML = "";
+    list.insertAdjacentHTML("beforeend", commentHtml(c));
+  }
+
+  function removeComment(id) {
+    const list = document.getElementById("commentsList");
+    const el = list && list.querySelector(`[data-comment-id="${id}"]`);
+    if (!el) return;
+    el.remove();
+    renderEmptyComments(list);
+  }
+
+  // Полный список грузится один раз; дальше новые и удалённые комментарии приходят по SSE.
+  // EventSource сам переподключается и шлёт Last-Event-ID, сервер дошлёт пропущенное.
+  function subscribeComments(recipeId, lastEventId) {
+    if (!window.EventSource) return;
+    const source = new EventSource(`/api/recipes/${recipeId}/comments/stream?last_event_id=${lastEventId || 0}`);
+    source.addEventListener("comment_created", (e) => appendComment(JSON.parse(e.data)));
+    source.addEventListener("comment_deleted", (e) => removeComment(JSON.parse(e.data).id));
+    source.onerror = () => {
+      // CLOSED — сервер отказал (например, 503 при лимите подключений): пробуем позже сами
+      if (source.readyState !== EventSource.CLOSED) return;
+      setTimeout(() => loadComments(recipeId), 30000);
+    };
+  }
+
   async function loadComments(recipeId) {
     const data = await apiFetch(`/api/recipes/${recipeId}/comments`, { method: "GET" });
     const list = document.getElementById("commentsList");
     if (!list) return;
 
-    const items = data.items || [];
-    list.innerHTML = items.length
-      ? items.map(c => `
-          <div class="comment">
-            <div class="row row-between">
-              <strong>${escapeHtml(c.user.name)}</strong>
-              <span class="muted">${new Date(c.created_at).toLocaleString("ru-RU")}</span>
-            </div>
-            <div>${escapeHtml(c.text)}</div>
-          </div>
-        `).join("")
-      : `<div class="muted">Пока нет комментариев</div>`;
+    list.innerHTML = (data.items || []).map(commentHtml).join("");
+    renderEmptyComments(list);
+    subscribeComments(recipeId, data.last_event_id);
   }
 
   async function addComment(recipeId, text) {
@@ -304,10 +471,12 @@ const CookFlow = (() => {
       showFlash("Введите текст комментария", "error");
       return;
     }
-    await apiFetch(`/api/recipes/${recipeId}/comments`, {
+    const comment = await apiFetch(`/api/recipes/${recipeId}/comments`, {
       method: "POST",
       body: JSON.stringify({ text }),
     });
+    // свой комментарий показываем сразу; событие из потока с тем же id будет пропущено
+    if (comment) appendComment(comment);
     showFlash("Комментарий добавлен", "ok");
   }
 
@@ -315,8 +484,11 @@ const CookFlow = (() => {
   // Challenges
   // -----------------------------
   async function loadChallenges() {
-    const data = await apiFetch("/api/challenges", { method: "GET" });
+    await apiGet("/api/challenges", renderChallenges);
+    await loadMyChallenges();
+  }
 
+  function renderChallenges(data) {
     const grid = document.getElementById("challengesGrid");
     if (grid) {
       grid.innerHTML = (data.items || []).map(ch => {
@@ -343,8 +515,6 @@ const CookFlow = (() => {
         });
       });
     }
-
-    await loadMyChallenges();
   }
 
   async function loadMyChallenges() {
@@ -418,12 +588,65 @@ const CookFlow = (() => {
     return json.data.url;
   }
 
+  // -----------------------------
+  // Suggestions (/api/suggest)
+  // -----------------------------
+  const SUGGEST_DELAY_MS = 120;
+  const suggestCache = new Map();
+  let suggestLists = 0;
+
+  function fetchSuggestions(kind, prefix) {
+    const url = `/api/suggest?kind=${kind}&prefix=${encodeURIComponent(prefix)}&limit=8`;
+    if (!suggestCache.has(url)) {
+      // ответ общий для всех пользователей, браузер кэширует его сам (Cache-Control: public)
+      suggestCache.set(url, fetch(url, { credentials: "same-origin" })
+        .then(res => (res.ok ? res.json() : null))
+        .then(json => json?.data?.items || [])
+        .catch(() => []));
+    }
+    return suggestCache.get(url);
+  }
+
+  // multi — значения через запятую (поиск по ингредиентам): подсказывается последнее
+  function attachSuggest(input, kind, { multi = false } = {}) {
+    if (!input) return;
+    const list = document.createElement("datalist");
+    list.id = `suggest-${++suggestLists}`;
+    input.setAttribute("list", list.id);
+    input.setAttribute("autocomplete", "off");
+    input.after(list);
+
+    let timer = null;
+    input.addEventListener("input", () => {
+      clearTimeout(timer);
+      timer = setTimeout(async () => {
+        const value = input.value;
+        const parts = multi ? value.split(",") : [value];
+        const prefix = parts[parts.length - 1].trim();
+        if (!prefix) {
+          list.innerHTML = "";
+          return;
+        }
+        const items = await fetchSuggestions(kind, prefix);
+        if (input.value !== value) return; // пока ждали ответ, ввод ушёл дальше
+        const head = parts.slice(0, -1).map(p => p.trim()).filter(Boolean);
+        list.innerHTML = "";
+        for (const item of items) {
+          const option = document.createElement("option");
+          option.value = [...head, item.text].join(", ");
+          list.appendChild(option);
+        }
+      }, SUGGEST_DELAY_MS);
+    });
+  }
+
   // -----------------------------
   // Add recipe form
   // -----------------------------
-  function ingredientRowPrefill(name = "", qty = "") {
+  function ingredientRowPrefill(name = "", qty = "", id = null) {
     const div = document.createElement("div");
     div.className = "row";
+    if (id) div.dataset.id = String(id);
     div.innerHTML = `
       <input class="input ing-name" placeholder="Ингредиент" required>
       <input class="input ing-qty" placeholder="Количество">
@@ -432,12 +655,14 @@ const CookFlow = (() => {
     div.querySelector(".ing-name").value = name;
     div.querySelector(".ing-qty").value = qty;
     div.querySelector(".ing-del").addEventListener("click", () => div.remove());
+    attachSuggest(div.querySelector(".ing-name"), "ingredient");
     return div;
   }
 
-  function stepRowPrefill(desc = "", timer = 0, imageUrl = "") {
+  function stepRowPrefill(desc = "", timer = 0, imageUrl = "", id = null) {
     const div = document.createElement("div");
     div.className = "card";
+    if (id) div.dataset.id = String(id);
     div.style.padding = "12px";
     div.innerHTML = `
       <textarea class="textarea step-desc" placeholder="Описание шага" required></textarea>
@@ -491,6 +716,7 @@ const CookFlow = (() => {
 
     ingBox.appendChild(ingredientRowPrefill());
     stepsBox.appendChild(stepRowPrefill());
+    attachSuggest(document.getElementById("title"), "title");
 
     addIngredientBtn.addEventListener("click", () => ingBox.appendChild(ingredientRowPrefill()));
     addStepBtn.addEventListener("click", () => stepsBox.appendChild(stepRowPrefill()));
@@ -589,6 +815,7 @@ const CookFlow = (() => {
     document.getElementById("servings").value = r.servings ?? "";
     document.getElementById("difficulty").value = r.difficulty ?? "";
     document.getElementById("categories").value = (r.categories || []).map(c => c.name).join(", ");
+    attachSuggest(document.getElementById("title"), "title");
 
     const note = document.getElementById("currentImageNote");
     if (note) note.textContent = r.image_url ? `Текущее: ${r.image_url}` : "Текущее: нет";
@@ -598,8 +825,8 @@ const CookFlow = (() => {
     ingBox.innerHTML = "";
     stepsBox.innerHTML = "";
 
-    (r.ingredients || []).forEach(i => ingBox.appendChild(ingredientRowPrefill(i.name, i.quantity || "")));
-    (r.steps || []).forEach(s => stepsBox.appendChild(stepRowPrefill(s.description, s.timer_seconds || 0, s.image_url || "")));
+    (r.ingredients || []).forEach(i => ingBox.appendChild(ingredientRowPrefill(i.name, i.quantity || "", i.id)));
+    (r.steps || []).forEach(s => stepsBox.appendChild(stepRowPrefill(s.description, s.timer_seconds || 0, s.image_url || "", s.id)));
 
     if ((r.ingredients || []).length === 0) ingBox.appendChild(ingredientRowPrefill());
     if ((r.steps || []).length === 0) stepsBox.appendChild(stepRowPrefill());
@@ -607,11 +834,40 @@ const CookFlow = (() => {
     document.getElementById("addIngredientBtn").addEventListener("click", () => ingBox.appendChild(ingredientRowPrefill()));
     document.getElementById("addStepBtn").addEventListener("click", () => stepsBox.appendChild(stepRowPrefill()));
 
+    // Автосохранение уже существующих строк: PATCH одной строки вместо PUT всего рецепта.
+    // Новые/удалённые строки и порядок сохраняются кнопкой "Сохранить".
+    ingBox.addEventListener("change", async (e) => {
+      const row = e.target.closest(".row[data-id]");
+      if (!row) return;
+      const name = row.querySelector(".ing-name").value.trim();
+      if (!name) return;
+      await apiFetch(`/api/recipes/${recipeId}/ingredients/${row.dataset.id}`, {
+        method: "PATCH",
+        body: JSON.stringify({ name, quantity: row.querySelector(".ing-qty").value.trim() })
+      });
+    });
+
+    stepsBox.addEventListener("change", async (e) => {
+      const card = e.target.closest(".card[data-id]");
+      if (!card || e.target.classList.contains("step-image-file")) return;
+      const description = card.querySelector(".step-desc").value.trim();
+      if (!description) return;
+      await apiFetch(`/api/recipes/${recipeId}/steps/${card.dataset.id}`, {
+        method: "PATCH",
+        body: JSON.stringify({
+          description,
+          timer_seconds: parseInt(card.querySelector(".step-timer").value || "0", 10) || 0,
+          image_url: card.querySelector(".step-image-url").value.trim()
+        })
+      });
+    });
+
     document.getElementById("editRecipeForm").addEventListener("submit", async (e) => {
       e.preventDefault();
 
       const ingredients = [...ingBox.querySelectorAll(".row")]
         .map((row, idx) => ({
+          id: row.dataset.id ? Number(row.dataset.id) : undefined,
           order: idx + 1,
           name: row.querySelector(".ing-name").value.trim(),
           quantity: row.querySelector(".ing-qty").value.trim()
@@ -630,6 +886,7 @@ const CookFlow = (() => {
         if (f) image_url = await uploadStepImage(f);
 
         steps.push({
+          id: card.dataset.id ? Number(card.dataset.id) : undefined,
           order: idx + 1,
           description,
           timer_seconds: parseInt(card.querySelector(".step-timer").value || "0", 10) || 0,
@@ -712,9 +969,24 @@ const CookFlow = (() => {
     }
 
     overlay.classList.remove("hidden");
+    prefetchStepImages(recipe);
     showStep(0);
   }
 
+  // все картинки шагов — в кэш service worker'а: дальше готовка не зависит от сети
+  function prefetchStepImages(recipe) {
+    const urls = (recipe.steps || []).map(s => s.image_url).filter(Boolean);
+    const sw = navigator.serviceWorker && navigator.serviceWorker.controller;
+    if (urls.length && sw) sw.postMessage({ type: "prefetch", urls });
+  }
+
+  // следующие шаги браузер загружает и декодирует заранее — переключение без паузы
+  function preloadNextImages(idx) {
+    (cooking.recipe.steps || []).slice(idx + 1, idx + 3).forEach(s => {
+      if (s.image_url) new Image().src = s.image_url;
+    });
+  }
+
   function stopCookingMode() {
     if (cooking.timerId) clearInterval(cooking.timerId);
     cooking.timerId = null;
@@ -746,6 +1018,7 @@ const CookFlow = (() => {
     } else {
       img.classList.add("hidden");
     }
+    preloadNextImages(cooking.idx);
 
     if (cooking.timerId) clearInterval(cooking.timerId);
     cooking.timerId = null;
@@ -765,9 +1038,9 @@ const CookFlow = (() => {
     if (!recipe) return;
 
     if (cooking.idx >= recipe.steps.length - 1) {
-      // засчитываем готовку (если вы подключили /api/cooking/complete/<id>)
+      // засчитываем готовку; без сети запрос уйдёт из очереди при подключении
       try {
-        await apiFetch(`/api/cooking/complete/${recipe.id}`, { method: "POST" });
+        await completeCooking(recipe.id);
       } catch (e) {
         // если не засчиталось — всё равно завершаем UI
       }
@@ -806,6 +1079,80 @@ const CookFlow = (() => {
     cooking.timerId = setInterval(tick, 1000);
   }
 
+  // -----------------------------
+  // Offline queue: завершения готовки
+  // -----------------------------
+  const PENDING_KEY = "cookflow.pendingCompletions";
+  let flushingCompletions = false;
+
+  function pendingCompletions() {
+    try {
+      return JSON.parse(localStorage.getItem(PENDING_KEY) || "[]");
+    } catch (e) {
+      return [];
+    }
+  }
+
+  function setPendingCompletions(items) {
+    localStorage.setItem(PENDING_KEY, JSON.stringify(items));
+  }
+
+  function newClientEventId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+  }
+
+  // client_event_id делает повтор безопасным: сервер не засчитает одну готовку дважды
+  function sendCompletion(item, meta) {
+    return apiFetch(`/api/cooking/complete/${item.recipeId}`, {
+      method: "POST",
+      body: JSON.stringify({ client_event_id: item.id }),
+      meta,
+    });
+  }
+
+  // 401 (сессия истекла), 408/429 и 5xx — временные: запись остаётся в очереди до следующей попытки
+  function retryableStatus(status) {
+    return status === 401 || status === 408 || status === 429 || status >= 500;
+  }
+
+  async function completeCooking(recipeId) {
+    // userId — чья готовка: очередь общая для вкладок, а войти может уже другой пользователь
+    const item = { id: newClientEventId(), recipeId, userId: currentUser?.id ?? null };
+    try {
+      await sendCompletion(item);
+    } catch (e) {
+      if (!(e instanceof TypeError)) throw e; // TypeError — сеть недоступна, остальное — ответ сервера
+      if (item.userId === null) throw e; // без входа засчитывать некому
+      setPendingCompletions([...pendingCompletions(), item]);
+      showFlash("Нет сети: готовка будет засчитана при подключении", "info");
+    }
+  }
+
+  async function flushPendingCompletions() {
+    // без входа отправлять нечего: 401 не должен стоить записи из очереди
+    if (flushingCompletions || !navigator.onLine || !currentUser) return;
+    const userId = currentUser.id;
+    flushingCompletions = true;
+    try {
+      for (const item of pendingCompletions().filter(p => p.userId === userId)) {
+        const meta = {};
+        try {
+          await sendCompletion(item, meta);
+        } catch (e) {
+          // сеть снова пропала или ошибка временная — продолжим при следующем online/входе
+          if (e instanceof TypeError || retryableStatus(meta.status)) return;
+        }
+        // 2xx или окончательный 4xx (рецепт удалён и т.п.)
+        setPendingCompletions(pendingCompletions().filter(p => p.id !== item.id));
+      }
+    } finally {
+      flushingCompletions = false;
+    }
+  }
+
+  window.addEventListener("online", flushPendingCompletions);
+
   // -----------------------------
   // Public API
   // -----------------------------
@@ -831,6 +1178,7 @@ const CookFlow = (() => {
 
     recipeFormInit,
     editRecipeInit,
+    attachSuggest,
 
     startCookingMode,
   };
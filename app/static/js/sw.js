@@ -0,0 +1,143 @@
+// Service worker CookFlow (отдаётся с /sw.js, см. pages.service_worker).
+//
+// - оболочка (главная, app.js, style.css) кэшируется при установке; версия кэша — ?v= из base.html;
+// - страница и JSON рецепта отдаются из кэша сразу, а в фоне обновляются (stale-while-revalidate):
+//   повторное открытие рецепта рисуется без похода в сеть;
+// - картинки шагов: cache-first, режим готовки заранее просит закэшировать их все (message "prefetch");
+// - вход/выход чистит кэши ответов API и страниц: в них данные конкретного пользователя
+//   (is_saved, имя в шапке и т.п.), и следующему пользователю их показывать нельзя.
+
+const VERSION = new URL(self.location).searchParams.get("v") || "dev";
+const SHELL_CACHE = `cookflow-shell-${VERSION}`;
+const PAGES_CACHE = "cookflow-pages";
+const API_CACHE = "cookflow-api";
+const IMAGES_CACHE = "cookflow-images";
+
+const SHELL_URLS = ["/", "/static/css/style.css", "/static/js/app.js"];
+const CACHE_LIMITS = { [PAGES_CACHE]: 50, [API_CACHE]: 100, [IMAGES_CACHE]: 300 };
+
+const RECIPE_PAGE = /^\/recipe\/\d+$/;
+const CACHED_API = [/^\/api\/recipes\/\d+$/, /^\/api\/auth\/user$/];
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(caches.open(SHELL_CACHE).then((cache) => cache.addAll(SHELL_URLS)));
+  self.skipWaiting();
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil((async () => {
+    const names = await caches.keys();
+    await Promise.all(names
+      .filter((name) => name.startsWith("cookflow-shell-") && name !== SHELL_CACHE)
+      .map((name) => caches.delete(name)));
+    await self.clients.claim();
+  })());
+});
+
+async function trim(cacheName) {
+  const limit = CACHE_LIMITS[cacheName];
+  if (!limit) return;
+  const cache = await caches.open(cacheName);
+  const keys = await cache.keys();
+  // keys() в порядке добавления — удаляем самые старые
+  await Promise.all(keys.slice(0, Math.max(0, keys.length - limit)).map((key) => cache.delete(key)));
+}
+
+async function put(cacheName, request, response) {
+  if (!response || !(response.ok || response.type === "opaque")) return;
+  const cache = await caches.open(cacheName);
+  await cache.put(request, response);
+  await trim(cacheName);
+}
+
+async function cacheFirst(event, cacheName) {
+  const cached = await caches.match(event.request);
+  if (cached) return cached;
+  const response = await fetch(event.request);
+  event.waitUntil(put(cacheName, event.request, response.clone()));
+  return response;
+}
+
+async function staleWhileRevalidate(event, cacheName) {
+  const cached = await caches.match(event.request);
+  const network = fetch(event.request).then((response) => {
+    return put(cacheName, event.request, response.clone()).then(() => response);
+  });
+  if (cached) {
+    event.waitUntil(network.catch(() => {}));
+    return cached;
+  }
+  return network;
+}
+
+async function networkFirst(event, cacheName) {
+  try {
+    const response = await fetch(event.request);
+    event.waitUntil(put(cacheName, event.request, response.clone()));
+    return response;
+  } catch (err) {
+    const cached = await caches.match(event.request);
+    if (cached) return cached;
+    if (event.request.mode === "navigate") {
+      const shell = await caches.match("/");
+      if (shell) return shell;
+    }
+    throw err;
+  }
+}
+
+async function forgetUserData(event) {
+  const response = await fetch(event.request);
+  if (response.ok) await Promise.all([caches.delete(API_CACHE), caches.delete(PAGES_CACHE)]);
+  return response;
+}
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  const sameOrigin = url.origin === self.location.origin;
+
+  if (request.method !== "GET") {
+    if (sameOrigin && url.pathname.startsWith("/api/auth/")) event.respondWith(forgetUserData(event));
+    return;
+  }
+  if (!sameOrigin) {
+    // шрифты/иконки с CDN
+    event.respondWith(staleWhileRevalidate(event, SHELL_CACHE));
+    return;
+  }
+
+  const path = url.pathname;
+  if (path.startsWith("/static/uploads/")) {
+    event.respondWith(cacheFirst(event, IMAGES_CACHE));
+  } else if (path.startsWith("/static/")) {
+    event.respondWith(cacheFirst(event, SHELL_CACHE));
+  } else if (CACHED_API.some((re) => re.test(path))) {
+    // If-None-Match — это перепроверка из кэша app.js: отвечаем сервером (304), кэш SW — только без сети
+    event.respondWith(request.headers.has("If-None-Match")
+      ? networkFirst(event, API_CACHE)
+      : staleWhileRevalidate(event, API_CACHE));
+  } else if (request.mode === "navigate") {
+    event.respondWith(RECIPE_PAGE.test(path)
+      ? staleWhileRevalidate(event, PAGES_CACHE)
+      : networkFirst(event, PAGES_CACHE));
+  }
+  // остальное API (списки, SSE, поиск) — напрямую в сеть
+});
+
+self.addEventListener("message", (event) => {
+  const data = event.data || {};
+  if (data.type === "prefetch" && Array.isArray(data.urls)) {
+    event.waitUntil((async () => {
+      const cache = await caches.open(IMAGES_CACHE);
+      for (const url of data.urls) {
+        if (await cache.match(url)) continue;
+        try {
+          await put(IMAGES_CACHE, url, await fetch(url));
+        } catch (e) {
+          // нет сети — картинка догрузится при показе шага
+        }
+      }
+    })());
+  }
+});
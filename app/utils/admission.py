@@ -0,0 +1,237 @@
+"""
+Допуск запросов: лимиты параллельности по классам эндпоинтов, дедлайны и лимит записи.
+
+- Класс запроса — метка request_class("search") на view; без метки GET — "read",
+  остальное — "write". Для каждого класса REQUEST_CLASSES задаёт, сколько запросов
+  класса одновременно обслуживает воркер (concurrency, 0 — без лимита) и дедлайн
+  в секундах (deadline). Поиск и загрузки упираются в свой лимит и не занимают
+  все потоки воркера — чтение рецептов продолжает обслуживаться.
+- Сверх лимита запрос сразу получает 503 с Retry-After, не дожидаясь очереди.
+- Дедлайн доходит до БД: на Postgres — SET LOCAL statement_timeout на остаток времени,
+  на SQLite — progress handler прерывает запрос. Запрос, не уложившийся в дедлайн, — 503.
+  Ответ-поток (NDJSON) снимает дедлайн перед отдачей тела: его длительность задаёт клиент.
+- Запись (POST/PUT/PATCH/DELETE) ограничена token bucket'ом на пользователя,
+  для анонимов — на IP: WRITE_RATE_PER_MINUTE в среднем, WRITE_BURST подряд. Сверх — 429.
+  За обратным прокси IP клиента берётся из X-Forwarded-For, если задан TRUSTED_PROXY_HOPS,
+  иначе все анонимы делили бы одно ведро — адрес прокси.
+
+Состояние (семафоры, вёдра) — в памяти воркера, как и остальные кэши приложения.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from http import HTTPStatus
+from typing import Any, Callable, Optional
+
+from flask import Flask, current_app, g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app import db
+from app.api import ApiError, fail
+
+
+ADMISSION = "admission"
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# SQLite вызывает progress handler каждые N инструкций виртуальной машины
+_SQLITE_PROGRESS_STEPS = 1000
+_PG_TIMEOUT_SET = "cookflow_statement_timeout_set"
+_SQLITE_DEADLINE = "cookflow_deadline"
+
+
+def request_class(name: str) -> Callable:
+    """Декоратор view: класс запроса для лимитов и дедлайна (см. REQUEST_CLASSES)."""
+    def decorator(view):
+        view.request_class = name
+        return view
+    return decorator
+
+
+class TokenBucket:
+    """Вёдра токенов по ключу (пользователь или IP). rate — токенов в секунду, burst — ёмкость."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, now: Optional[float] = None) -> float:
+        """Забирает токен. 0 — можно, иначе через сколько секунд появится следующий."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > 10_000:
+                self._forget_full(now)
+            return (1 - tokens) / self.rate
+
+    def _forget_full(self, now: float) -> None:
+        # полное ведро ничем не отличается от отсутствующего
+        full_after = self.burst / self.rate
+        for key, (_, updated) in list(self._buckets.items()):
+            if now - updated >= full_after:
+                del self._buckets[key]
+
+
+class Admission:
+    def __init__(self, classes: dict[str, dict[str, Any]], retry_after: int, bucket: Optional[TokenBucket]) -> None:
+        self.classes = classes
+        self.retry_after = retry_after
+        self.bucket = bucket
+        self.semaphores = {
+            name: threading.BoundedSemaphore(spec["concurrency"])
+            for name, spec in classes.items()
+            if spec.get("concurrency")
+        }
+
+
+def _class_of_request() -> str:
+    view = current_app.view_functions.get(request.endpoint)
+    name = getattr(view, "request_class", None)
+    if name:
+        return name
+    return "write" if request.method in WRITE_METHODS else "read"
+
+
+def _overloaded(code: str, message: str, status: int, retry_after: float):
+    resp = fail(code, message, status)
+    resp.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return resp
+
+
+def _admit():
+    admission: Admission = current_app.extensions[ADMISSION]
+    name = _class_of_request()
+    spec = admission.classes.get(name) or {}
+
+    semaphore = admission.semaphores.get(name)
+    if semaphore is not None:
+        if not semaphore.acquire(blocking=False):
+            return _overloaded(
+                "OVERLOADED", "Сервер перегружен, попробуйте позже",
+                HTTPStatus.SERVICE_UNAVAILABLE, admission.retry_after,
+            )
+        g.admission_semaphore = semaphore
+
+    if spec.get("deadline"):
+        g.deadline = time.monotonic() + spec["deadline"]
+
+    if admission.bucket is not None and request.method in WRITE_METHODS:
+        key = f"user:{current_user.id}" if current_user.is_authenticated else f"ip:{request.remote_addr}"
+        wait = admission.bucket.take(key)
+        if wait:
+            return _overloaded(
+                "RATE_LIMITED", "Слишком много запросов, попробуйте позже", HTTPStatus.TOO_MANY_REQUESTS, wait,
+            )
+    return None
+
+
+def _release(_exc) -> None:
+    semaphore = g.pop("admission_semaphore", None)
+    if semaphore is not None:
+        semaphore.release()
+
+
+def deadline_remaining() -> Optional[float]:
+    """Сколько секунд осталось у текущего запроса; None — дедлайна нет."""
+    if not has_request_context():
+        return None
+    deadline = g.get("deadline")
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def lift_deadline() -> None:
+    """Снимает дедлайн с текущего запроса: ответ-поток отдаётся с той скоростью, с какой читает клиент."""
+    if has_request_context():
+        g.pop("deadline", None)
+
+
+def _deadline_exceeded() -> ApiError:
+    return ApiError("DEADLINE_EXCEEDED", "Запрос не уложился во время, попробуйте позже", HTTPStatus.SERVICE_UNAVAILABLE)
+
+
+def install_deadlines(engine: Engine) -> None:
+    """Переносит дедлайн запроса на каждый SQL-запрос движка."""
+    is_sqlite = engine.dialect.name == "sqlite"
+    is_postgres = engine.dialect.name == "postgresql"
+
+    if is_sqlite:
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_conn, record):
+            holder = record.info[_SQLITE_DEADLINE] = [None]
+            # ненулевой ответ прерывает запрос с OperationalError: interrupted
+            dbapi_conn.set_progress_handler(
+                lambda: holder[0] is not None and time.monotonic() > holder[0], _SQLITE_PROGRESS_STEPS
+            )
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        remaining = deadline_remaining()
+        if is_sqlite:
+            holder = conn.info.get(_SQLITE_DEADLINE)
+            if holder is not None:
+                holder[0] = None if remaining is None else g.deadline
+        if remaining is None:
+            if is_postgres and conn.info.pop(_PG_TIMEOUT_SET, None):
+                # дедлайн сняли посреди транзакции (ответ-поток) — возвращаем обычный таймаут
+                cursor.execute("SET LOCAL statement_timeout TO DEFAULT")
+            return
+        if remaining <= 0:
+            raise _deadline_exceeded()
+        if is_postgres and not conn.info.get(_PG_TIMEOUT_SET):
+            # SET LOCAL живёт до конца транзакции — хватает одного раза на транзакцию
+            cursor.execute(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}")
+            conn.info[_PG_TIMEOUT_SET] = True
+
+    @event.listens_for(engine, "commit")
+    @event.listens_for(engine, "rollback")
+    def _end_transaction(conn):
+        conn.info.pop(_PG_TIMEOUT_SET, None)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        record.info.pop(_PG_TIMEOUT_SET, None)
+        holder = record.info.get(_SQLITE_DEADLINE)
+        if holder is not None:
+            holder[0] = None
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        # прерванный SQLite или отменённый по statement_timeout запрос — это истёкший дедлайн
+        remaining = deadline_remaining()
+        if remaining is not None and remaining <= 0:
+            return _deadline_exceeded()
+        return None
+
+
+def init_admission(app: Flask) -> None:
+    """Включается, если задан REQUEST_CLASSES (см. config.py)."""
+    hops = app.config.get("TRUSTED_PROXY_HOPS") or 0
+    if hops:
+        # remote_addr и scheme — как их видел последний из hops доверенных прокси
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    classes = app.config.get("REQUEST_CLASSES")
+    if not classes:
+        return
+
+    rate = app.config.get("WRITE_RATE_PER_MINUTE") or 0
+    bucket = TokenBucket(rate / 60, app.config.get("WRITE_BURST") or 1) if rate > 0 else None
+    app.extensions[ADMISSION] = Admission(classes, app.config.get("ADMISSION_RETRY_AFTER_SECONDS") or 1, bucket)
+    app.before_request(_admit)
+    app.teardown_request(_release)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        install_deadlines(engine)
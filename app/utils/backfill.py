@@ -0,0 +1,208 @@
+"""
+Пакетное заполнение данных (backfill) для миграций и `flask backfill`.
+
+    @backfill(Ingredient.__table__, columns=("name",), writes=("name_norm",))
+    def ingredient_name_norm(row):
+        return {"name_norm": normalize_ingredient_name(row.name)}
+
+- строки идут пачками по целочисленному ключу (keyset: key > last_key ORDER BY key LIMIT n),
+  а не одним UPDATE на всю таблицу: каждая пачка — своя короткая транзакция, писатели
+  ждут не дольше одной пачки;
+- значения считает Python-функция: строка с прочитанными колонками -> новые значения writes.
+  Строки, где ничего не изменилось, не переписываются. Если функции нужны данные из БД
+  на всю пачку, их готовит prepare(conn, rows) — результат приходит вторым аргументом;
+- прогресс пишется в backfill_checkpoints в той же транзакции, что и пачка: после
+  прерывания (Ctrl-C, SIGTERM, падение) запуск продолжается со следующей пачки;
+- между пачками — пауза, чтобы не отнимать БД у запросов.
+
+Из миграции Alembic (транзакцию миграции надо сначала закоммитить, иначе
+соединения заполнения будут ждать её блокировок):
+
+    with op.get_context().autocommit_block():
+        run_backfill(op.get_bind().engine, "ingredient_name_norm")
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, NamedTuple, Optional
+
+from sqlalchemy import Engine, Table, bindparam, select, update
+
+from app.models import BackfillCheckpoint, Ingredient, normalize_ingredient_name
+from app.utils.db import insert_ignore
+from app.utils.quantities import parse_quantity
+from app.utils.terms import lookup_term_ids, term_key
+
+
+log = logging.getLogger(__name__)
+
+_CHECKPOINTS = BackfillCheckpoint.__table__
+# колонки, которые создала миграция e6b3d0a74f18: миграции зовут этот модуль, и колонка,
+# добавленная в модель позже, не должна попадать в их SELECT на ещё не догнанной схеме
+_CHECKPOINT_COLUMNS = tuple(_CHECKPOINTS.c[name] for name in (
+    "name", "last_key", "rows_seen", "rows_changed", "started_at", "updated_at", "finished_at",
+))
+
+
+class BackfillSpec(NamedTuple):
+    table: Table
+    key: str
+    columns: tuple[str, ...]
+    writes: tuple[str, ...]
+    transform: Callable[..., dict[str, Any]]
+    where: Optional[Callable[[Table], Any]]
+    prepare: Optional[Callable[[Any, list], Any]]
+
+
+BACKFILLS: dict[str, BackfillSpec] = {}
+
+
+def backfill(
+    table: Table,
+    columns: tuple[str, ...],
+    writes: tuple[str, ...],
+    key: str = "id",
+    where: Optional[Callable[[Table], Any]] = None,
+    prepare: Optional[Callable[[Any, list], Any]] = None,
+    name: Optional[str] = None,
+) -> Callable:
+    """Регистрирует заполнение; имя по умолчанию — имя функции."""
+    def decorator(func):
+        BACKFILLS[name or func.__name__] = BackfillSpec(table, key, columns, writes, func, where, prepare)
+        return func
+    return decorator
+
+
+class BackfillResult(NamedTuple):
+    name: str
+    batches: int  # за этот запуск
+    rows_seen: int  # всего с начала заполнения
+    rows_changed: int
+    last_key: Optional[int]
+    finished: bool
+
+
+def _checkpoint(conn, name: str, restart: bool):
+    now = datetime.utcnow()
+    conn.execute(insert_ignore(_CHECKPOINTS, bind=conn).values(
+        name=name, rows_seen=0, rows_changed=0, started_at=now, updated_at=now,
+    ))
+    if restart:
+        conn.execute(update(_CHECKPOINTS).where(_CHECKPOINTS.c.name == name).values(
+            last_key=None, rows_seen=0, rows_changed=0, started_at=now, updated_at=now, finished_at=None,
+        ))
+    return conn.execute(select(*_CHECKPOINT_COLUMNS).where(_CHECKPOINTS.c.name == name)).one()
+
+
+def run_backfill(
+    engine: Engine,
+    name: str,
+    *,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+    max_batches: Optional[int] = None,
+    restart: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> BackfillResult:
+    """
+    Гоняет заполнение name с сохранённой точки до конца таблицы (или max_batches пачек,
+    или stop). Уже завершённое не перезапускается без restart.
+    """
+    spec = BACKFILLS.get(name)
+    if spec is None:
+        raise LookupError(f"Неизвестное заполнение: {name}")
+    table = spec.table
+    key = table.c[spec.key]
+    read = [key, *(table.c[c] for c in dict.fromkeys(spec.columns + spec.writes))]
+    write = (
+        update(table)
+        .where(key == bindparam("b_key"))
+        .values({c: bindparam(f"b_{c}") for c in spec.writes})
+    )
+
+    with engine.begin() as conn:
+        state = _checkpoint(conn, name, restart)
+    last_key, seen, changed = state.last_key, state.rows_seen, state.rows_changed
+    if state.finished_at is not None:
+        return BackfillResult(name, 0, seen, changed, last_key, True)
+
+    batches, finished = 0, False
+    while max_batches is None or batches < max_batches:
+        if stop is not None and stop.is_set():
+            break
+        # пачка и отметка о ней — одна транзакция: прерывание не теряет и не дублирует прогресс
+        with engine.begin() as conn:
+            query = select(*read).order_by(key).limit(batch_size)
+            if last_key is not None:
+                query = query.where(key > last_key)
+            if spec.where is not None:
+                query = query.where(spec.where(table))
+            rows = conn.execute(query).all()
+
+            params = []
+            prepared = spec.prepare(conn, rows) if spec.prepare and rows else None
+            for row in rows:
+                values = spec.transform(row, prepared) if spec.prepare else spec.transform(row)
+                if any(getattr(row, c) != values[c] for c in spec.writes):
+                    params.append({"b_key": row[0], **{f"b_{c}": values[c] for c in spec.writes}})
+            if params:
+                conn.execute(write, params)
+
+            now = datetime.utcnow()
+            if rows:
+                last_key = rows[-1][0]
+                seen += len(rows)
+                changed += len(params)
+            finished = len(rows) < batch_size
+            conn.execute(update(_CHECKPOINTS).where(_CHECKPOINTS.c.name == name).values(
+                last_key=last_key, rows_seen=seen, rows_changed=changed, updated_at=now,
+                finished_at=now if finished else None,
+            ))
+        batches += 1
+        log.info("backfill %s: batch %d, key %s, seen %d, changed %d", name, batches, last_key, seen, changed)
+        if finished:
+            break
+        if pause:
+            time.sleep(pause)
+    return BackfillResult(name, batches, seen, changed, last_key, finished)
+
+
+def checkpoints(engine: Engine) -> dict[str, Any]:
+    with engine.connect() as conn:
+        return {row.name: row for row in conn.execute(select(*_CHECKPOINT_COLUMNS))}
+
+
+@backfill(Ingredient.__table__, columns=("name",), writes=("name_norm",))
+def ingredient_name_norm(row) -> dict[str, Any]:
+    # миграция 5890b67b005d заполнила name_norm через SQL lower(): на SQLite кириллица осталась как есть
+    return {"name_norm": normalize_ingredient_name(row.name)}
+
+
+@backfill(
+    Ingredient.__table__,
+    columns=("quantity",),
+    writes=("amount", "unit", "unit_family"),
+    where=lambda t: t.c.quantity.is_not(None),
+)
+def ingredient_quantities(row) -> dict[str, Any]:
+    q = parse_quantity(row.quantity)
+    return {
+        "amount": q.amount if q else None,
+        "unit": q.unit if q else None,
+        "unit_family": q.family if q else None,
+    }
+
+
+@backfill(
+    Ingredient.__table__,
+    columns=("name",),
+    writes=("term_id",),
+    # термины всей пачки — один SELECT и одна вставка недостающих в транзакции пачки
+    prepare=lambda conn, rows: lookup_term_ids(conn, [row.name for row in rows]),
+)
+def ingredient_terms(row, term_ids: dict[str, int]) -> dict[str, Any]:
+    # с --restart заново связывает строки после правки нормализации или синонимов
+    return {"term_id": term_ids.get(term_key(row.name))}
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+from itertools import chain
+from threading import Lock
+from typing import Any, Iterable, Optional
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, lazyload
+
+from app import db
+from app.models import CacheVersion, Category, Challenge, recipe_category
+from app.utils.db import insert_ignore, upsert
+
+
+CATALOG = "catalog"
+
+
+class Catalog:
+    """
+    Снимок справочников (категории и челленджи) в том виде, в каком их отдаёт API.
+    Словари общие для всех запросов воркера — их нельзя изменять на месте.
+    """
+
+    def __init__(self, version: int, categories, challenges) -> None:
+        self.version = version
+        self.categories: dict[int, dict[str, Any]] = {
+            c.id: {"id": c.id, "name": c.name, "slug": c.slug} for c in categories
+        }
+        self.challenges: dict[int, dict[str, Any]] = {
+            ch.id: {
+                "id": ch.id,
+                "title": ch.title,
+                "description": ch.description,
+                "image_url": ch.image_url,
+                "duration_days": ch.duration_days,
+                "target_count": ch.target_count,
+                "category": self.categories.get(ch.category_id),
+            }
+            for ch in challenges
+        }
+        # порядок ленты челленджей: новые сверху
+        self.challenge_list = [self.challenges[i] for i in sorted(self.challenges, reverse=True)]
+
+
+_VERSION_QUERY = select(CacheVersion.version).where(CacheVersion.name == CATALOG)
+_CATEGORIES_QUERY = select(Category.id, Category.name, Category.slug)
+_CHALLENGES_QUERY = select(
+    Challenge.id,
+    Challenge.title,
+    Challenge.description,
+    Challenge.image_url,
+    Challenge.duration_days,
+    Challenge.target_count,
+    Challenge.category_id,
+)
+
+
+class CatalogStore:
+    """
+    Кэш справочников в памяти воркера. Актуальность проверяется по строке
+    cache_versions: одно чтение по PK, перезагрузка только при смене версии.
+    """
+
+    def __init__(self) -> None:
+        self._catalog: Optional[Catalog] = None
+        self._lock = Lock()
+
+    def _is_fresh(self, version: int) -> bool:
+        return self._catalog is not None and self._catalog.version == version
+
+    def _keep(self, catalog: Catalog) -> Catalog:
+        with self._lock:
+            self._catalog = catalog
+        return catalog
+
+    def current(self) -> Catalog:
+        # версию читаем до данных: загруженный снимок не старше записанной в нём версии
+        version = db.session.execute(_VERSION_QUERY).scalar() or 0
+        if self._is_fresh(version):
+            return self._catalog
+        return self._keep(Catalog(
+            version,
+            db.session.execute(_CATEGORIES_QUERY).all(),
+            db.session.execute(_CHALLENGES_QUERY).all(),
+        ))
+
+    async def current_async(self, session) -> Catalog:
+        """То же для AsyncSession (асинхронный режим, app.asgi)."""
+        version = (await session.execute(_VERSION_QUERY)).scalar() or 0
+        if self._is_fresh(version):
+            return self._catalog
+        return self._keep(Catalog(
+            version,
+            (await session.execute(_CATEGORIES_QUERY)).all(),
+            (await session.execute(_CHALLENGES_QUERY)).all(),
+        ))
+
+
+def _store() -> CatalogStore:
+    store = current_app.extensions.get("catalog")
+    if store is None:
+        store = current_app.extensions.setdefault("catalog", CatalogStore())
+    return store
+
+
+def get_catalog() -> Catalog:
+    """Справочники для текущего запроса: версия сверяется один раз, дальше снимок из g."""
+    if not has_request_context():
+        return _store().current()
+    catalog = g.get("catalog")
+    if catalog is None:
+        catalog = g.catalog = _store().current()
+    return catalog
+
+
+def bump_catalog_version(session: Optional[Session] = None) -> None:
+    """Помечает справочники изменёнными. Вызывать в транзакции, которая их меняет."""
+    session = session or db.session
+    table = CacheVersion.__table__
+    session.execute(insert_ignore(table).values(name=CATALOG, version=0))
+    session.execute(
+        update(table).where(table.c.name == CATALOG).values(version=table.c.version + 1)
+    )
+    session.info["catalog_bumped"] = True
+
+
+def _touches_catalog(session: Session) -> bool:
+    for obj in chain(session.new, session.deleted):
+        if isinstance(obj, (Category, Challenge)):
+            return True
+    return any(
+        isinstance(obj, (Category, Challenge)) and session.is_modified(obj, include_collections=False)
+        for obj in session.dirty
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session: Session, flush_context) -> None:
+    # любые ORM-изменения категорий/челленджей (API, seed, тесты) сдвигают версию сами
+    if _touches_catalog(session):
+        bump_catalog_version(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_request_snapshot(session: Session) -> None:
+    # свой коммит должен быть виден уже в этом запросе — следующий get_catalog перечитает версию
+    if session.info.pop("catalog_bumped", False) and has_request_context():
+        g.pop("catalog", None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_bump_flag(session: Session) -> None:
+    session.info.pop("catalog_bumped", None)
+
+
+def _categories_by_name(names: Iterable[str]) -> dict[str, Category]:
+    rows = db.session.execute(
+        select(Category)
+        .where(Category.name.in_(list(names)))
+        .options(lazyload(Category.challenges))
+    ).scalars()
+    return {c.name: c for c in rows}
+
+
+def _insert_categories(rows: list[tuple[str, Optional[str]]]) -> dict[str, Category]:
+    # без index_elements: конфликт и по name, и по slug пропускает строку, а не роняет пачку
+    inserted = db.session.scalars(
+        upsert(Category).returning(Category), [{"name": n, "slug": s} for n, s in rows]
+    )
+    return {c.name: c for c in inserted}
+
+
+def resolve_categories(items: Iterable[tuple[str, Optional[str]]]) -> list[Category]:
+    """
+    Находит или создаёт категории по (name, slug): один SELECT ... IN по всем именам
+    и одна пачка INSERT ... ON CONFLICT DO NOTHING RETURNING для недостающих — вставленные
+    категории приходят из RETURNING без повторного SELECT. Параллельное создание той же
+    категории не роняет транзакцию: проигравший перечитывает только строки победителя.
+    Порядок результата совпадает с входным, повторяющиеся имена схлопываются.
+    """
+    wanted: dict[str, Optional[str]] = {}
+    for name, slug in items:
+        if not wanted.get(name):
+            wanted[name] = slug
+    if not wanted:
+        return []
+
+    found = _categories_by_name(wanted)
+    missing = [name for name in wanted if name not in found]
+    if missing:
+        found.update(_insert_categories([(n, wanted[n]) for n in missing]))
+        rest = [name for name in missing if name not in found]
+        if rest:
+            # имя успели создать параллельно — перечитываем; остальным мешает занятый slug
+            found.update(_categories_by_name(rest))
+            rest = [name for name in rest if name not in found]
+        if rest:
+            found.update(_insert_categories([(n, None) for n in rest]))
+            rest = [name for name in rest if name not in found]
+            if rest:
+                found.update(_categories_by_name(rest))
+        bump_catalog_version()
+
+    for name, slug in wanted.items():
+        if slug and not found[name].slug:
+            found[name].slug = slug
+    return [found[name] for name in wanted]
+
+
+def recipe_category_pairs(recipe_ids: list[int]):
+    return (
+        select(recipe_category.c.recipe_id, recipe_category.c.category_id)
+        .where(recipe_category.c.recipe_id.in_(recipe_ids))
+        .order_by(recipe_category.c.recipe_id, recipe_category.c.category_id)
+    )
+
+
+def group_categories(recipe_ids: list[int], pairs, catalog: Catalog) -> dict[int, list[dict[str, Any]]]:
+    result: dict[int, list[dict[str, Any]]] = {rid: [] for rid in recipe_ids}
+    for recipe_id, category_id in pairs:
+        cat = catalog.categories.get(category_id)
+        if cat is not None:
+            result[recipe_id].append(cat)
+    return result
+
+
+def categories_for(recipe_ids: list[int]) -> dict[int, list[dict[str, Any]]]:
+    """Категории рецептов: один запрос к recipe_category, сами категории — из справочника."""
+    if not recipe_ids:
+        return {}
+    pairs = db.session.execute(recipe_category_pairs(recipe_ids)).all()
+    return group_categories(recipe_ids, pairs, get_catalog())
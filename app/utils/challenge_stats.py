@@ -0,0 +1,133 @@
+"""
+Счётчики каталога челленджей: сколько участников и сколько дошли до цели.
+
+Хранятся в самих строках challenges (participants_count, completions_count) и меняются
+инкрементом в той же транзакции, что и старт/завершение (count_progress), — строки
+прогресса ради них не перебираются никогда, чтение — выборка по первичному ключу.
+Истечение срока счётчики не меняет: участник остаётся участником, завершивших не
+становится больше. Прочитанное кэшируется в памяти воркера по челленджу: свои
+изменения применяются сразу (record_stats), изменения других воркеров — по TTL.
+Прогресс самого пользователя — отдельный запрос по его user_id, поэтому цена
+/api/challenges не зависит от числа участников.
+"""
+from __future__ import annotations
+
+import time
+from threading import Lock
+from typing import Iterable, NamedTuple
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from app import db
+from app.models import Challenge, ChallengeProgress
+
+
+class ChallengeStats(NamedTuple):
+    participants: int
+    completions: int
+    loaded_at: float
+
+
+_STATS_QUERY = select(
+    Challenge.id,
+    Challenge.participants_count.label("participants"),
+    Challenge.completions_count.label("completions"),
+)
+
+OWN_PROGRESS_COLUMNS = (
+    ChallengeProgress.challenge_id,
+    ChallengeProgress.completed_count,
+    ChallengeProgress.started_at,
+    ChallengeProgress.completed_at,
+    ChallengeProgress.expired_at,
+)
+
+
+def own_progress_statement(user_id: int):
+    """Прогресс пользователя по всем его челленджам (индекс по user_id)."""
+    return select(*OWN_PROGRESS_COLUMNS).where(ChallengeProgress.user_id == user_id)
+
+
+class ChallengeStatsStore:
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._stats: dict[int, ChallengeStats] = {}
+        self._lock = Lock()
+
+    def _stale(self, challenge_ids: Iterable[int]) -> list[int]:
+        now = time.monotonic()
+        return [
+            i for i in challenge_ids
+            if (s := self._stats.get(i)) is None or now - s.loaded_at > self.ttl_seconds
+        ]
+
+    def _keep(self, rows) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for row in rows:
+                self._stats[row.id] = ChallengeStats(row.participants, row.completions, now)
+
+    def _result(self, challenge_ids: Iterable[int]) -> dict[int, ChallengeStats]:
+        return {i: self._stats[i] for i in challenge_ids if i in self._stats}
+
+    def get(self, challenge_ids: list[int]) -> dict[int, ChallengeStats]:
+        stale = self._stale(challenge_ids)
+        if stale:
+            # все устаревшие челленджи — одним запросом
+            self._keep(db.session.execute(_STATS_QUERY.where(Challenge.id.in_(stale))).all())
+        return self._result(challenge_ids)
+
+    async def get_async(self, session, challenge_ids: list[int]) -> dict[int, ChallengeStats]:
+        """То же для AsyncSession (асинхронный режим, app.asgi)."""
+        stale = self._stale(challenge_ids)
+        if stale:
+            self._keep((await session.execute(_STATS_QUERY.where(Challenge.id.in_(stale)))).all())
+        return self._result(challenge_ids)
+
+    def record(self, challenge_id: int, joined: int = 0, completed: int = 0) -> None:
+        # не загруженные счётчики не трогаем: при первом чтении они прочитаются из БД
+        with self._lock:
+            stats = self._stats.get(challenge_id)
+            if stats is not None:
+                self._stats[challenge_id] = stats._replace(
+                    participants=stats.participants + joined,
+                    completions=stats.completions + completed,
+                )
+
+
+def count_progress(challenge_ids: Iterable[int], joined: int = 0, completed: int = 0) -> None:
+    """
+    Сдвигает счётчики в БД. Вызывать в транзакции, которая стартует или завершает прогресс;
+    Core UPDATE не помечает Challenge изменённым, поэтому версия справочника не сдвигается.
+    """
+    ids = list(challenge_ids)
+    if ids:
+        db.session.execute(
+            update(Challenge)
+            .where(Challenge.id.in_(ids))
+            .values(
+                participants_count=Challenge.participants_count + joined,
+                completions_count=Challenge.completions_count + completed,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+def stats_store(app=None) -> ChallengeStatsStore:
+    app = app or current_app
+    store = app.extensions.get("challenge_stats")
+    if store is None:
+        store = app.extensions.setdefault(
+            "challenge_stats", ChallengeStatsStore(app.config.get("CHALLENGE_STATS_TTL_SECONDS", 60))
+        )
+    return store
+
+
+def get_challenge_stats(challenge_ids: list[int]) -> dict[int, ChallengeStats]:
+    return stats_store().get(challenge_ids)
+
+
+def record_stats(challenge_id: int, joined: int = 0, completed: int = 0) -> None:
+    """Вызывать после commit, как и record_progress лидерборда."""
+    stats_store().record(challenge_id, joined=joined, completed=completed)
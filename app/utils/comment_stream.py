@@ -0,0 +1,216 @@
+"""
+Live-обновления комментариев (SSE).
+
+Источник — таблица comment_events: событие пишется в той же транзакции, что и комментарий,
+поэтому его видят все воркеры, а id служит номером для Last-Event-ID.
+
+В каждом воркере один CommentBroker: один поток раз в SSE_POLL_INTERVAL_SECONDS читает
+новые события одним запросом и раздаёт их очередям подписчиков нужных рецептов.
+Свой коммит будит поток сразу (wake), чужие воркеры — через опрос. Поток живёт, пока
+есть подписчики. Число одновременных потоков на воркер ограничено SSE_MAX_CONNECTIONS:
+каждый занимает поток gunicorn (gthread).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple, Optional
+
+from flask import Flask, current_app
+from sqlalchemy import delete, func, select
+
+from app import db
+from app.models import CommentEvent
+
+
+log = logging.getLogger(__name__)
+
+LAST_EVENT_QUERY = select(func.max(CommentEvent.id))
+
+# id выдаются до коммита: транзакция с меньшим id может закоммититься позже большей.
+# Поэтому каждый опрос перечитывает хвост из REORDER_WINDOW последних id, а повторы отсекает _seen.
+REORDER_WINDOW = 100
+POLL_LIMIT = 500
+BACKLOG_LIMIT = 500
+
+
+class Event(NamedTuple):
+    id: int
+    recipe_id: int
+    kind: str
+    payload: str  # уже сериализованный JSON
+
+
+_EVENT_COLUMNS = (CommentEvent.id, CommentEvent.recipe_id, CommentEvent.kind, CommentEvent.payload)
+
+
+def record_comment_event(kind: str, recipe_id: int, comment_id: int, payload: dict[str, Any]) -> None:
+    """Добавляет событие в текущую транзакцию (коммитит вызывающий)."""
+    db.session.add(CommentEvent(
+        recipe_id=recipe_id,
+        comment_id=comment_id,
+        kind=kind,
+        payload=json.dumps(payload, ensure_ascii=False),
+    ))
+
+
+def prune_comment_events(retention_days: int, batch_size: int = 1000) -> int:
+    """
+    Удаляет события старше retention_days пачками (commit после каждой).
+    Клиент, отключившийся дольше, просто перезагрузит список комментариев целиком.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    total = 0
+    while True:
+        ids = db.session.execute(
+            select(CommentEvent.id).where(CommentEvent.created_at < cutoff).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return total
+        db.session.execute(delete(CommentEvent).where(CommentEvent.id.in_(ids)))
+        db.session.commit()
+        total += len(ids)
+
+
+def format_event(event: Event) -> str:
+    return f"id: {event.id}\nevent: comment_{event.kind}\ndata: {event.payload}\n\n"
+
+
+class CommentBroker:
+    def __init__(self, app: Flask) -> None:
+        self.app = app
+        self.poll_interval = app.config.get("SSE_POLL_INTERVAL_SECONDS", 1)
+        self.max_connections = app.config.get("SSE_MAX_CONNECTIONS", 8)
+        self._subscribers: dict[int, set[queue.Queue]] = {}
+        self._count = 0
+        self._last_id: Optional[int] = None
+        self._seen: set[int] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def connections(self) -> int:
+        return self._count
+
+    def _engine(self):
+        # всегда основная БД: реплика может отставать, а пропущенное событие не вернуть
+        with self.app.app_context():
+            return db.engine
+
+    def _read_tail(self) -> list[int]:
+        stmt = select(CommentEvent.id).order_by(CommentEvent.id.desc()).limit(REORDER_WINDOW)
+        with self._engine().connect() as conn:
+            return conn.execute(stmt).scalars().all()
+
+    def subscribe(self, recipe_id: int) -> Optional[queue.Queue]:
+        """Очередь событий рецепта или None, если воркер уже держит максимум потоков."""
+        q: queue.Queue = queue.Queue()
+        while True:
+            # до чтения backlog подписчика: всё, что новее, доставит опрос,
+            # а уже существующий хвост не должен уйти подписчикам повторно
+            tail = self._read_tail() if self._last_id is None else None
+            with self._lock:
+                if self._count >= self.max_connections:
+                    return None
+                if self._last_id is None:
+                    if tail is None:
+                        continue  # поток опроса только что остановился и сбросил позицию
+                    self._last_id = tail[0] if tail else 0
+                    self._seen.update(tail)
+                self._subscribers.setdefault(recipe_id, set()).add(q)
+                self._count += 1
+                if self._thread is None or self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._run, name="comment-broker", daemon=True)
+                    self._thread.start()
+                return q
+
+    def unsubscribe(self, recipe_id: int, q: queue.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(recipe_id)
+            if subs and q in subs:
+                subs.discard(q)
+                self._count -= 1
+                if not subs:
+                    del self._subscribers[recipe_id]
+
+    def backlog(self, recipe_id: int, after_id: int) -> list[Event]:
+        """События рецепта после after_id — для возобновления по Last-Event-ID."""
+        stmt = (
+            select(*_EVENT_COLUMNS)
+            .where(CommentEvent.recipe_id == recipe_id, CommentEvent.id > after_id)
+            .order_by(CommentEvent.id)
+            .limit(BACKLOG_LIMIT)
+        )
+        with self._engine().connect() as conn:
+            return [Event(*row) for row in conn.execute(stmt)]
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def poll(self) -> int:
+        """Один опрос на всех подписчиков воркера. Возвращает число доставленных событий."""
+        with self._lock:
+            last_id = self._last_id or 0
+            if not self._subscribers:
+                return 0
+        stmt = (
+            select(*_EVENT_COLUMNS)
+            .where(CommentEvent.id > last_id - REORDER_WINDOW)
+            .order_by(CommentEvent.id)
+            .limit(POLL_LIMIT)
+        )
+        with self._engine().connect() as conn:
+            events = [Event(*row) for row in conn.execute(stmt)]
+
+        delivered = 0
+        with self._lock:
+            for event in events:
+                if event.id in self._seen:
+                    continue
+                self._seen.add(event.id)
+                for q in self._subscribers.get(event.recipe_id, ()):
+                    q.put_nowait(event)
+                    delivered += 1
+            if events:
+                self._last_id = max(last_id, events[-1].id)
+            floor = self._last_id - REORDER_WINDOW
+            self._seen = {i for i in self._seen if i > floor}
+        return delivered
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                if not self._subscribers:
+                    # события за время простоя никому не нужны: следующий подписчик
+                    # заново прочитает хвост, а пропущенное получит через backlog
+                    self._thread = None
+                    self._last_id = None
+                    self._seen.clear()
+                    return
+            try:
+                self.poll()
+            except Exception:
+                log.exception("comment events poll failed")
+
+
+def comment_broker() -> CommentBroker:
+    broker = current_app.extensions.get("comment_broker")
+    if broker is None:
+        broker = current_app.extensions.setdefault("comment_broker", CommentBroker(current_app._get_current_object()))
+    return broker
+
+
+def notify_local_subscribers() -> None:
+    """После коммита события: подписчики этого воркера получают его без ожидания опроса."""
+    broker = current_app.extensions.get("comment_broker")
+    if broker is not None:
+        broker.wake()
@@ -0,0 +1,63 @@
+"""
+INSERT с ON CONFLICT для гонок "проверил — вставил".
+
+Приложение поддерживает только SQLite и PostgreSQL (см. README): на другой БД
+команды не собираются — это ошибка конфигурации, а не вызова (RuntimeError).
+"""
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.sql.dml import Insert
+
+from app import db
+
+
+def _dialect_name(bind=None) -> str:
+    """Диалект bind (Connection, Engine или Session); по умолчанию — сессии приложения."""
+    bind = db.session if bind is None else bind
+    return (bind.dialect if hasattr(bind, "dialect") else bind.get_bind().dialect).name
+
+
+def _on_conflict_insert(target, bind=None) -> Insert:
+    """INSERT с поддержкой ON CONFLICT для диалекта bind."""
+    dialect = _dialect_name(bind)
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(target)
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(target)
+    raise RuntimeError(f"ON CONFLICT поддерживается только для SQLite и PostgreSQL, а БД — {dialect}")
+
+
+def insert_ignore(table: Table, bind=None) -> Insert:
+    """
+    INSERT, который молча пропускает строки, нарушающие уникальность (ON CONFLICT DO NOTHING).
+    Нужен для гонок "проверил — вставил": проигравший просто не вставляет дубль.
+    bind — соединение, на котором выполнится команда, если это не db.session.
+    """
+    return _on_conflict_insert(table, bind).on_conflict_do_nothing()
+
+
+def upsert(
+    target,
+    index_elements: Optional[Sequence[str]] = None,
+    set_: Optional[dict[str, Any]] = None,
+    bind=None,
+) -> Insert:
+    """
+    INSERT ... ON CONFLICT (index_elements) DO NOTHING или, с set_, DO UPDATE SET set_.
+    target — таблица или ORM-класс (тогда .returning(Model) отдаёт объекты).
+
+    Вместе с .returning(...) это одна команда вместо SELECT → INSERT → IntegrityError →
+    ROLLBACK → SELECT: DO NOTHING возвращает строку только если она вставлена
+    (пустой результат — "уже было"), DO UPDATE — и вставленную, и обновлённую.
+    Без index_elements DO NOTHING срабатывает на любом уникальном ключе.
+    bind — как у insert_ignore.
+    """
+    stmt = _on_conflict_insert(target, bind)
+    if set_ is None:
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
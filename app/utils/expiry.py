@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import ColumnElement, String, cast, func, literal, or_, select, update
+
+from app import db
+from app.models import Challenge, ChallengeProgress
+
+
+def within_duration(now: datetime) -> ColumnElement[bool]:
+    """
+    Условие для запросов с JOIN challenges: срок прогресса (started_at + duration_days) ещё идёт.
+    Запись не должна зависеть от того, успел ли sweeper проставить expired_at.
+    Срок считается в БД, поэтому выражение своё для каждого диалекта.
+    """
+    days = Challenge.duration_days
+    if db.engine.dialect.name == "postgresql":
+        cutoff = literal(now) - func.make_interval(0, 0, 0, days)
+    else:
+        # SQLite хранит DateTime строкой "YYYY-MM-DD HH:MM:SS.ffffff" — сравниваем строки
+        cutoff = func.datetime(literal(now), "-" + cast(days, String) + " days")
+    return or_(days.is_(None), days <= 0, ChallengeProgress.started_at > cutoff)
+
+
+def sweep_expired_progress(
+    batch_size: int = 500,
+    pause_seconds: float = 0.0,
+    now: Optional[datetime] = None,
+    on_batch: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Помечает expired_at у активных прогрессов, срок которых (started_at + duration_days) истёк.
+    Работает пачками по batch_size строк с commit после каждой пачки, поэтому не держит
+    долгих блокировок, а после прерывания повторный запуск просто продолжит с оставшихся строк.
+    Возвращает число помеченных прогрессов.
+    """
+    now = now or datetime.utcnow()
+    total = 0
+
+    # челленджей мало, поэтому срок считаем в Python и не зависим от диалектной арифметики дат
+    challenges = db.session.execute(
+        select(Challenge.id, Challenge.duration_days).where(Challenge.duration_days > 0)
+    ).all()
+
+    for challenge_id, days in challenges:
+        cutoff = now - timedelta(days=int(days))
+        while True:
+            ids = db.session.execute(
+                select(ChallengeProgress.id)
+                .where(ChallengeProgress.challenge_id == challenge_id)
+                .where(ChallengeProgress.active())
+                .where(ChallengeProgress.started_at < cutoff)
+                .order_by(ChallengeProgress.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+
+            # повторяем условие активности: прогресс мог завершиться между SELECT и UPDATE
+            result = db.session.execute(
+                update(ChallengeProgress)
+                .where(ChallengeProgress.id.in_(ids))
+                .where(ChallengeProgress.active())
+                .values(expired_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+            total += result.rowcount
+            if on_batch:
+                on_batch(challenge_id, result.rowcount)
+            if len(ids) < batch_size:
+                break
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+    return total
@@ -0,0 +1,48 @@
+"""
+Sparse fieldsets: ?fields=id,title&include=steps.
+
+fields — какие поля объекта вернуть (id отдаётся всегда), include — какие вложенные
+коллекции добавить. Набор полей превращается в сериализатор один раз (lru_cache
+в модулях маршрутов): кортеж пар (ключ, getter) плюс опции загрузки, чтобы запрос
+выбирал только нужные колонки и связи.
+"""
+from __future__ import annotations
+
+from http import HTTPStatus
+from typing import Any, Callable, Iterable, Mapping
+
+from flask import request
+
+from app.api import ApiError
+
+
+Getter = Callable[[Any], Any]
+
+
+def requested(param: str, allowed: Iterable[str], default: Iterable[str]) -> frozenset[str]:
+    """
+    Значение параметра запроса как набор имён. Нет параметра — default;
+    пустой параметр (include=) — пустой набор; неизвестное имя — 400.
+    """
+    raw = request.args.get(param)
+    if raw is None:
+        return frozenset(default)
+    names = frozenset(name.strip() for name in raw.split(",") if name.strip())
+    unknown = names - frozenset(allowed)
+    if unknown:
+        raise ApiError(
+            "VALIDATION_ERROR",
+            f"{param}: неизвестные поля {', '.join(sorted(unknown))}",
+            HTTPStatus.BAD_REQUEST,
+        )
+    return names
+
+
+def compile_getters(getters: Mapping[str, Getter], fields: Iterable[str]) -> tuple[tuple[str, Getter], ...]:
+    """Пары (ключ, getter) в порядке getters — порядок ключей ответа не зависит от порядка в запросе."""
+    fields = set(fields)
+    return tuple((key, getter) for key, getter in getters.items() if key in fields)
+
+
+def iso(value) -> str | None:
+    return value.isoformat() if value is not None else None
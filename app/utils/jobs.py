@@ -0,0 +1,222 @@
+"""
+Фоновые задачи в таблице jobs основной БД — без внешнего брокера.
+
+    @task(queue="images", max_attempts=3)
+    def optimize_image(filename: str): ...
+
+    enqueue("optimize_image", {"filename": name}, idempotency_key=f"optimize_image:{name}")
+
+- enqueue добавляет строку в транзакцию запроса: воркер увидит задачу только после
+  commit, а при откате её не будет вовсе;
+- idempotency_key: повторный enqueue с тем же ключом ничего не добавляет;
+- run_at / delay — отложенный запуск;
+- `flask worker --queue default=2 --queue images=1` — потоки на очередь. Задача забирается
+  одним UPDATE ... RETURNING: на Postgres подзапрос берёт строки FOR UPDATE SKIP LOCKED,
+  на SQLite запись и так идёт одним писателем. Взятая задача арендована на JOB_LEASE_SECONDS —
+  задачу упавшего воркера после этого заберёт другой;
+- ошибка — повтор через JOB_RETRY_BASE_SECONDS * 2^(попытка-1) (не больше JOB_RETRY_MAX_SECONDS,
+  со случайным разбросом), после max_attempts задача остаётся в статусе failed.
+
+Обработчик вызывается в app context воркера; его изменения в db.session коммитятся вместе
+с отметкой о выполнении.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, NamedTuple, Optional
+
+from flask import Flask, current_app
+from sqlalchemy import and_, delete, or_, select, update
+
+from app import db
+from app.models import Job
+from app.utils.db import insert_ignore
+
+
+log = logging.getLogger(__name__)
+
+
+class TaskSpec(NamedTuple):
+    func: Callable[..., Any]
+    queue: str
+    max_attempts: int
+
+
+TASKS: dict[str, TaskSpec] = {}
+
+
+def task(queue: str = "default", max_attempts: int = 5, name: Optional[str] = None) -> Callable:
+    """Регистрирует обработчик задачи; имя по умолчанию — имя функции."""
+    def decorator(func):
+        TASKS[name or func.__name__] = TaskSpec(func, queue, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(
+    name: str,
+    payload: Optional[dict[str, Any]] = None,
+    *,
+    delay: float = 0,
+    run_at: Optional[datetime] = None,
+    idempotency_key: Optional[str] = None,
+) -> None:
+    """Ставит задачу в очередь в текущей транзакции db.session (видна воркеру после commit)."""
+    spec = TASKS.get(name)
+    if spec is None:
+        raise LookupError(f"Неизвестная задача: {name}")
+    db.session.execute(insert_ignore(Job.__table__).values(
+        queue=spec.queue,
+        name=name,
+        payload=json.dumps(payload or {}, ensure_ascii=False),
+        max_attempts=spec.max_attempts,
+        run_at=run_at or datetime.utcnow() + timedelta(seconds=delay),
+        idempotency_key=idempotency_key,
+    ))
+
+
+def claim(queue: str, worker_id: str, limit: int = 1) -> list:
+    """Забирает до limit готовых задач очереди (и задачи с истёкшей арендой). Коммитит сам."""
+    now = datetime.utcnow()
+    lease = current_app.config.get("JOB_LEASE_SECONDS", 300)
+    ready = (
+        select(Job.id)
+        .where(Job.queue == queue)
+        .where(or_(
+            and_(Job.status == "queued", Job.run_at <= now),
+            and_(Job.status == "running", Job.locked_until < now),
+        ))
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.session.execute(
+        update(Job)
+        .where(Job.id.in_(ready.scalar_subquery()))
+        .values(
+            status="running",
+            attempts=Job.attempts + 1,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=lease),
+        )
+        .returning(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return rows
+
+
+def _settle(job_id: int, worker_id: str, **values) -> None:
+    # аренду могли перехватить (воркер завис дольше JOB_LEASE_SECONDS) — тогда результат не наш
+    db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running")
+        .values(locked_until=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def retry_delay(attempt: int) -> float:
+    base = current_app.config.get("JOB_RETRY_BASE_SECONDS", 10)
+    cap = current_app.config.get("JOB_RETRY_MAX_SECONDS", 3600)
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1)
+
+
+def run_job(row, worker_id: str) -> bool:
+    """Выполняет взятую задачу и записывает результат. True — успешно."""
+    spec = TASKS.get(row.name)
+    try:
+        if spec is None:
+            raise LookupError(f"нет обработчика задачи {row.name}")
+        if row.attempts > row.max_attempts:
+            raise RuntimeError("аренда истекла на последней попытке")
+        spec.func(**json.loads(row.payload))
+        _settle(row.id, worker_id, status="done", finished_at=datetime.utcnow(), last_error=None)
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        log.exception("job #%s %s failed (attempt %s)", row.id, row.name, row.attempts)
+        error = f"{type(e).__name__}: {e}"
+        if spec is None or row.attempts >= row.max_attempts:
+            _settle(row.id, worker_id, status="failed", finished_at=datetime.utcnow(), last_error=error)
+        else:
+            run_at = datetime.utcnow() + timedelta(seconds=retry_delay(row.attempts))
+            _settle(row.id, worker_id, status="queued", run_at=run_at, last_error=error)
+        db.session.commit()
+        return False
+
+
+def prune_finished_jobs(retention_days: int) -> int:
+    """Удаляет выполненные задачи старше retention_days (failed остаются для разбора)."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = db.session.execute(
+        delete(Job).where(Job.status == "done", Job.finished_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()[:32]}:{os.getpid()}"
+
+
+def _consume(app: Flask, queue: str, wid: str, stop: threading.Event, burst: bool) -> None:
+    poll = app.config.get("JOB_POLL_INTERVAL_SECONDS", 1)
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                rows = claim(queue, wid)
+                for row in rows:
+                    run_job(row, wid)
+            except Exception:
+                log.exception("worker loop for queue %s failed", queue)
+                rows = None
+            finally:
+                db.session.remove()
+        if not rows:
+            if burst:
+                return
+            stop.wait(poll)
+
+
+def work(app: Flask, queues: dict[str, int], stop: Optional[threading.Event] = None, burst: bool = False) -> None:
+    """
+    Запускает по queues[q] потоков на очередь и ждёт их. burst — выйти, когда очереди опустеют
+    (для cron и тестов); иначе работает до stop.set().
+    """
+    stop = stop or threading.Event()
+    wid = worker_id()
+    threads = [
+        threading.Thread(target=_consume, args=(app, queue, f"{wid}:{queue}.{i}", stop, burst),
+                         name=f"jobs-{queue}-{i}", daemon=True)
+        for queue, count in queues.items()
+        for i in range(count)
+    ]
+    for t in threads:
+        t.start()
+
+    retention = app.config.get("JOB_RETENTION_DAYS", 7)
+    pruned_at = None
+    while any(t.is_alive() for t in threads):
+        # раз в час чистим выполненные задачи
+        if not burst and retention and (pruned_at is None or time.monotonic() - pruned_at >= 3600):
+            pruned_at = time.monotonic()
+            with app.app_context():
+                try:
+                    prune_finished_jobs(retention)
+                except Exception:
+                    log.exception("pruning finished jobs failed")
+                finally:
+                    db.session.remove()
+        # короткое ожидание: главный поток должен успевать обрабатывать сигналы
+        stop.wait(1 if not burst else 0.05)
+    for t in threads:
+        t.join()
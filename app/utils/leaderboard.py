@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from threading import Lock
+from typing import Any, Optional
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.models import ChallengeProgress
+
+
+_NOT_COMPLETED = float("inf")
+
+
+def _rank_key(completed_count: int, started_at: datetime, completed_at: Optional[datetime]) -> tuple:
+    # больше completed_count — выше; при равенстве выше тот, кто быстрее дошёл до цели
+    elapsed = (completed_at - started_at).total_seconds() if completed_at else _NOT_COMPLETED
+    return (-completed_count, elapsed)
+
+
+class ChallengeLeaderboard:
+    """
+    Отсортированный индекс участников одного челленджа.
+    Ключи (-completed_count, elapsed, user_id) лежат в отсортированном списке,
+    поэтому ранг ищется бинарным поиском за O(log n), а top-K и окно "вокруг меня" — срезами.
+    Ранг считается как RANK(): участники с одинаковым счётом и временем делят место.
+
+    Читают без блокировки (потоки gthread), поэтому upsert не правит список на месте:
+    собирает новые словарь и список и подменяет их одной ссылкой (copy-on-write).
+    Каждое чтение берёт снимок один раз и работает только с ним.
+    """
+
+    def __init__(self, challenge_id: int, rows) -> None:
+        self.challenge_id = challenge_id
+        by_user = {
+            r.user_id: (*_rank_key(r.completed_count, r.started_at, r.completed_at), r.user_id)
+            for r in rows
+        }
+        self._snapshot: tuple[dict[int, tuple], list[tuple]] = (by_user, sorted(by_user.values()))
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._snapshot[1])
+
+    def upsert(self, user_id: int, completed_count: int, started_at: datetime, completed_at: Optional[datetime]) -> None:
+        """Писатели сериализуются вызывающим (LeaderboardStore._lock)."""
+        by_user, keys = self._snapshot
+        by_user, keys = dict(by_user), list(keys)
+        old = by_user.get(user_id)
+        if old is not None:
+            del keys[bisect_left(keys, old)]
+        key = (*_rank_key(completed_count, started_at, completed_at), user_id)
+        insort(keys, key)
+        by_user[user_id] = key
+        self._snapshot = (by_user, keys)
+
+    def rank_of(self, user_id: int) -> Optional[int]:
+        by_user, keys = self._snapshot
+        key = by_user.get(user_id)
+        if key is None:
+            return None
+        return bisect_left(keys, key[:2]) + 1
+
+    def top(self, k: int) -> list[dict[str, Any]]:
+        keys = self._snapshot[1]
+        return [self._entry(keys, pos) for pos in range(min(k, len(keys)))]
+
+    def around(self, user_id: int, window: int) -> list[dict[str, Any]]:
+        by_user, keys = self._snapshot
+        key = by_user.get(user_id)
+        if key is None:
+            return []
+        pos = bisect_left(keys, key)
+        lo, hi = max(pos - window, 0), min(pos + window + 1, len(keys))
+        return [self._entry(keys, p) for p in range(lo, hi)]
+
+    @staticmethod
+    def _entry(keys: list[tuple], pos: int) -> dict[str, Any]:
+        neg_count, elapsed, user_id = keys[pos]
+        return {
+            "rank": bisect_left(keys, (neg_count, elapsed)) + 1,
+            "user_id": user_id,
+            "completed_count": -neg_count,
+            "time_to_complete_seconds": None if elapsed == _NOT_COMPLETED else int(elapsed),
+        }
+
+
+class LeaderboardStore:
+    """
+    Лидерборды челленджей в памяти воркера.
+    Строятся лениво одним запросом, дальше обновляются инкрементально на изменениях
+    прогресса в этом воркере; изменения из других воркеров подхватываются по TTL.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._boards: dict[int, ChallengeLeaderboard] = {}
+        self._lock = Lock()
+
+    def get(self, challenge_id: int) -> ChallengeLeaderboard:
+        board = self._boards.get(challenge_id)
+        if board is None or time.monotonic() - board.loaded_at > self.ttl_seconds:
+            rows = db.session.execute(
+                select(
+                    ChallengeProgress.user_id,
+                    ChallengeProgress.completed_count,
+                    ChallengeProgress.started_at,
+                    ChallengeProgress.completed_at,
+                ).where(ChallengeProgress.challenge_id == challenge_id)
+            ).all()
+            board = ChallengeLeaderboard(challenge_id, rows)
+            with self._lock:
+                self._boards[challenge_id] = board
+        return board
+
+    def record(self, challenge_id: int, user_id: int, completed_count: int,
+               started_at: datetime, completed_at: Optional[datetime]) -> None:
+        # не загруженный лидерборд не трогаем: при первом чтении он построится из БД
+        with self._lock:
+            board = self._boards.get(challenge_id)
+            if board is not None:
+                board.upsert(user_id, completed_count, started_at, completed_at)
+
+
+def _store() -> LeaderboardStore:
+    store = current_app.extensions.get("leaderboard")
+    if store is None:
+        store = current_app.extensions.setdefault(
+            "leaderboard", LeaderboardStore(current_app.config.get("LEADERBOARD_TTL_SECONDS", 60))
+        )
+    return store
+
+
+def get_leaderboard(challenge_id: int) -> ChallengeLeaderboard:
+    return _store().get(challenge_id)
+
+
+def record_progress(challenge_id: int, user_id: int, completed_count: int,
+                    started_at: datetime, completed_at: Optional[datetime]) -> None:
+    """Вызывать после commit, чтобы индекс не видел откатившихся изменений."""
+    _store().record(challenge_id, user_id, completed_count, started_at, completed_at)
@@ -0,0 +1,128 @@
+"""
+Разбор количества ингредиента: "200 г", "1,5 кг", "1/2 стакана", "2-3 шт", "по вкусу".
+
+Количество хранится как есть (quantity) и дополнительно в разобранном виде:
+amount в каноническом unit семейства (масса — г, объём — мл, штуки — шт и т.п.)
+и unit_family. Это позволяет масштабировать рецепт по порциям и складывать
+одинаковые ингредиенты разных рецептов в список покупок. Нераспознанное количество
+("по вкусу") остаётся только текстом.
+"""
+from __future__ import annotations
+
+import math
+import re
+from typing import NamedTuple, Optional
+
+
+class Quantity(NamedTuple):
+    amount: float  # в каноническом unit
+    unit: str
+    family: str
+    # число как написано и сокращение единицы — для показа при масштабировании
+    # ("2 ст. ложки" -> "4 ст.л."): сокращение не нужно согласовывать с числом
+    written_amount: float
+    written_unit: str
+    # нижняя граница диапазона "2-3 шт" как написано; None — не диапазон
+    written_lower: Optional[float] = None
+
+
+# ключ — единица в нижнем регистре без точек и пробелов:
+# (канонический unit, семейство, множитель к каноническому, сокращение для показа)
+_UNITS: dict[str, tuple[str, str, float, str]] = {}
+
+
+def _units(family: str, canonical: str, factor: float, short: str, *names: str) -> None:
+    for name in names:
+        _UNITS[name] = (canonical, family, factor, short)
+
+
+_units("mass", "г", 1, "г", "г", "гр", "грамм", "грамма", "граммов", "g")
+_units("mass", "г", 1000, "кг", "кг", "килограмм", "килограмма", "килограммов", "kg")
+_units("mass", "г", 0.001, "мг", "мг")
+_units("volume", "мл", 1, "мл", "мл", "ml")
+_units("volume", "мл", 1000, "л", "л", "литр", "литра", "литров", "l")
+_units("volume", "мл", 15, "ст.л.", "стл", "стложка", "стложки", "стложек", "столложка", "столоваяложка", "столовыеложки", "столовыхложек", "tbsp")
+_units("volume", "мл", 5, "ч.л.", "чл", "чложка", "чложки", "чложек", "чайнаяложка", "чайныеложки", "чайныхложек", "tsp")
+_units("volume", "мл", 250, "стак.", "стакан", "стакана", "стаканов")
+_units("count", "шт", 1, "шт", "", "шт", "штука", "штуки", "штук", "pcs")
+_units("count", "зубчик", 1, "зубч.", "зубчик", "зубчика", "зубчиков", "зуб")
+_units("count", "пучок", 1, "пуч.", "пучок", "пучка", "пучков")
+_units("count", "банка", 1, "бан.", "банка", "банки", "банок")
+_units("count", "упаковка", 1, "уп.", "упаковка", "упаковки", "упаковок", "уп")
+
+_FRACTIONS = {"½": 0.5, "¼": 0.25, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3}
+_NUMBER = r"\d+(?:[.,]\d+)?(?:\s+\d+/\d+)?|\d+/\d+|[½¼¾⅓⅔]"
+_QUANTITY_RE = re.compile(
+    rf"^\s*(?P<num>{_NUMBER})(?:\s*[-–—]\s*(?P<upper>{_NUMBER}))?\s*(?P<unit>[^\d]*?)\s*\.?\s*$"
+)
+
+
+def _number(text: str) -> float:
+    if text in _FRACTIONS:
+        return _FRACTIONS[text]
+    whole, _, frac = text.partition(" ")
+    if "/" in whole:
+        frac, whole = whole, "0"
+    value = float(whole.replace(",", "."))
+    if frac:
+        num, den = frac.split("/")
+        value += int(num) / int(den) if int(den) else 0
+    return value
+
+
+def parse_quantity(text: Optional[str]) -> Optional[Quantity]:
+    """Разбирает количество; None — не число с известной единицей."""
+    if not text:
+        return None
+    m = _QUANTITY_RE.match(text.strip().lower())
+    if not m:
+        return None
+    unit_key = re.sub(r"[.\s]", "", m["unit"])
+    spec = _UNITS.get(unit_key)
+    if spec is None:
+        return None
+    canonical, family, factor, short = spec
+    # для диапазона "2-3 шт" amount — верхняя граница: в списке покупок лучше с запасом
+    written = _number(m["upper"] or m["num"])
+    lower = _number(m["num"]) if m["upper"] else None
+    return Quantity(written * factor, canonical, family, written, short, lower)
+
+
+def format_amount(value: float) -> str:
+    """1.5 -> "1,5", 2.0 -> "2", 0.333 -> "0,33"."""
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return text.replace(".", ",")
+
+
+def format_canonical(amount: float, unit: str) -> str:
+    """Крупные массы и объёмы — в кг и л: 1500 г -> "1,5 кг"."""
+    if unit == "г" and amount >= 1000:
+        return f"{format_amount(amount / 1000)} кг"
+    if unit == "мл" and amount >= 1000:
+        return f"{format_amount(amount / 1000)} л"
+    return f"{format_amount(amount)} {unit}"
+
+
+def _round_count(value: float) -> float:
+    """Штуки — до целого (2,5 яйца -> 3), меньше одной — до половины, но не до нуля."""
+    if value < 1:
+        return max(0.5, math.floor(value * 2 + 0.5) / 2)
+    return float(math.floor(value + 0.5))
+
+
+def scale_quantity(text: Optional[str], factor: float) -> Optional[str]:
+    """
+    Количество для другого числа порций в тех же единицах; нераспознанное — без изменений.
+    Диапазон масштабируется с обеих сторон ("2-3 шт" x2 -> "4-6 шт").
+    """
+    q = parse_quantity(text)
+    if q is None:
+        return text
+    scale = _round_count if q.family == "count" else (lambda v: v)
+    upper = scale(q.written_amount * factor)
+    if q.written_lower is None:
+        return f"{format_amount(upper)} {q.written_unit}"
+    lower = scale(q.written_lower * factor)
+    if lower == upper:
+        return f"{format_amount(upper)} {q.written_unit}"
+    return f"{format_amount(lower)}-{format_amount(upper)} {q.written_unit}"
@@ -0,0 +1,109 @@
+"""
+Карточки рецептов без ORM: один Core SELECT на страницу списка.
+
+Спискам (лента, поиск, «мои», избранное) нужны только колонки карточки, поэтому
+объекты Recipe с identity map, отслеживанием изменений и загрузкой связей им ни к чему.
+Запрос выбирает ровно запрошенные колонки, имя автора (join users), id категорий
+одной строкой (group_concat / string_agg) и признак избранного (EXISTS); строки Row —
+кортежи, в словари их превращают заранее собранные getters. Формат карточки тот же,
+что у ORM-сериализатора в routes.recipes.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Iterable, Iterator, Optional
+
+from sqlalchemy import Select, String, cast, exists, func, select
+
+from app.models import Recipe, User, recipe_category, user_saved_recipe
+from app.utils.catalog import get_catalog
+from app.utils.fields import compile_getters
+
+
+_COLUMNS = {
+    "title": Recipe.title,
+    "description": Recipe.description,
+    "image_url": Recipe.image_url,
+    "cooking_time": Recipe.cooking_time,
+    "difficulty": Recipe.difficulty,
+    "servings": Recipe.servings,
+    "author": Recipe.author_id,
+    "created_at": Recipe.created_at,
+    "updated_at": Recipe.updated_at,
+}
+
+# "3,7" — id категорий рецепта; сами категории берутся из справочника в памяти
+_CATEGORY_IDS = (
+    select(func.aggregate_strings(cast(recipe_category.c.category_id, String), ","))
+    .where(recipe_category.c.recipe_id == Recipe.id)
+    .scalar_subquery()
+    .label("category_ids")
+)
+
+# categories и is_saved добавляются после getters — порядок ключей как у ORM-пути
+_GETTERS = {
+    "id": attrgetter("id"),
+    "title": attrgetter("title"),
+    "description": attrgetter("description"),
+    "image_url": attrgetter("image_url"),
+    "cooking_time": attrgetter("cooking_time"),
+    "difficulty": attrgetter("difficulty"),
+    "servings": attrgetter("servings"),
+    "author": lambda row: {"id": row.author_id, "name": row.author_name},
+    "created_at": lambda row: row.created_at.isoformat(),
+    "updated_at": lambda row: row.updated_at.isoformat(),
+}
+
+
+def _categories(raw: Optional[str], categories: dict[int, dict[str, Any]]) -> list[dict[str, Any]]:
+    if not raw:
+        return []
+    ids = sorted(int(i) for i in raw.split(","))
+    return [categories[i] for i in ids if i in categories]
+
+
+class CardQuery:
+    """SELECT и getters карточки под набор полей; собирается один раз на набор (card_query)."""
+
+    def __init__(self, fields: frozenset[str]) -> None:
+        fields = fields | {"id"}
+        self.getters = compile_getters(_GETTERS, fields)
+        self.with_categories = "categories" in fields
+        self.with_saved = "is_saved" in fields
+
+        stmt = select(Recipe.id, *(col for name, col in _COLUMNS.items() if name in fields))
+        if "author" in fields:
+            stmt = stmt.add_columns(User.name.label("author_name")).join(User, User.id == Recipe.author_id)
+        if self.with_categories:
+            stmt = stmt.add_columns(_CATEGORY_IDS)
+        self._select = stmt
+
+    def select(self, saved_by: Optional[int] = None) -> Select:
+        """Базовый SELECT; условия, порядок и LIMIT навешивает вызывающий."""
+        if self.with_saved and saved_by is not None:
+            return self._select.add_columns(
+                exists()
+                .where(user_saved_recipe.c.user_id == saved_by)
+                .where(user_saved_recipe.c.recipe_id == Recipe.id)
+                .label("is_saved")
+            )
+        return self._select
+
+    def iter_cards(self, rows: Iterable, all_saved: bool = False) -> Iterator[dict[str, Any]]:
+        categories = get_catalog().categories if self.with_categories else {}
+        for row in rows:
+            data = {key: get(row) for key, get in self.getters}
+            if self.with_categories:
+                data["categories"] = _categories(row.category_ids, categories)
+            if self.with_saved:
+                data["is_saved"] = all_saved or bool(getattr(row, "is_saved", False))
+            yield data
+
+    def cards(self, rows: Iterable, all_saved: bool = False) -> list[dict[str, Any]]:
+        return list(self.iter_cards(rows, all_saved))
+
+
+@lru_cache(maxsize=64)
+def card_query(fields: frozenset[str]) -> CardQuery:
+    return CardQuery(fields)
@@ -0,0 +1,166 @@
+"""
+Маршрутизация чтений на реплики.
+
+Реплики — это binds из REPLICA_BINDS (см. config.py). GET-эндпоинты блюпринтов,
+помеченных reads_from_replica(), читают с реплики; запись, flush и всё, что идёт
+после записи в том же запросе, — с основной БД. После любой записи клиент
+READ_YOUR_WRITES_SECONDS читает только с основной БД (метка в cookie сессии),
+чтобы сразу увидеть свой рецепт или комментарий. Реплика с лагом больше
+REPLICA_MAX_LAG_SECONDS или недоступная временно исключается.
+
+Модуль импортируется из app/__init__.py до создания db, поэтому не импортирует app.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Optional
+
+from flask import Blueprint, Flask, current_app, g, has_request_context, request
+from flask import session as flask_session
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+
+_RYW_KEY = "_ryw_until"
+
+_PG_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def replica_lag(engine: Engine) -> Optional[float]:
+    """
+    Отставание реплики в секундах. None — БД не сообщает лаг (например, два SQLite-файла
+    в dev): тогда реплика считается годной, если к ней есть соединение.
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            return float(conn.exec_driver_sql(_PG_LAG_SQL).scalar() or 0)
+        conn.exec_driver_sql("SELECT 1")
+        return None
+
+
+class ReplicaRouter:
+    """Выбирает реплику для запроса; результат проверки лага кэшируется на check_interval секунд."""
+
+    def __init__(self, bind_keys: list[str], max_lag: float, check_interval: float) -> None:
+        self.bind_keys = list(bind_keys)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._usable: dict[str, tuple[float, bool]] = {}
+        self._lock = threading.Lock()
+
+    def is_usable(self, key: str, engine: Engine) -> bool:
+        now = time.monotonic()
+        cached = self._usable.get(key)
+        if cached is not None and now - cached[0] < self.check_interval:
+            return cached[1]
+        try:
+            lag = replica_lag(engine)
+            usable = lag is None or lag <= self.max_lag
+        except DBAPIError:
+            current_app.logger.warning("replica %s is unavailable, reading from primary", key)
+            usable = False
+        with self._lock:
+            self._usable[key] = (now, usable)
+        return usable
+
+    def pick(self, engines: dict[Any, Engine]) -> Optional[Engine]:
+        candidates = [key for key in self.bind_keys if self.is_usable(key, engines[key])]
+        return engines[random.choice(candidates)] if candidates else None
+
+
+def _request_replica(engines: dict[Any, Engine]) -> Optional[Engine]:
+    if not has_request_context() or not g.get("use_replica"):
+        return None
+    if "db_replica" not in g:
+        # одна реплика на весь запрос — чтения внутри запроса согласованы между собой
+        router: Optional[ReplicaRouter] = current_app.extensions.get("replicas")
+        g.db_replica = router.pick(engines) if router else None
+    return g.db_replica
+
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """Session, которая отдаёт чтения реплике, пока в ней не было записи."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+            and not self.info.get("wrote")
+        ):
+            replica = _request_replica(self._db.engines)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_write(session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session) -> None:
+    if session.info.get("wrote") and has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_core_write(orm_execute_state) -> None:
+    # Core-запись через session.execute (insert/update без ORM-объектов) не проходит через flush
+    if orm_execute_state.statement.is_dml:
+        orm_execute_state.session.info["wrote"] = True
+
+
+def in_read_your_writes_window(session_data: Any) -> bool:
+    """Идёт ли окно read-your-writes по данным сессии (flask.session или расшифрованная cookie)."""
+    return session_data.get(_RYW_KEY, 0) > time.time()
+
+
+def _in_read_your_writes_window() -> bool:
+    return in_read_your_writes_window(flask_session)
+
+
+def _route_reads() -> None:
+    if request.method in ("GET", "HEAD") and not _in_read_your_writes_window():
+        g.use_replica = True
+
+
+def reads_from_replica(bp: Blueprint) -> None:
+    """GET/HEAD эндпоинты блюпринта читают с реплики (если реплики настроены)."""
+    bp.before_request(_route_reads)
+
+
+def init_replicas(app: Flask) -> None:
+    bind_keys = app.config.get("REPLICA_BINDS") or []
+    if not bind_keys:
+        return
+
+    app.extensions["replicas"] = ReplicaRouter(
+        bind_keys,
+        max_lag=app.config.get("REPLICA_MAX_LAG_SECONDS", 5),
+        check_interval=app.config.get("REPLICA_CHECK_INTERVAL_SECONDS", 1),
+    )
+    window = app.config.get("READ_YOUR_WRITES_SECONDS", 5)
+
+    @app.before_request
+    def _reset_db_route():
+        # app context обычно живёт один запрос, но при общем контексте (тесты) сбрасываем явно
+        for key in ("use_replica", "db_replica", "db_wrote"):
+            g.pop(key, None)
+
+    @app.after_request
+    def _start_read_your_writes_window(response):
+        if g.pop("db_wrote", False):
+            flask_session[_RYW_KEY] = time.time() + window
+        return response
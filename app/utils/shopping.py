@@ -0,0 +1,69 @@
+"""
+Список покупок: ингредиенты нескольких рецептов, сложенные по термину (app/utils/terms.py)
+и единице: "Яйца" и "яйцо" из разных рецептов — одна строка.
+
+Суммирование — один GROUP BY в БД по разобранным amount/unit (app/utils/quantities.py);
+при заданном servings каждый рецепт пересчитывается на это число порций прямо в SUM.
+Нераспознанные количества ("по вкусу") собираются строкой в ту же выборку.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import Float, case, cast, distinct, func, literal, select
+
+from app.models import Ingredient, Recipe
+from app.utils.quantities import format_canonical
+
+
+def shopping_list_statement(recipe_ids, servings: Optional[int] = None):
+    """recipe_ids — список id или подзапрос, возвращающий id рецептов."""
+    factor = literal(1.0)
+    if servings:
+        factor = case(
+            (Recipe.servings > 0, literal(float(servings)) / cast(Recipe.servings, Float)),
+            else_=literal(1.0),
+        )
+    # строки без term_id (до `flask backfill ingredient_terms`) складываются по name_norm
+    legacy_name = case((Ingredient.term_id.is_(None), Ingredient.name_norm))
+    name_norm = func.min(Ingredient.name_norm).label("name_norm")
+    stmt = (
+        select(
+            Ingredient.term_id,
+            name_norm,
+            func.min(Ingredient.name).label("name"),
+            Ingredient.unit,
+            Ingredient.unit_family,
+            func.sum(Ingredient.amount * factor).label("amount"),
+            func.count(distinct(Ingredient.recipe_id)).label("recipes"),
+            func.aggregate_strings(case((Ingredient.unit.is_(None), Ingredient.quantity)), "; ").label("texts"),
+        )
+        .where(Ingredient.recipe_id.in_(recipe_ids))
+        .group_by(Ingredient.term_id, legacy_name, Ingredient.unit, Ingredient.unit_family)
+        .order_by(name_norm, Ingredient.unit)
+    )
+    if servings:
+        stmt = stmt.join(Recipe, Recipe.id == Ingredient.recipe_id)
+    return stmt
+
+
+def shopping_items(rows) -> list[dict[str, Any]]:
+    items = []
+    for row in rows:
+        if row.amount is not None:
+            quantity = format_canonical(row.amount, row.unit)
+        else:
+            # одинаковые "по вкусу" из разных рецептов показываем один раз
+            texts = dict.fromkeys(t.strip() for t in (row.texts or "").split(";") if t.strip())
+            quantity = "; ".join(texts) or None
+        items.append({
+            "name": row.name,
+            "name_norm": row.name_norm,
+            "term_id": row.term_id,
+            "amount": round(row.amount, 2) if row.amount is not None else None,
+            "unit": row.unit,
+            "unit_family": row.unit_family,
+            "quantity": quantity,
+            "recipes": row.recipes,
+        })
+    return items
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any, Mapping
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import db
+
+
+log = logging.getLogger(__name__)
+
+
+def apply_pragmas(dbapi_conn, pragmas: Mapping[str, Any]) -> None:
+    cursor = dbapi_conn.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def install_pragmas(engine: Engine, pragmas: Mapping[str, Any]) -> None:
+    """PRAGMA действуют на соединение, поэтому применяем их к каждому новому соединению пула."""
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        apply_pragmas(dbapi_conn, pragmas)
+
+
+def run_maintenance(engine: Engine, checkpoint: str = "PASSIVE") -> tuple[int, int, int]:
+    """
+    PRAGMA optimize (обновляет статистику планировщика там, где она устарела)
+    и wal_checkpoint, чтобы -wal файл не рос между автоматическими чекпойнтами.
+    Возвращает (busy, кадров в WAL, перенесено кадров).
+    """
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA optimize")
+        row = conn.exec_driver_sql(f"PRAGMA wal_checkpoint({checkpoint})").first()
+    return tuple(row) if row else (0, 0, 0)
+
+
+def _maintenance_loop(engines: list[Engine], interval: float) -> None:
+    stop = threading.Event()
+    while not stop.wait(interval):
+        for engine in engines:
+            try:
+                run_maintenance(engine)
+            except Exception:
+                log.exception("SQLite maintenance failed for %s", engine.url)
+
+
+def _start_maintenance(app: Flask, engines: list[Engine], interval: float) -> None:
+    # поток заводится в каждом воркере при первом запросе: при preload_app
+    # create_app выполняется в мастере, а потоки не переживают fork
+    started_in = {"pid": None}
+    lock = threading.Lock()
+
+    @app.before_request
+    def _ensure_sqlite_maintenance():
+        if started_in["pid"] == os.getpid():
+            return
+        with lock:
+            if started_in["pid"] == os.getpid():
+                return
+            started_in["pid"] = os.getpid()
+            threading.Thread(
+                target=_maintenance_loop, args=(engines, interval), name="sqlite-maintenance", daemon=True
+            ).start()
+
+
+def init_sqlite(app: Flask) -> None:
+    """Применяет SQLITE_PRAGMAS ко всем SQLite-движкам приложения и заводит периодическое обслуживание."""
+    pragmas = app.config.get("SQLITE_PRAGMAS")
+    if not pragmas:
+        return
+
+    with app.app_context():
+        engines = [e for e in db.engines.values() if e.dialect.name == "sqlite"]
+    for engine in engines:
+        install_pragmas(engine, pragmas)
+
+    interval = app.config.get("SQLITE_MAINTENANCE_INTERVAL_SECONDS") or 0
+    if engines and interval > 0:
+        _start_maintenance(app, engines, interval)
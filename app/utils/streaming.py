@@ -0,0 +1,60 @@
+"""
+Потоковые ответы NDJSON (application/x-ndjson): по JSON-объекту на строку, без конверта ok().
+
+Списки, которые могут быть большими (поиск, свои и избранные рецепты, комментарии),
+отдаются потоком, если клиент прислал Accept: application/x-ndjson. Строки читаются
+из БД пачками по STREAM_BATCH (yield_per — серверный курсор на Postgres), пачка
+сериализуется, уходит клиенту и отпускается: память воркера не растёт с размером
+выдачи, а первый байт уходит после первой пачки, а не после последней строки.
+
+Дедлайн запроса (app/utils/admission.py) с потока снимается: медленный клиент читает
+тело сколько угодно долго. Если генератор всё же упал, статус 200 уже отправлен —
+последней строкой уходит {"error": {"code", "message"}}, по ней клиент отличает
+оборванный поток от полного.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from flask import Response, current_app, request, stream_with_context
+
+from app.api import ApiError
+from app.utils.admission import lift_deadline
+
+
+NDJSON = "application/x-ndjson"
+STREAM_BATCH = 200
+
+
+def wants_ndjson() -> bool:
+    # только явный запрос: */* и application/json остаются обычным JSON
+    return any(mimetype == NDJSON for mimetype in request.accept_mimetypes.values())
+
+
+def ndjson_response(items: Iterable[dict], headers: Optional[dict[str, str]] = None) -> Response:
+    """Ответ-поток из items; в сокет пишется по пачке строк, а не по одной."""
+    dumps = current_app.json.dumps
+
+    def generate():
+        lines = []
+        try:
+            for item in items:
+                lines.append(dumps(item))
+                if len(lines) >= STREAM_BATCH:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+        except Exception as e:
+            current_app.logger.exception("ndjson stream failed")
+            if isinstance(e, ApiError):
+                error = {"code": e.code, "message": e.message}
+            else:
+                error = {"code": "INTERNAL_SERVER_ERROR", "message": "Внутренняя ошибка сервера"}
+            lines.append(dumps({"error": error}))
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    lift_deadline()
+    resp = Response(stream_with_context(generate()), mimetype=NDJSON, headers=headers)
+    resp.headers["X-Accel-Buffering"] = "no"  # nginx не копит поток целиком
+    resp.vary.add("Accept")
+    return resp
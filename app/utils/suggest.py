@@ -0,0 +1,280 @@
+"""
+Подсказки полей ввода (/api/suggest): названия ингредиентов и рецептов по префиксу.
+
+Индекс — в памяти воркера, свой на каждый вид подсказок: отсортированный список
+свёрнутых строк (fold_name: регистр, ё, пунктуация) и частота каждой. Префикс ищется
+бинарным поиском, из найденного диапазона берутся самые частые; ответ на префикс
+запоминается до изменения строк с этим префиксом. В БД запрос подсказки не ходит.
+
+- ingredient — названия ингредиентов, частота — сколько раз встречаются в рецептах;
+  варианты одного термина (app/utils/terms.py) в ответе не повторяются;
+- title — названия рецептов, частота — сколько раз рецепт сохранили, плюс один.
+
+Индекс строится при прогреве (warm_up) или первым запросом и держит не больше
+SUGGEST_MAX_ENTRIES самых частых строк на вид. Свои записи рецептов применяются после
+commit (события маппера ниже — они видят и ингредиенты, удалённые как сироты);
+сохранения в избранное, записи других воркеров и не вошедшие в лимит строки
+подтягиваются перезагрузкой раз в SUGGEST_TTL_SECONDS. Перезагрузка идёт в фоновом
+потоке, по одной на вид; пока она не закончилась, запросы отвечают по старому индексу.
+"""
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from threading import Lock
+from typing import Any, Callable, Iterable, Optional
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models import Ingredient, Recipe, user_saved_recipe
+from app.utils.terms import fold_name
+
+
+KINDS = ("ingredient", "title")
+MAX_LIMIT = 20
+MAX_PREFIX = 100
+
+_CHANGES = "suggest_changes"
+# верхняя граница диапазона строк с префиксом: prefix <= key < prefix + _LAST_CHAR
+_LAST_CHAR = "\U0010ffff"
+# сколько разных префиксов держать готовыми ответами
+_RESULTS_MAX = 10000
+
+
+def _ingredient_rows(limit: int):
+    # одна строка на термин и написание: «Яйца» и «яйца» сложатся ещё и при свёртке
+    uses = func.count()
+    return db.session.execute(
+        select(func.min(Ingredient.name), uses, Ingredient.term_id)
+        .group_by(Ingredient.term_id, Ingredient.name_norm)
+        .order_by(uses.desc())
+        .limit(limit)
+    ).all()
+
+
+def _title_rows(limit: int):
+    uses = func.count(user_saved_recipe.c.user_id) + 1
+    rows = db.session.execute(
+        select(Recipe.title, uses)
+        .outerjoin(user_saved_recipe, user_saved_recipe.c.recipe_id == Recipe.id)
+        .group_by(Recipe.id)
+        .order_by(uses.desc())
+        .limit(limit)
+    )
+    return [(title, count, None) for title, count in rows]
+
+
+_SOURCES: dict[str, Callable[[int], Any]] = {"ingredient": _ingredient_rows, "title": _title_rows}
+
+
+class PrefixIndex:
+    """
+    Свёрнутые строки в отсортированном списке + key -> [текст, частота, группа].
+    Группа — term_id ингредиента (в ответе одна строка на группу) или сам ключ.
+    """
+
+    def __init__(self, rows: Iterable, max_entries: int) -> None:
+        entries: dict[str, list] = {}
+        for text, count, group in rows:
+            key = fold_name(text or "")
+            if not key:
+                continue
+            entry = entries.get(key)
+            if entry is None:
+                entries[key] = [text, count, group if group is not None else key]
+            else:
+                entry[1] += count
+        self.max_entries = max_entries
+        self._entries = entries
+        self._keys = sorted(entries)
+        self._results: dict[str, list[dict[str, Any]]] = {}
+        self._lock = Lock()
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[dict[str, Any]]:
+        key = fold_name(prefix)[:MAX_PREFIX]
+        if not key:
+            return []
+        found = self._results.get(key)
+        if found is None:
+            with self._lock:
+                found = self._results[key] = self._top(key)
+                if len(self._results) > _RESULTS_MAX:
+                    self._results = {key: found}
+        return found[:limit]
+
+    def _top(self, prefix: str) -> list[dict[str, Any]]:
+        keys, entries = self._keys, self._entries
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + _LAST_CHAR, lo)
+        rank = lambda k: (-entries[k][1], k)  # noqa: E731
+        # с запасом на повторы одной группы; не хватило — сортируем диапазон целиком
+        ranked = heapq.nsmallest(MAX_LIMIT * 4, keys[lo:hi], key=rank)
+        if len(ranked) < hi - lo and len({entries[k][2] for k in ranked}) < MAX_LIMIT:
+            ranked = sorted(keys[lo:hi], key=rank)
+        items, groups = [], set()
+        for k in ranked:
+            text, count, group = entries[k]
+            if group in groups:
+                continue
+            groups.add(group)
+            items.append({"text": text, "count": count})
+            if len(items) == MAX_LIMIT:
+                break
+        return items
+
+    def add(self, text: Optional[str], delta: int, group: Any = None) -> None:
+        key = fold_name(text or "")
+        if not key:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # сверх лимита новые строки ждут перезагрузки
+                if delta <= 0 or len(self._keys) >= self.max_entries:
+                    return
+                self._entries[key] = [text, delta, group if group is not None else key]
+                insort(self._keys, key)
+            else:
+                entry[1] += delta
+                if entry[1] <= 0:
+                    del self._entries[key]
+                    del self._keys[bisect_left(self._keys, key)]
+            for end in range(1, len(key) + 1):
+                self._results.pop(key[:end], None)
+
+
+class SuggestStore:
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._indexes: dict[str, PrefixIndex] = {}
+        self._reloading: set[str] = set()
+        self._lock = Lock()
+
+    def _load(self, kind: str) -> PrefixIndex:
+        index = PrefixIndex(_SOURCES[kind](self.max_entries), self.max_entries)
+        with self._lock:
+            self._indexes[kind] = index
+        return index
+
+    def load(self) -> None:
+        """Строит индексы всех видов (прогрев)."""
+        for kind in KINDS:
+            self._load(kind)
+
+    def get(self, kind: str) -> PrefixIndex:
+        index = self._indexes.get(kind)
+        if index is None:
+            # индекса ещё нет (прогрев не успел или выключен) — строим на месте
+            return self._load(kind)
+        if time.monotonic() - index.loaded_at > self.ttl_seconds:
+            self._reload_later(kind)
+        return index
+
+    def _reload_later(self, kind: str) -> None:
+        with self._lock:
+            if kind in self._reloading:
+                return
+            self._reloading.add(kind)
+        app = current_app._get_current_object()
+        threading.Thread(target=self._reload, args=(app, kind), name=f"suggest-{kind}", daemon=True).start()
+
+    def _reload(self, app: Flask, kind: str) -> None:
+        try:
+            with app.app_context():
+                try:
+                    self._load(kind)
+                except SQLAlchemyError:
+                    # старый индекс остаётся, следующий запрос попробует ещё раз
+                    app.logger.warning("suggest: %s index reload failed", kind, exc_info=True)
+                finally:
+                    db.session.remove()
+        finally:
+            with self._lock:
+                self._reloading.discard(kind)
+
+    def record(self, changes: Iterable[tuple]) -> None:
+        # не построенный индекс не трогаем: он прочитает всё из БД
+        for kind, text, delta, group in changes:
+            index = self._indexes.get(kind)
+            if index is not None:
+                index.add(text, delta, group)
+
+
+def suggest_store(app: Optional[Flask] = None) -> SuggestStore:
+    app = app or current_app
+    store = app.extensions.get("suggest")
+    if store is None:
+        store = app.extensions.setdefault("suggest", SuggestStore(
+            app.config.get("SUGGEST_MAX_ENTRIES", 50000),
+            app.config.get("SUGGEST_TTL_SECONDS", 600),
+        ))
+    return store
+
+
+def get_suggestions(kind: str, prefix: str, limit: int = 10) -> list[dict[str, Any]]:
+    return suggest_store().get(kind).suggest(prefix, limit)
+
+
+_WATCHED = {Ingredient: ("ingredient", "name"), Recipe: ("title", "title")}
+
+
+def _change(obj, delta: int, text=None) -> tuple:
+    kind, attr = _WATCHED[type(obj)]
+    return kind, getattr(obj, attr) if text is None else text, delta, getattr(obj, "term_id", None)
+
+
+def _collect(target, *changes: tuple) -> None:
+    session = object_session(target)
+    if session is None or not has_app_context() or "suggest" not in current_app.extensions:
+        return
+    session.info.setdefault(_CHANGES, []).extend(changes)
+
+
+# события маппера, а не after_flush: ингредиент, убранный из коллекции (delete-orphan),
+# удаляется при flush, но в session.deleted не попадает
+@event.listens_for(Ingredient, "after_insert")
+@event.listens_for(Recipe, "after_insert")
+def _on_insert(mapper, connection, target) -> None:
+    _collect(target, _change(target, 1))
+
+
+@event.listens_for(Ingredient, "after_delete")
+@event.listens_for(Recipe, "after_delete")
+def _on_delete(mapper, connection, target) -> None:
+    # старое значение, если в том же flush поле ещё и меняли
+    history = inspect(target).attrs[_WATCHED[type(target)][1]].history
+    _collect(target, _change(target, -1, history.deleted[0] if history.deleted else None))
+
+
+@event.listens_for(Ingredient, "after_update")
+@event.listens_for(Recipe, "after_update")
+def _on_update(mapper, connection, target) -> None:
+    history = inspect(target).attrs[_WATCHED[type(target)][1]].history
+    _collect(
+        target,
+        *(_change(target, -1, old) for old in history.deleted),
+        *(_change(target, 1, new) for new in history.added),
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+    changes = session.info.pop(_CHANGES, None)
+    if changes and has_app_context():
+        suggest_store().record(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_changes(session: Session) -> None:
+    session.info.pop(_CHANGES, None)
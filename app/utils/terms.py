@@ -0,0 +1,192 @@
+"""
+Словарь ингредиентов (ingredient_terms): одно каноническое название — один целый id.
+
+Строки ingredients хранят название как его написал автор; для поиска и группировки
+каждая ссылается на термин (term_id). Ключ термина — нормализованное название:
+- Unicode NFKC + casefold, ё -> е;
+- пунктуация и дефисы -> пробел, пробелы схлопнуты;
+- окончания слов срезаются (помидоры/помидор, яйца/яйцо, сыры/сыр — один ключ);
+- синонимы (_SYNONYMS) сводятся к одному ключу.
+
+Термин находится при записи ингредиента (before_flush, пачкой на весь flush) через кэш
+воркера; неизвестный ключ вставляется ON CONFLICT DO NOTHING. Термины не меняются и не
+удаляются, поэтому кэш не устаревает — в него попадают только закоммиченные id.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from itertools import chain
+from threading import Lock
+from typing import Iterable, Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models import Ingredient, IngredientTerm
+from app.utils.db import upsert
+
+
+_TERMS = IngredientTerm.__table__
+_PENDING = "ingredient_terms"
+
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+
+# падежные и множественные окончания; длинные проверяются первыми
+_ENDINGS = sorted(
+    (
+        "ого", "его", "ому", "ему", "ами", "ями",
+        "ая", "яя", "ое", "ее", "ые", "ие", "ый", "ий", "ой", "ых", "их", "ом", "ем",
+        "ов", "ев", "ей", "ам", "ям", "ах", "ях",
+        "ы", "и", "а", "я", "о", "е", "у", "ю", "ь",
+    ),
+    key=len,
+    reverse=True,
+)
+_MIN_STEM = 3
+
+
+def fold_name(text: str) -> str:
+    """Регистр, ё, пунктуация и пробелы — без срезания окончаний (подсказки, app/utils/suggest.py)."""
+    text = unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+
+def _stem(word: str) -> str:
+    if word.isascii():
+        # eggs -> egg, tomatoes -> tomato
+        if word.endswith("oes") and len(word) > 4:
+            return word[:-2]
+        if word.endswith("s") and not word.endswith("ss") and len(word) > _MIN_STEM:
+            return word[:-1]
+        return word
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def _stem_phrase(text: str) -> str:
+    return " ".join(_stem(w) for w in fold_name(text).split())
+
+
+# слева — как пишут, справа — канонический термин; сюда же беглые гласные (перцы/перец)
+_SYNONYMS = {
+    _stem_phrase(alias): _stem_phrase(canonical)
+    for alias, canonical in (
+        ("помидор", "томат"),
+        ("картошка", "картофель"),
+        ("куриное яйцо", "яйцо"),
+        ("яйцо куриное", "яйцо"),
+        ("перцы", "перец"),
+        ("черный перец", "перец черный"),
+        ("огурцы", "огурец"),
+        ("сливочное масло", "масло сливочное"),
+        ("растительное масло", "масло растительное"),
+        ("подсолнечное масло", "масло растительное"),
+        ("куриное филе", "курица филе"),
+        ("филе куриное", "курица филе"),
+        ("сахарный песок", "сахар"),
+        ("поваренная соль", "соль"),
+    )
+}
+
+
+def term_key(name: Optional[str]) -> str:
+    """Ключ термина для названия; "" — названия нет."""
+    key = _stem_phrase(name or "")
+    return _SYNONYMS.get(key, key)
+
+
+def lookup_term_ids(executor, names: Iterable[str]) -> dict[str, int]:
+    """
+    key -> id для названий; неизвестные термины вставляются в текущей транзакции.
+    executor — Session или Connection (заполнение данных, app/utils/backfill.py).
+    """
+    wanted: dict[str, str] = {}
+    for name in names:
+        key = term_key(name)
+        if key:
+            wanted.setdefault(key, " ".join(name.split()))
+    if not wanted:
+        return {}
+
+    found = dict(executor.execute(select(_TERMS.c.key, _TERMS.c.id).where(_TERMS.c.key.in_(list(wanted)))).all())
+    missing = [key for key in wanted if key not in found]
+    if missing:
+        inserted = executor.execute(
+            upsert(_TERMS, bind=executor).returning(_TERMS.c.key, _TERMS.c.id),
+            [{"key": key, "name": wanted[key]} for key in missing],
+        )
+        found.update(inserted.all())
+        # не вставились — ключ успели добавить параллельно
+        rest = [key for key in missing if key not in found]
+        if rest:
+            found.update(executor.execute(select(_TERMS.c.key, _TERMS.c.id).where(_TERMS.c.key.in_(rest))).all())
+    return found
+
+
+class TermCache:
+    """key -> id терминов в памяти воркера."""
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._lock = Lock()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, int]:
+        ids = self._ids
+        return {key: ids[key] for key in keys if key in ids}
+
+    def add(self, mapping: dict[str, int]) -> None:
+        with self._lock:
+            self._ids.update(mapping)
+
+
+def _cache() -> Optional[TermCache]:
+    if not has_app_context():
+        return None
+    cache = current_app.extensions.get("ingredient_terms")
+    if cache is None:
+        cache = current_app.extensions.setdefault("ingredient_terms", TermCache())
+    return cache
+
+
+def resolve_term_ids(session: Session, names: Iterable[str]) -> dict[str, int]:
+    """То же, что lookup_term_ids, но сначала по кэшу; новые id попадут в кэш после commit."""
+    names = list(names)
+    keys = {term_key(n) for n in names} - {""}
+    cache = _cache()
+    found = cache.get_many(keys) if cache is not None else {}
+    if len(found) < len(keys):
+        fetched = lookup_term_ids(session, [n for n in names if term_key(n) not in found])
+        session.info.setdefault(_PENDING, {}).update(fetched)
+        found.update(fetched)
+    return found
+
+
+@event.listens_for(Session, "before_flush")
+def _resolve_on_flush(session: Session, flush_context, instances) -> None:
+    # новые ингредиенты и сменившие название — одним поиском на весь flush
+    pending = [
+        obj for obj in chain(session.new, session.dirty)
+        if isinstance(obj, Ingredient) and (obj.term_id is None or inspect(obj).attrs.name.history.has_changes())
+    ]
+    if not pending:
+        return
+    ids = resolve_term_ids(session, [obj.name for obj in pending])
+    for obj in pending:
+        obj.term_id = ids.get(term_key(obj.name))
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    cache = _cache()
+    if pending and cache is not None:
+        cache.add(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -6,13 +6,15 @@ from pathlib import Path
 from typing import Iterable, Optional
 
 from flask import current_app
-from PIL import Image
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 
 from app.api import ApiError
+from app.utils.jobs import enqueue, task
 from http import HTTPStatus
 
+MAX_SIDE = 1200
+
 
 def _allowed_ext(filename: str, allowed: Iterable[str]) -> bool:
     if "." not in filename:
@@ -23,8 +25,9 @@ def _allowed_ext(filename: str, allowed: Iterable[str]) -> bool:
 
 def save_image(file: FileStorage) -> str:
     """
-    Сохраняет изображение в app.config['UPLOAD_FOLDER'] с UUID-именем,
-    ресайзит до 1200px по большей стороне, возвращает публичный URL (/static/uploads/...).
+    Сохраняет изображение в app.config['UPLOAD_FOLDER'] с UUID-именем и возвращает публичный
+    URL (/static/uploads/...). Ресайз и пережатие — фоновой задачей optimize_image (flask worker):
+    запрос только проверяет, что это картинка, и ставит задачу в свою транзакцию.
     """
     if not file or not file.filename:
         raise ApiError("VALIDATION_ERROR", "Файл не передан", HTTPStatus.BAD_REQUEST)
@@ -44,28 +47,43 @@ def save_image(file: FileStorage) -> str:
 
     abs_path = os.path.join(upload_folder, new_name)
 
+    from PIL import Image  # Pillow нужен только загрузке картинок — не держим его в каждом воркере зря
+
     try:
-        img = Image.open(file.stream)
-        img = img.convert("RGB") if ext in {"jpg", "jpeg"} else img
+        # verify читает заголовок и проверяет целостность, не декодируя картинку целиком
+        with Image.open(file.stream) as img:
+            img.verify()
+        file.stream.seek(0)
+        file.save(abs_path)
+    except Exception:
+        raise ApiError("IMAGE_PROCESSING_FAILED", "Не удалось обработать изображение", HTTPStatus.BAD_REQUEST)
+
+    enqueue("optimize_image", {"filename": new_name}, idempotency_key=f"optimize_image:{new_name}")
+    return f"/static/uploads/{new_name}"
+
+
+@task(queue="images", max_attempts=3)
+def optimize_image(filename: str) -> None:
+    """Ресайз до MAX_SIDE по большей стороне и пережатие; файл подменяется атомарно."""
+    from PIL import Image
 
-        # resize до 1200px по большей стороне
-        max_side = 1200
+    abs_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
+    if not os.path.exists(abs_path):
+        return  # картинку уже удалили
+    ext = filename.rsplit(".", 1)[1].lower()
+    tmp_path = f"{abs_path}.tmp"
+
+    with Image.open(abs_path) as img:
+        img = img.convert("RGB") if ext in {"jpg", "jpeg"} else img
         w, h = img.size
-        scale = max(w, h) / max_side
+        scale = max(w, h) / MAX_SIDE
         if scale > 1:
             img = img.resize((int(w / scale), int(h / scale)))
 
-        # Сохраняем оптимизированно
         if ext in {"jpg", "jpeg"}:
-            img.save(abs_path, format="JPEG", quality=85, optimize=True)
+            img.save(tmp_path, format="JPEG", quality=85, optimize=True)
         elif ext == "png":
-            img.save(abs_path, format="PNG", optimize=True)
+            img.save(tmp_path, format="PNG", optimize=True)
         else:  # webp
-            img.save(abs_path, format="WEBP", quality=82, method=6)
-
-    except ApiError:
-        raise
-    except Exception:
-        raise ApiError("IMAGE_PROCESSING_FAILED", "Не удалось обработать изображение", HTTPStatus.BAD_REQUEST)
-
-    return f"/static/uploads/{new_name}"
+            img.save(tmp_path, format="WEBP", quality=82, method=6)
+    os.replace(tmp_path, abs_path)
@@ -0,0 +1,101 @@
+"""
+Прогрев приложения до первого запроса.
+
+Без него первый запрос каждого нового воркера платит за импорт bleach/Pillow,
+конфигурацию мапперов (все selectin/lazy связи), компиляцию шаблонов и матчера URL,
+открытие соединения с БД и загрузку справочников и индекса подсказок. При перезапуске воркеров
+(max_requests, автоскейлинг) это даёт всплески задержки.
+
+С gunicorn preload_app (gunicorn.conf.py) warm_up выполняется один раз в мастере,
+и воркеры получают всё готовое через fork (copy-on-write). Соединения, открытые
+в мастере, воркер не использует: reset_pools_after_fork сбрасывает унаследованные пулы,
+open_pools открывает свои до приёма первого запроса.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from flask import Flask
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
+
+from app import db
+
+
+@contextmanager
+def _timed(timings: dict[str, float], phase: str) -> Iterator[None]:
+    started = time.perf_counter()
+    yield
+    timings[phase] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def _import_heavy_modules() -> None:
+    # в обычном импорте приложения они ленивые (см. comments, utils.uploads)
+    import bleach  # noqa: F401
+    from PIL import Image  # noqa: F401
+
+
+def _compile_templates(app: Flask) -> None:
+    for name in app.jinja_env.list_templates(extensions=["html"]):
+        app.jinja_env.get_template(name)
+
+
+def open_pools(app: Flask) -> None:
+    """Открывает WARM_UP_CONNECTIONS соединений каждого движка и возвращает их в пул."""
+    per_engine = max(1, app.config.get("WARM_UP_CONNECTIONS", 1))
+    with app.app_context():
+        for engine in db.engines.values():
+            conns = [engine.connect() for _ in range(per_engine)]
+            for conn in conns:
+                conn.exec_driver_sql("SELECT 1")
+                conn.close()
+
+
+def reset_pools_after_fork(app: Flask) -> None:
+    """
+    Вызывать в дочернем процессе сразу после fork: соединения мастера остаются за ним,
+    воркер начинает с пустыми пулами (close=False — не закрывать чужие сокеты).
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def _prime_caches(app: Flask) -> None:
+    from app.utils.catalog import get_catalog
+    from app.utils.suggest import suggest_store
+
+    with app.app_context():
+        try:
+            get_catalog()
+            suggest_store(app).load()
+        except SQLAlchemyError:
+            # например, миграции ещё не применены — кэши заполнятся первыми запросами
+            app.logger.warning("warm-up: caches are not available yet", exc_info=True)
+        finally:
+            db.session.remove()
+
+
+def warm_up(app: Flask, connect: bool = True) -> dict[str, float]:
+    """
+    Выполняет всё, что иначе досталось бы первому запросу. Возвращает длительность фаз в мс.
+    connect=False — без обращений к БД (пулы и кэши), например, если БД ещё не готова.
+    """
+    timings: dict[str, float] = {}
+    with _timed(timings, "modules"):
+        _import_heavy_modules()
+    with _timed(timings, "mappers"):
+        configure_mappers()
+    with _timed(timings, "templates"):
+        _compile_templates(app)
+    with _timed(timings, "routes"):
+        app.url_map.update()
+    if connect:
+        with _timed(timings, "pool"):
+            open_pools(app)
+        with _timed(timings, "caches"):
+            _prime_caches(app)
+    app.logger.info("warm-up done: %s", ", ".join(f"{k} {v} ms" for k, v in timings.items()))
+    return timings
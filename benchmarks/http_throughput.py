@@ -0,0 +1,107 @@
+"""
+Нагрузочный замер читающих эндпоинтов: пропускная способность и задержки
+при разном числе одновременных соединений.
+
+Сравнение sync (gunicorn) и async (uvicorn, app/asgi.py) на одной и той же БД:
+
+    gunicorn -w 4 -b 127.0.0.1:8000 "run:app"
+    uvicorn asgi:app --workers 4 --port 8001 --no-access-log
+
+    python benchmarks/http_throughput.py \
+        --target sync=http://127.0.0.1:8000 --target async=http://127.0.0.1:8001 \
+        --concurrency 4,16,64,256 --duration 10
+
+Каждое соединение держит keep-alive и по кругу запрашивает пути из --path.
+Используется только стандартная библиотека.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    "/api/recipes?page=1&per_page=12",
+    "/api/recipes/1",
+    "/api/recipes/search?q=%D1%81%D1%8B%D1%80",
+    "/api/recipes/1/comments",
+    "/api/challenges",
+]
+
+
+def _worker(base: str, paths: list[str], deadline: float, latencies: list[float], errors: list[int]) -> None:
+    url = urlsplit(base)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status >= 500:
+                errors.append(resp.status)
+            latencies.append(time.perf_counter() - started)
+        except (OSError, http.client.HTTPException):
+            errors.append(0)
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    conn.close()
+
+
+def run(base: str, paths: list[str], concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors: list[int] = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_worker, args=(base, paths, deadline, latencies, errors), daemon=True)
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    pct = lambda q: ordered[min(int(len(ordered) * q), len(ordered) - 1)] * 1000 if ordered else float("nan")  # noqa: E731
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(ordered) * 1000 if ordered else float("nan"),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "errors": len(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True, help="name=http://host:port (можно несколько)")
+    parser.add_argument("--path", action="append", help="путь для запросов (по умолчанию горячие GET)")
+    parser.add_argument("--concurrency", default="4,16,64", help="список числа соединений через запятую")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность одного прогона, сек")
+    parser.add_argument("--warmup", type=float, default=2.0, help="прогрев перед замером, сек")
+    args = parser.parse_args()
+
+    paths = args.path or DEFAULT_PATHS
+    levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+    targets = [t.split("=", 1) if "=" in t else (t, t) for t in args.target]
+
+    print(f"{'target':<10} {'conn':>5} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, base in targets:
+        if args.warmup:
+            run(base, paths, levels[0], args.warmup)
+        for level in levels:
+            r = run(base, paths, level, args.duration)
+            print(f"{name:<10} {level:>5} {r['rps']:>10.1f} {r['p50_ms']:>9.1f} "
+                  f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Карточки ленты: ORM (объекты Recipe + сериализатор) против Core-запроса (app.utils.recipe_cards).
+
+    python benchmarks/list_read_path.py --recipes 2000 --per-page 50 --pages 200
+
+Обе стороны отдают один и тот же JSON-формат. Печатает карточек в секунду
+и память на одну страницу (tracemalloc): пик выделений и сколько блоков остаётся у результата.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import Category, Recipe, User, recipe_category  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def _prepare(n_recipes: int) -> None:
+    user = User(name="bench", email="b@b.local", password_hash="x")
+    db.session.add(user)
+    db.session.add_all([Category(name=f"Категория {i}", slug=f"c{i}") for i in range(8)])
+    db.session.flush()
+    db.session.execute(insert(Recipe), [
+        {"title": f"Рецепт {i}", "description": "Описание " * 10, "author_id": user.id,
+         "cooking_time": 30, "difficulty": "Легко", "servings": 2}
+        for i in range(n_recipes)
+    ])
+    rng = random.Random(1)
+    db.session.execute(insert(recipe_category), [
+        {"recipe_id": rid, "category_id": cid}
+        for rid in range(1, n_recipes + 1)
+        for cid in rng.sample(range(1, 9), 2)
+    ])
+    db.session.commit()
+
+
+def _orm_page(offset: int, per_page: int) -> list:
+    from app.routes.recipes import CARD, _recipes_to_cards
+
+    stmt = select(Recipe).options(*CARD.options).order_by(Recipe.created_at.desc()).limit(per_page).offset(offset)
+    items = _recipes_to_cards(db.session.execute(stmt).scalars().all())
+    db.session.expunge_all()  # как в конце запроса: identity map не копится между страницами
+    return items
+
+
+def _core_page(offset: int, per_page: int) -> list:
+    from app.routes.recipes import RECIPE_FIELDS
+    from app.utils.recipe_cards import card_query
+
+    query = card_query(frozenset(RECIPE_FIELDS))
+    stmt = query.select().order_by(Recipe.created_at.desc()).limit(per_page).offset(offset)
+    return query.cards(db.session.execute(stmt).all())
+
+
+def _measure(read_page, args, n_recipes: int) -> tuple[float, int, int]:
+    offsets = [(i * args.per_page) % max(n_recipes - args.per_page, 1) for i in range(args.pages)]
+    read_page(0, args.per_page)  # прогрев: компиляция SQL, справочник
+
+    started = time.perf_counter()
+    for offset in offsets:
+        read_page(offset, args.per_page)
+    rows_per_sec = args.pages * args.per_page / (time.perf_counter() - started)
+
+    # пик — всё, что страница выделяет по ходу (строки, объекты, словари); блоки — что живо в конце
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    items = read_page(offsets[-1], args.per_page)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(max(s.count_diff, 0) for s in after.compare_to(before, "filename"))
+    del items
+    return rows_per_sec, blocks, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            SQLITE_MAINTENANCE_INTERVAL_SECONDS = 0
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all(bind_key=None)
+            _prepare(args.recipes)
+
+        for name, read_page in (("orm", _orm_page), ("core", _core_page)):
+            with app.test_request_context("/api/recipes"):
+                rows_per_sec, blocks, size = _measure(read_page, args, args.recipes)
+            print(f"{name:<5} {rows_per_sec:>10.0f} карточек/с   "
+                  f"на страницу: пик {size / 1024:.1f} КиБ, {blocks} живых блоков")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Конкурентная нагрузка на SQLite: несколько процессов-писателей и процессов-читателей
+(как воркеры gunicorn) на одном файле БД, без профиля и с SQLITE_PRAGMAS из ProductionConfig.
+
+    python benchmarks/sqlite_concurrency.py --writers 4 --readers 8 --duration 10
+
+Писатель в цикле добавляет комментарий короткой транзакцией (как add_comment),
+читатель — берёт страницу ленты и число комментариев рецепта (как карточка + детальная).
+Печатает операции в секунду и число ошибок "database is locked".
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from config import ProductionConfig  # noqa: E402
+
+N_RECIPES = 500
+
+
+def _engine(url: str, pragmas: dict):
+    from app.utils.sqlite import install_pragmas
+
+    engine = create_engine(url)
+    if pragmas:
+        install_pragmas(engine, pragmas)
+    return engine
+
+
+def _prepare(path: str, pragmas: dict) -> None:
+    from app import db
+    from app.models import Comment, Recipe, User
+
+    engine = _engine(f"sqlite:///{path}", pragmas)
+    db.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "name": "bench", "email": "b@b.local", "password_hash": "x", "created_at": now}])
+        conn.execute(insert(Recipe), [
+            {"id": r, "title": f"Рецепт {r}", "author_id": 1, "created_at": now, "updated_at": now}
+            for r in range(1, N_RECIPES + 1)
+        ])
+        conn.execute(insert(Comment), [
+            {"recipe_id": r, "user_id": 1, "text": "seed", "created_at": now} for r in range(1, N_RECIPES + 1)
+        ])
+    engine.dispose()
+
+
+def _run(role: str, path: str, pragmas: dict, deadline: float, out) -> None:
+    engine = _engine(f"sqlite:///{path}", pragmas)
+    ops = errors = 0
+    i = os.getpid()
+    while time.time() < deadline:
+        i += 1
+        recipe_id = i % N_RECIPES + 1
+        try:
+            if role == "writer":
+                with engine.begin() as conn:
+                    conn.exec_driver_sql(
+                        "INSERT INTO comments (recipe_id, user_id, text, created_at) VALUES (?, 1, 'bench', ?)",
+                        (recipe_id, datetime.utcnow()),
+                    )
+            else:
+                with engine.connect() as conn:
+                    conn.exec_driver_sql(
+                        "SELECT id, title FROM recipes ORDER BY created_at DESC LIMIT 12 OFFSET ?", (i % 40 * 12,)
+                    ).all()
+                    conn.exec_driver_sql("SELECT count(*) FROM comments WHERE recipe_id = ?", (recipe_id,)).scalar()
+            ops += 1
+        except OperationalError:
+            errors += 1
+    engine.dispose()
+    out.put((role, ops, errors))
+
+
+def bench(profile: str, pragmas: dict, writers: int, readers: int, duration: float) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        _prepare(path, pragmas)
+
+        out = mp.Queue()
+        deadline = time.time() + duration
+        procs = [mp.Process(target=_run, args=("writer", path, pragmas, deadline, out)) for _ in range(writers)]
+        procs += [mp.Process(target=_run, args=("reader", path, pragmas, deadline, out)) for _ in range(readers)]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    totals = {"writer": [0, 0], "reader": [0, 0]}
+    for role, ops, errors in results:
+        totals[role][0] += ops
+        totals[role][1] += errors
+    print(
+        f"{profile:<11} writes/s {totals['writer'][0] / duration:>9.1f}  locked {totals['writer'][1]:>5}   "
+        f"reads/s {totals['reader'][0] / duration:>9.1f}  locked {totals['reader'][1]:>5}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    bench("default", {}, args.writers, args.readers, args.duration)
+    bench("production", ProductionConfig.SQLITE_PRAGMAS, args.writers, args.readers, args.duration)
+
+
+if __name__ == "__main__":
+    main()
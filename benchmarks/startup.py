@@ -0,0 +1,81 @@
+"""
+Время старта воркера и задержка первых запросов — без прогрева и с warm_up.
+
+    python benchmarks/startup.py --runs 5
+
+Каждый прогон — отдельный процесс (как свежий воркер): импорт и create_app,
+затем первые запросы к ленте, рецепту и главной странице через test_client.
+Печатает медианы в мс.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+from config import ProductionConfig
+app = create_app(ProductionConfig)
+result = {"create_app": time.perf_counter() - started}
+if sys.argv[1] == "warm":
+    from app.utils.warmup import warm_up
+    t = time.perf_counter()
+    warm_up(app)
+    result["warm_up"] = time.perf_counter() - t
+client = app.test_client()
+for name, path in (("feed", "/api/recipes?page=1&per_page=12"), ("detail", "/api/recipes/1"),
+                   ("page", "/"), ("feed_again", "/api/recipes?page=1&per_page=12")):
+    t = time.perf_counter()
+    assert client.get(path).status_code == 200, path
+    result[name] = time.perf_counter() - t
+print(json.dumps(result))
+"""
+
+
+def _prepare(env: dict) -> None:
+    code = (
+        "from app import create_app, db\n"
+        "from app.models import Recipe, User\n"
+        "app = create_app()\n"
+        "with app.app_context():\n"
+        "    db.create_all(bind_key=None)\n"
+        "    u = User(name='bench', email='b@b.local', password_hash='x')\n"
+        "    db.session.add(u); db.session.flush()\n"
+        "    db.session.add_all([Recipe(title=f'Рецепт {i}', author_id=u.id) for i in range(50)])\n"
+        "    db.session.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True)
+
+
+def _run(mode: str, env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", _CHILD, mode], cwd=ROOT, env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+               "SQLITE_MAINTENANCE_INTERVAL_SECONDS": "0"}
+        _prepare(env)
+        for mode in ("cold", "warm"):
+            runs = [_run(mode, env) for _ in range(args.runs)]
+            cols = ", ".join(f"{k} {statistics.median(r[k] for r in runs) * 1000:.1f}" for k in runs[0])
+            print(f"{mode:<5} {cols}")
+
+
+if __name__ == "__main__":
+    main()
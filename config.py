@@ -1,15 +1,102 @@
 import os
 
 
+def _pool_options(env_name: str) -> dict:
+    size = os.environ.get(env_name)
+    return {"pool_size": int(size)} if size else {}
+
+
+def _replica_binds() -> dict:
+    # REPLICA_DATABASE_URLS="postgresql+psycopg2://...replica1,postgresql+psycopg2://...replica2"
+    urls = [u.strip() for u in (os.environ.get("REPLICA_DATABASE_URLS") or "").split(",") if u.strip()]
+    return {
+        f"replica_{i}": {"url": url, "pool_pre_ping": True, **_pool_options("REPLICA_POOL_SIZE")}
+        for i, url in enumerate(urls)
+    }
+
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "dev-secret-key"
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or "sqlite:///cookflow.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = _pool_options("DB_POOL_SIZE")
+
+    # реплики для чтения (app/utils/replicas.py): у каждой свой пул размером REPLICA_POOL_SIZE
+    SQLALCHEMY_BINDS = _replica_binds()
+    REPLICA_BINDS = list(SQLALCHEMY_BINDS)
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get("REPLICA_MAX_LAG_SECONDS") or 5)
+    REPLICA_CHECK_INTERVAL_SECONDS = float(os.environ.get("REPLICA_CHECK_INTERVAL_SECONDS") or 1)
+    # сколько секунд после записи клиент читает только с основной БД
+    READ_YOUR_WRITES_SECONDS = float(os.environ.get("READ_YOUR_WRITES_SECONDS") or 5)
 
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB
     UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER") or "app/static/uploads"
     ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "webp"}
 
+    # асинхронный режим (asgi.py); по умолчанию DATABASE_URL с async-драйвером (aiosqlite/asyncpg)
+    ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL")
+
+    # лидерборды челленджей живут в памяти воркера; изменения других воркеров видны через TTL
+    LEADERBOARD_TTL_SECONDS = int(os.environ.get("LEADERBOARD_TTL_SECONDS") or 60)
+    # счётчики участников/завершений в каталоге челленджей — так же, свои изменения видны сразу
+    CHALLENGE_STATS_TTL_SECONDS = int(os.environ.get("CHALLENGE_STATS_TTL_SECONDS") or 60)
+    # подсказки /api/suggest (app/utils/suggest.py): строк в индексе на вид, период полной
+    # перезагрузки (записи других воркеров) и сколько браузер/прокси держат ответ на префикс
+    SUGGEST_MAX_ENTRIES = int(os.environ.get("SUGGEST_MAX_ENTRIES") or 50000)
+    SUGGEST_TTL_SECONDS = int(os.environ.get("SUGGEST_TTL_SECONDS") or 600)
+    SUGGEST_MAX_AGE_SECONDS = int(os.environ.get("SUGGEST_MAX_AGE_SECONDS") or 60)
+
+    # live-комментарии (SSE, app/utils/comment_stream.py). Каждый поток занимает поток воркера,
+    # поэтому SSE_MAX_CONNECTIONS должен быть меньше числа потоков gunicorn (GUNICORN_THREADS)
+    SSE_MAX_CONNECTIONS = int(os.environ.get("SSE_MAX_CONNECTIONS") or 8)
+    SSE_POLL_INTERVAL_SECONDS = float(os.environ.get("SSE_POLL_INTERVAL_SECONDS") or 1)
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS") or 15)
+    SSE_STREAM_MAX_SECONDS = float(os.environ.get("SSE_STREAM_MAX_SECONDS") or 300)
+    SSE_RETRY_MS = 3000
+    COMMENT_EVENTS_RETENTION_DAYS = int(os.environ.get("COMMENT_EVENTS_RETENTION_DAYS") or 2)
+
+    # допуск запросов (app/utils/admission.py): сколько запросов класса воркер обслуживает
+    # одновременно (0 — без лимита) и дедлайн в секундах, который доходит до БД как statement_timeout.
+    # Классы без записи здесь (stream) не ограничиваются
+    REQUEST_CLASSES = {
+        "read": {"concurrency": 0, "deadline": float(os.environ.get("READ_DEADLINE_SECONDS") or 5)},
+        "search": {
+            "concurrency": int(os.environ.get("SEARCH_CONCURRENCY") or 4),
+            "deadline": float(os.environ.get("SEARCH_DEADLINE_SECONDS") or 3),
+        },
+        "write": {
+            "concurrency": int(os.environ.get("WRITE_CONCURRENCY") or 8),
+            "deadline": float(os.environ.get("WRITE_DEADLINE_SECONDS") or 10),
+        },
+        "upload": {
+            "concurrency": int(os.environ.get("UPLOAD_CONCURRENCY") or 2),
+            "deadline": float(os.environ.get("UPLOAD_DEADLINE_SECONDS") or 30),
+        },
+    }
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.environ.get("ADMISSION_RETRY_AFTER_SECONDS") or 1)
+    # token bucket на запись: в среднем WRITE_RATE_PER_MINUTE, подряд до WRITE_BURST; 0 — выключено
+    WRITE_RATE_PER_MINUTE = int(os.environ.get("WRITE_RATE_PER_MINUTE") or 60)
+    WRITE_BURST = int(os.environ.get("WRITE_BURST") or 30)
+    # сколько обратных прокси (nginx и т.п.) стоит перед приложением: их X-Forwarded-For/-Proto
+    # принимаются (ProxyFix), и лимит анонимной записи считается по IP клиента, а не прокси.
+    # 0 — заголовкам не доверять (приложение открыто напрямую, иначе IP можно подделать)
+    TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS") or 0)
+
+    # фоновые задачи (app/utils/jobs.py, `flask worker`): очереди и потоки на каждую
+    WORKER_QUEUES = os.environ.get("WORKER_QUEUES") or "default=2,images=1"
+    JOB_POLL_INTERVAL_SECONDS = float(os.environ.get("JOB_POLL_INTERVAL_SECONDS") or 1)
+    JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS") or 300)
+    JOB_RETRY_BASE_SECONDS = float(os.environ.get("JOB_RETRY_BASE_SECONDS") or 10)
+    JOB_RETRY_MAX_SECONDS = float(os.environ.get("JOB_RETRY_MAX_SECONDS") or 3600)
+    JOB_RETENTION_DAYS = int(os.environ.get("JOB_RETENTION_DAYS") or 7)
+
+    # flask backfill (app/utils/backfill.py): строк на транзакцию и пауза между пачками
+    BACKFILL_BATCH_SIZE = int(os.environ.get("BACKFILL_BATCH_SIZE") or 1000)
+    BACKFILL_PAUSE_SECONDS = float(os.environ.get("BACKFILL_PAUSE_SECONDS") or 0.1)
+
+    # сколько соединений каждого пула открыть при прогреве воркера (app/utils/warmup.py)
+    WARM_UP_CONNECTIONS = int(os.environ.get("WARM_UP_CONNECTIONS") or 1)
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -17,3 +104,29 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+
+    # профиль SQLite для нескольких воркеров gunicorn (app/utils/sqlite.py), на Postgres не действует:
+    # WAL — читатели не блокируют писателя, busy_timeout — ждать блокировку вместо "database is locked"
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS") or 5000),
+        "foreign_keys": "ON",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # в KiB: 64 МБ на соединение
+        "temp_store": "MEMORY",
+    }
+    # PRAGMA optimize + wal_checkpoint(PASSIVE) из фонового потока каждого воркера; 0 — выключено
+    SQLITE_MAINTENANCE_INTERVAL_SECONDS = int(os.environ.get("SQLITE_MAINTENANCE_INTERVAL_SECONDS") or 3600)
+
+
+# профиль для create_app() без аргумента: COOKFLOW_CONFIG=production|development (по умолчанию
+# development). gunicorn.conf.py выставляет production, если переменная не задана
+CONFIGS = {"development": DevelopmentConfig, "production": ProductionConfig}
+
+
+def config_from_env() -> type[Config]:
+    name = (os.environ.get("COOKFLOW_CONFIG") or "development").strip().lower()
+    if name not in CONFIGS:
+        raise RuntimeError(f"COOKFLOW_CONFIG={name!r}: ожидается одно из {', '.join(CONFIGS)}")
+    return CONFIGS[name]
@@ -0,0 +1,48 @@
+"""
+Конфиг gunicorn (подхватывается автоматически из текущей директории):
+
+    gunicorn "run:app"
+
+Приложение загружается и прогревается в мастере (preload_app + app/utils/warmup.py),
+воркеры получают импортированные модули, мапперы, шаблоны и справочники через fork.
+"""
+import gc
+import os
+
+# конфиг читается до загрузки приложения: под gunicorn по умолчанию — ProductionConfig
+# (DEBUG выключен, профиль SQLITE_PRAGMAS), если COOKFLOW_CONFIG не задан явно
+os.environ.setdefault("COOKFLOW_CONFIG", "production")
+
+bind = os.environ.get("GUNICORN_BIND") or "0.0.0.0:8000"
+workers = int(os.environ.get("WEB_CONCURRENCY") or 4)
+# потоки (gthread): SSE-потоки комментариев держат поток на всё время подключения
+threads = int(os.environ.get("GUNICORN_THREADS") or 16)
+preload_app = True
+
+# воркеры перезапускаются не одновременно: jitter разносит рестарты по времени
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS") or 2000)
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER") or 200)
+graceful_timeout = 30
+
+
+def when_ready(server):
+    # мастер, до первого fork
+    from app.utils.warmup import warm_up
+
+    warm_up(server.app.wsgi())
+    # всё созданное при загрузке — в постоянное поколение: сборщик мусора в воркерах
+    # не будет трогать эти объекты и копировать их страницы (copy-on-write)
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.utils.warmup import reset_pools_after_fork
+
+    reset_pools_after_fork(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    # воркер ещё не принимает запросы: открываем свои соединения заранее
+    from app.utils.warmup import open_pools
+
+    open_pools(worker.wsgi)
@@ -0,0 +1,38 @@
+"""challenge participants/completions counters
+
+Revision ID: 9b3e6f1c2d84
+Revises: f0c5a1e8d293
+Create Date: 2026-03-12 11:04:27.315092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e6f1c2d84'
+down_revision = 'f0c5a1e8d293'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('challenges', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('participants_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('completions_count', sa.Integer(), server_default='0', nullable=False))
+
+    # разовый пересчёт по индексу challenge_progress.challenge_id; дальше счётчики
+    # меняются в транзакциях старта/завершения челленджа
+    op.execute(
+        "UPDATE challenges SET "
+        "participants_count = (SELECT COUNT(*) FROM challenge_progress p "
+        "WHERE p.challenge_id = challenges.id), "
+        "completions_count = (SELECT COUNT(*) FROM challenge_progress p "
+        "WHERE p.challenge_id = challenges.id AND p.completed_at IS NOT NULL)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('challenges', schema=None) as batch_op:
+        batch_op.drop_column('completions_count')
+        batch_op.drop_column('participants_count')
@@ -0,0 +1,39 @@
+"""cooking events
+
+Revision ID: a3c91e4d2b17
+Revises: 5890b67b005d
+Create Date: 2026-01-12 18:42:03.512904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c91e4d2b17'
+down_revision = '5890b67b005d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cooking_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('recipe_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('cooking_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cooking_events_recipe_id'), ['recipe_id'], unique=False)
+        batch_op.create_index('ix_cooking_events_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('cooking_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_cooking_events_user_id_created_at')
+        batch_op.drop_index(batch_op.f('ix_cooking_events_recipe_id'))
+
+    op.drop_table('cooking_events')
@@ -0,0 +1,28 @@
+"""cache versions
+
+Revision ID: b5d27a9e6c18
+Revises: e1b48d6c3f92
+Create Date: 2026-02-02 11:07:45.318226
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d27a9e6c18'
+down_revision = 'e1b48d6c3f92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_versions')
@@ -0,0 +1,31 @@
+"""ingredient amount and unit
+
+Revision ID: c2f81d9e4a57
+Revises: a9c4e7b2d610
+Create Date: 2026-02-19 17:32:10.664120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f81d9e4a57'
+down_revision = 'a9c4e7b2d610'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # существующие строки заполняет `flask backfill ingredient_quantities` (разбор — в Python)
+    with op.batch_alter_table('ingredients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('amount', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('unit', sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column('unit_family', sa.String(length=8), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ingredients', schema=None) as batch_op:
+        batch_op.drop_column('unit_family')
+        batch_op.drop_column('unit')
+        batch_op.drop_column('amount')
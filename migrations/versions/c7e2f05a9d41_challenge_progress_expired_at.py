@@ -0,0 +1,37 @@
+"""challenge progress expired_at + active partial index
+
+Revision ID: c7e2f05a9d41
+Revises: a3c91e4d2b17
+Create Date: 2026-01-19 11:05:47.208113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2f05a9d41'
+down_revision = 'a3c91e4d2b17'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_PROGRESS_SQL = "completed_at IS NULL AND expired_at IS NULL"
+
+
+def upgrade():
+    with op.batch_alter_table('challenge_progress', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expired_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(
+            'ix_challenge_progress_active_user',
+            ['user_id', 'started_at'],
+            unique=False,
+            sqlite_where=sa.text(ACTIVE_PROGRESS_SQL),
+            postgresql_where=sa.text(ACTIVE_PROGRESS_SQL),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('challenge_progress', schema=None) as batch_op:
+        batch_op.drop_index('ix_challenge_progress_active_user')
+        batch_op.drop_column('expired_at')
@@ -0,0 +1,40 @@
+"""comment events
+
+Revision ID: d84f1c27b9e3
+Revises: b5d27a9e6c18
+Create Date: 2026-02-09 15:22:31.504117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd84f1c27b9e3'
+down_revision = 'b5d27a9e6c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('comment_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('recipe_id', sa.Integer(), nullable=False),
+    sa.Column('comment_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('comment_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_comment_events_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_comment_events_recipe_id_id', ['recipe_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comment_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_events_recipe_id_id')
+        batch_op.drop_index(batch_op.f('ix_comment_events_created_at'))
+
+    op.drop_table('comment_events')
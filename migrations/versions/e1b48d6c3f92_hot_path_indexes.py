@@ -0,0 +1,40 @@
+"""hot path indexes
+
+Revision ID: e1b48d6c3f92
+Revises: c7e2f05a9d41
+Create Date: 2026-01-26 16:31:12.774520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b48d6c3f92'
+down_revision = 'c7e2f05a9d41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_recipes_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_recipes_author_id_created_at', ['author_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('user_saved_recipe', schema=None) as batch_op:
+        batch_op.create_index('ix_user_saved_recipe_recipe_id', ['recipe_id'], unique=False)
+
+    with op.batch_alter_table('recipe_category', schema=None) as batch_op:
+        batch_op.create_index('ix_recipe_category_category_id', ['category_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recipe_category', schema=None) as batch_op:
+        batch_op.drop_index('ix_recipe_category_category_id')
+
+    with op.batch_alter_table('user_saved_recipe', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_saved_recipe_recipe_id')
+
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_index('ix_recipes_author_id_created_at')
+        batch_op.drop_index(batch_op.f('ix_recipes_created_at'))
@@ -0,0 +1,43 @@
+"""backfill checkpoints, renormalize ingredient name_norm
+
+Revision ID: e6b3d0a74f18
+Revises: c2f81d9e4a57
+Create Date: 2026-02-23 10:41:27.305912
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3d0a74f18'
+down_revision = 'c2f81d9e4a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('backfill_checkpoints',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('last_key', sa.BigInteger(), nullable=True),
+    sa.Column('rows_seen', sa.Integer(), nullable=False),
+    sa.Column('rows_changed', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    # 5890b67b005d заполнила name_norm через SQL lower(), который на SQLite не трогает кириллицу.
+    # Пересчитываем в Python пачками; прерванная миграция продолжит с сохранённого ключа,
+    # а на большой таблице заполнение можно вынести из миграции: `flask backfill ingredient_name_norm`.
+    if context.is_offline_mode():
+        return
+    from app.utils.backfill import run_backfill
+
+    with op.get_context().autocommit_block():
+        run_backfill(op.get_bind().engine, "ingredient_name_norm")
+
+
+def downgrade():
+    op.drop_table('backfill_checkpoints')
@@ -0,0 +1,48 @@
+"""ingredient terms dictionary
+
+Revision ID: f0c5a1e8d293
+Revises: e6b3d0a74f18
+Create Date: 2026-02-26 15:12:03.481726
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0c5a1e8d293'
+down_revision = 'e6b3d0a74f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ingredient_terms',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key')
+    )
+    with op.batch_alter_table('ingredients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('term_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_ingredients_term_id', 'ingredient_terms', ['term_id'], ['id'])
+        batch_op.create_index('ix_ingredients_term_recipe', ['term_id', 'recipe_id'], unique=False)
+
+    # словарь наполняется из существующих строк пачками (app/utils/backfill.py);
+    # на большой таблице можно вынести из миграции: `flask backfill ingredient_terms`
+    if context.is_offline_mode():
+        return
+    from app.utils.backfill import run_backfill
+
+    with op.get_context().autocommit_block():
+        run_backfill(op.get_bind().engine, "ingredient_terms")
+
+
+def downgrade():
+    with op.batch_alter_table('ingredients', schema=None) as batch_op:
+        batch_op.drop_index('ix_ingredients_term_recipe')
+        batch_op.drop_constraint('fk_ingredients_term_id', type_='foreignkey')
+        batch_op.drop_column('term_id')
+
+    op.drop_table('ingredient_terms')
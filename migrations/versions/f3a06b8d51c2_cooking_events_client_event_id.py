@@ -0,0 +1,28 @@
+"""cooking events client event id
+
+Revision ID: f3a06b8d51c2
+Revises: d84f1c27b9e3
+Create Date: 2026-02-12 10:41:08.927345
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a06b8d51c2'
+down_revision = 'd84f1c27b9e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('cooking_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('client_event_id', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_cooking_events_client_event_id', ['client_event_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('cooking_events', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_cooking_events_client_event_id', type_='unique')
+        batch_op.drop_column('client_event_id')
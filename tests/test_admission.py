@@ -0,0 +1,149 @@
+import json
+import time
+
+import pytest
+from flask import g
+from sqlalchemy import text
+
+from app import create_app, db
+from app.api import ApiError
+from app.models import Recipe, User
+from app.utils.admission import ADMISSION, TokenBucket
+from app.utils.streaming import ndjson_response
+from tests.conftest import TestConfig
+
+
+class AdmissionConfig(TestConfig):
+    REQUEST_CLASSES = {
+        "read": {"concurrency": 0, "deadline": 5},
+        "search": {"concurrency": 1, "deadline": 5},
+        "write": {"concurrency": 0, "deadline": 5},
+    }
+    ADMISSION_RETRY_AFTER_SECONDS = 2
+    WRITE_RATE_PER_MINUTE = 60
+    WRITE_BURST = 2
+
+
+@pytest.fixture()
+def limited_app():
+    app = create_app(AdmissionConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def test_search_over_limit_is_shed_without_blocking_reads(limited_app):
+    client = limited_app.test_client()
+    search = limited_app.extensions[ADMISSION].semaphores["search"]
+
+    assert search.acquire(blocking=False)  # единственный слот занят «медленным поиском»
+    try:
+        r = client.get("/api/recipes/search?q=сыр")
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "2"
+        assert r.get_json()["error"]["code"] == "OVERLOADED"
+        # чтение ленты — другой класс, его лимит не затронут
+        assert client.get("/api/recipes").status_code == 200
+    finally:
+        search.release()
+
+    assert client.get("/api/recipes/search?q=сыр").status_code == 200
+    # слот возвращён после запроса
+    assert search.acquire(blocking=False)
+    search.release()
+
+
+def test_writes_are_rate_limited_per_client(limited_app):
+    client = limited_app.test_client()
+    creds = {"email": "nobody@x.ru", "password": "123456"}
+    assert [client.post("/api/auth/login", json=creds).status_code for _ in range(2)] == [401, 401]
+
+    r = client.post("/api/auth/login", json=creds)
+    assert r.status_code == 429
+    assert r.get_json()["error"]["code"] == "RATE_LIMITED"
+    assert int(r.headers["Retry-After"]) >= 1
+    # чтение лимитом записи не ограничено
+    assert client.get("/api/recipes").status_code == 200
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=1, burst=2)
+    assert [bucket.take("k", now=0) for _ in range(2)] == [0, 0]
+    assert bucket.take("k", now=0) == pytest.approx(1)
+    assert bucket.take("k", now=0.5) == pytest.approx(0.5)
+    assert bucket.take("k", now=1.6) == 0
+    assert bucket.take("other", now=1.6) == 0
+
+
+def test_deadline_interrupts_sqlite_query(limited_app):
+    slow = text(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) "
+        "SELECT count(*) FROM n"
+    )
+    with limited_app.test_request_context("/api/recipes"):
+        g.deadline = time.monotonic() + 0.05
+        started = time.monotonic()
+        with pytest.raises(ApiError) as e:
+            db.session.execute(slow)
+        assert e.value.code == "DEADLINE_EXCEEDED"
+        assert time.monotonic() - started < 2
+        db.session.rollback()
+
+        # дедлайн уже истёк — запрос не уходит в БД
+        with pytest.raises(ApiError):
+            db.session.execute(text("SELECT 1"))
+        db.session.rollback()
+
+        g.deadline = None
+        assert db.session.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_stream_outlives_read_deadline_with_slow_consumer(limited_app, monkeypatch):
+    monkeypatch.setattr("app.routes.recipes.STREAM_BATCH", 1)
+    monkeypatch.setattr("app.utils.streaming.STREAM_BATCH", 1)
+    monkeypatch.setitem(limited_app.extensions[ADMISSION].classes["read"], "deadline", 0.3)
+    user = User(name="Тест", email="s@s.ru", password_hash="x")
+    db.session.add_all([user] + [Recipe(title=f"Рецепт {i}", author=user) for i in range(30)])
+    db.session.commit()
+
+    client = limited_app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user.id)
+    # с include=ingredients каждая пачка догружает ингредиенты отдельным запросом
+    r = client.get("/api/recipes/mine?include=ingredients", headers={"Accept": "application/x-ndjson"}, buffered=False)
+    lines = []
+    for chunk in r.response:
+        lines.extend(json.loads(line) for line in chunk.decode().splitlines())
+        time.sleep(0.02)  # клиент читает дольше дедлайна чтения
+    r.close()
+    assert len(lines) == 30 and all("error" not in line for line in lines)
+
+
+def test_stream_failure_ends_with_error_line(app):
+    def items():
+        yield {"id": 1}
+        raise ApiError("DEADLINE_EXCEEDED", "Не успели")
+
+    with app.test_request_context(headers={"Accept": "application/x-ndjson"}):
+        body = ndjson_response(items()).get_data(as_text=True)
+    assert [json.loads(line) for line in body.splitlines()] == [
+        {"id": 1}, {"error": {"code": "DEADLINE_EXCEEDED", "message": "Не успели"}},
+    ]
+
+
+def test_anonymous_writes_keyed_by_forwarded_ip_behind_proxy():
+    class ProxiedConfig(AdmissionConfig):
+        TRUSTED_PROXY_HOPS = 1
+
+    app = create_app(ProxiedConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    creds = {"email": "nobody@x.ru", "password": "123456"}
+    for ip in ("10.0.0.1", "10.0.0.2"):
+        # у каждого клиента за прокси своё ведро, хотя remote_addr у всех — адрес прокси
+        codes = [
+            client.post("/api/auth/login", json=creds, headers={"X-Forwarded-For": ip}).status_code
+            for _ in range(3)
+        ]
+        assert codes == [401, 401, 429]
@@ -0,0 +1,174 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("asgiref")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+from app import db  # noqa: E402
+from app.asgi import create_asgi_app  # noqa: E402
+from tests.conftest import TestConfig  # noqa: E402
+
+
+@pytest.fixture()
+def asgi_app(tmp_path):
+    # у async-движка своё соединение, поэтому вместо :memory: нужен файл
+    class AsyncTestConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'asgi.db'}"
+
+    asgi = create_asgi_app(AsyncTestConfig)
+    with asgi.flask_app.app_context():
+        db.create_all()
+    yield asgi
+    with asgi.flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+async def _call(asgi, path, query="", cookie=None, headers=None, response_headers=None):
+    raw_headers = [(b"host", b"localhost")]
+    if cookie:
+        raw_headers.append((b"cookie", cookie.encode()))
+    raw_headers += [(k.encode(), v.encode()) for k, v in (headers or {}).items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": raw_headers,
+        "client": ("127.0.0.1", 1), "server": ("localhost", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi(scope, receive, send)
+    if response_headers is not None:
+        response_headers.update((k.decode(), v.decode()) for k, v in sent[0]["headers"])
+    status = sent[0]["status"]
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    return status, json.loads(body) if body else None
+
+
+def test_async_read_path_matches_sync_api(asgi_app):
+    client = asgi_app.flask_app.test_client()
+    client.post("/api/auth/register", json={"name": "Тест", "email": "a@a.ru", "password": "123456"})
+    ids = []
+    for title in ("Суп", "Салат"):
+        r = client.post("/api/recipes", json={
+            "title": title,
+            "ingredients": [{"name": "Сыр", "quantity": "50 г", "order": 1}],
+            "steps": [{"description": "Шаг", "timer_seconds": 0, "order": 1}],
+            "categories": [{"name": "Быстро"}],
+        })
+        ids.append(r.get_json()["data"]["id"])
+    client.post(f"/api/recipes/{ids[0]}/save")
+    client.post(f"/api/recipes/{ids[0]}/comments", json={"text": "Вкусно"})
+    cookie = f"session={client.get_cookie('session').value}"
+
+    urls = [
+        ("/api/recipes", "page=1&per_page=12"),
+        ("/api/recipes/search", "q=%D1%81%D1%8B%D1%80"),
+        (f"/api/recipes/{ids[0]}", ""),
+        (f"/api/recipes/{ids[0]}/comments", ""),
+        ("/api/challenges", ""),
+        ("/api/recipes/999", ""),
+        ("/api/recipes/search", "q="),
+    ]
+
+    async def run():
+        try:
+            results = [await _call(asgi_app, path, query, cookie) for path, query in urls]
+            # не свой путь — уходит во Flask через WsgiToAsgi
+            results.append(await _call(asgi_app, "/api/auth/user", cookie=cookie))
+            return results
+        finally:
+            await asgi_app.engine.dispose()
+
+    results = asyncio.run(run())
+    for (path, query), (status, body) in zip(urls, results):
+        expected = client.get(f"{path}?{query}")
+        assert status == expected.status_code, path
+        assert body == expected.get_json(), path
+
+    assert results[0][1]["data"]["items"][1]["is_saved"] is True
+
+    # ETag async-пути совпадает с синхронным: кэш клиента не зависит от того, кто ответил
+    etag = client.get("/api/challenges").headers["ETag"]
+    status, _ = asyncio.run(_call(asgi_app, "/api/challenges", headers={"if-none-match": etag}))
+    assert status == 304
+    assert results[-1][1]["data"]["user"]["email"] == "a@a.ru"
+
+
+def test_async_path_applies_admission_limits_and_deadlines(tmp_path):
+    class LimitedConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'limited.db'}"
+        REQUEST_CLASSES = {
+            "read": {"concurrency": 0, "deadline": 0.2},
+            "search": {"concurrency": 1, "deadline": 5},
+        }
+        ADMISSION_RETRY_AFTER_SECONDS = 2
+
+    asgi = create_asgi_app(LimitedConfig)
+    with asgi.flask_app.app_context():
+        db.create_all()
+    search = asgi.admission.semaphores["search"]
+
+    async def slow(session, req, challenge_id):
+        await asyncio.sleep(5)
+
+    asgi.routes = [(p, slow if h == asgi.challenge_detail else h) for p, h in asgi.routes]
+
+    async def run():
+        try:
+            headers = {}
+            assert search.acquire(blocking=False)  # единственный слот поиска занят
+            try:
+                busy = await _call(asgi, "/api/recipes/search", "q=x", response_headers=headers)
+                feed = await _call(asgi, "/api/recipes")
+            finally:
+                search.release()
+            free = await _call(asgi, "/api/recipes/search", "q=x")
+            late = await _call(asgi, "/api/challenges/1")
+            return busy, headers, feed, free, late
+        finally:
+            await asgi.dispose()
+
+    busy, headers, feed, free, late = asyncio.run(run())
+    assert (busy[0], busy[1]["error"]["code"], headers["retry-after"]) == (503, "OVERLOADED", "2")
+    assert feed[0] == 200 and free[0] == 200
+    assert (late[0], late[1]["error"]["code"]) == (503, "DEADLINE_EXCEEDED")
+    assert search.acquire(blocking=False)  # слот возвращён
+
+
+def test_async_path_reads_replica_outside_read_your_writes_window(tmp_path):
+    class ReplicaConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        SQLALCHEMY_BINDS = {"replica_0": f"sqlite:///{tmp_path / 'replica.db'}"}
+        REPLICA_BINDS = ["replica_0"]
+
+    asgi = create_asgi_app(ReplicaConfig)
+    with asgi.flask_app.app_context():
+        db.create_all(bind_key=None)
+        # «реплика» ещё не получила запись: схема та же, данных нет
+        db.metadata.create_all(db.engines["replica_0"])
+    # Flask-SQLAlchemy держит MetaData binds на общем объекте db — не отдаём её следующим тестам
+    db.metadatas.pop("replica_0", None)
+    client = asgi.flask_app.test_client()
+    client.post("/api/auth/register", json={"name": "Тест", "email": "r@r.ru", "password": "123456"})
+    client.post("/api/recipes", json={"title": "Суп", "ingredients": [], "steps": [], "categories": []})
+    cookie = f"session={client.get_cookie('session').value}"
+
+    async def run():
+        try:
+            return await _call(asgi, "/api/recipes", cookie=cookie), await _call(asgi, "/api/recipes")
+        finally:
+            await asgi.dispose()
+
+    own, anonymous = asyncio.run(run())
+    assert own[1]["data"]["total"] == 1  # автор только что писал — читает основную БД
+    assert anonymous[1]["data"]["total"] == 0  # остальные — с реплики
@@ -0,0 +1,60 @@
+from sqlalchemy import create_mock_engine, insert, select
+from sqlalchemy.dialects import postgresql
+
+from app import db
+from app.models import BackfillCheckpoint, Ingredient, Recipe, User
+from app.utils.backfill import run_backfill
+from app.utils.db import insert_ignore, upsert
+
+
+def _ingredients(app, names):
+    user = User(name="u", email="bf@b.ru", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    recipe = Recipe(title="Старый рецепт", author_id=user.id)
+    db.session.add(recipe)
+    db.session.flush()
+    # как после SQL lower() на SQLite: кириллица не приведена к нижнему регистру
+    db.session.execute(insert(Ingredient), [
+        {"recipe_id": recipe.id, "name": n, "name_norm": n.lower() if n.isascii() else n, "order": i}
+        for i, n in enumerate(names, start=1)
+    ])
+    db.session.commit()
+
+
+def test_name_norm_backfill_resumes_from_checkpoint(app):
+    _ingredients(app, ["Мука", "salt", " Сахар ", "ЯЙЦА", "вода"])
+
+    first = run_backfill(db.engine, "ingredient_name_norm", batch_size=2, max_batches=1)
+    assert (first.finished, first.rows_seen, first.rows_changed) == (False, 2, 1)
+
+    # "прерванный" запуск продолжается со следующего ключа, а не с начала
+    rest = run_backfill(db.engine, "ingredient_name_norm", batch_size=2)
+    assert (rest.finished, rest.batches, rest.rows_seen, rest.rows_changed) == (True, 2, 5, 3)
+
+    norms = db.session.execute(select(Ingredient.name_norm).order_by(Ingredient.order)).scalars().all()
+    assert norms == ["мука", "salt", "сахар", "яйца", "вода"]
+    checkpoint = db.session.get(BackfillCheckpoint, "ingredient_name_norm")
+    assert checkpoint.finished_at is not None and checkpoint.last_key == rest.last_key
+
+    assert run_backfill(db.engine, "ingredient_name_norm").batches == 0  # уже сделано
+    again = run_backfill(db.engine, "ingredient_name_norm", restart=True)
+    assert (again.finished, again.rows_seen, again.rows_changed) == (True, 5, 0)
+
+
+def test_backfill_cli_lists_progress(app):
+    runner = app.test_cli_runner()
+    assert "ingredient_name_norm: not started" in runner.invoke(args=["backfill"]).output
+
+    _ingredients(app, ["Мука"])
+    result = runner.invoke(args=["backfill", "ingredient_name_norm"])
+    assert "ingredient_name_norm: done. Batches: 1, seen: 1, changed: 1" in result.output
+    assert "ingredient_name_norm: done, seen 1, changed 1" in runner.invoke(args=["backfill"]).output
+    assert runner.invoke(args=["backfill", "nope"]).exit_code != 0
+
+
+def test_checkpoint_insert_follows_given_connection_dialect(app):
+    # сессия приложения — SQLite, но команда собирается для того соединения, где выполнится
+    pg = create_mock_engine("postgresql://", executor=None)
+    assert isinstance(insert_ignore(BackfillCheckpoint.__table__, bind=pg), postgresql.Insert)
+    assert isinstance(upsert(BackfillCheckpoint.__table__, bind=pg), postgresql.Insert)
@@ -1,5 +1,13 @@
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert
+
 from app import db
-from app.models import Challenge, User
+from app.models import Category, Challenge, ChallengeProgress, CookingEvent, User
+from app.utils.catalog import bump_catalog_version
+from app.utils.leaderboard import ChallengeLeaderboard
 
 
 def test_start_challenge(client, app):
@@ -15,3 +23,290 @@ def test_start_challenge(client, app):
 
     r = client.post(f"/api/challenges/{ch_id}/start")
     assert r.status_code in (200, 201)
+
+
+def test_complete_cooking_updates_matching_progress(client, app):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "k@k.ru", "password": "123456"})
+
+    with app.app_context():
+        sweets = Category(name="Десерты")
+        db.session.add_all([
+            Challenge(title="Любые", duration_days=7, target_count=2),
+            Challenge(title="Курица", duration_days=7, target_count=1, category=Category(name="Курица")),
+            Challenge(title="Сладкое", duration_days=7, target_count=1, category=sweets),
+        ])
+        db.session.commit()
+        ch_ids = [c.id for c in db.session.query(Challenge).order_by(Challenge.id)]
+
+    for ch_id in ch_ids:
+        client.post(f"/api/challenges/{ch_id}/start")
+
+    r = client.post("/api/recipes", json={
+        "title": "Торт",
+        "ingredients": [{"name": "Мука", "quantity": "200 г", "order": 1}],
+        "steps": [{"description": "Испечь", "timer_seconds": 0, "order": 1}],
+        "categories": [{"name": "Десерты"}],
+    })
+    recipe_id = r.get_json()["data"]["id"]
+
+    data = client.post(f"/api/cooking/complete/{recipe_id}").get_json()["data"]
+    assert data["progress_updated"] == 2  # "Любые" + "Сладкое"
+    assert data["challenges_completed"] == 1
+
+    data = client.post(f"/api/cooking/complete/{recipe_id}").get_json()["data"]
+    assert data["progress_updated"] == 1
+    assert data["challenges_completed"] == 1
+
+    with app.app_context():
+        assert db.session.query(CookingEvent).filter_by(recipe_id=recipe_id).count() == 2
+
+
+def test_complete_cooking_replay_with_client_event_id_counts_once(client, app):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "o@o.ru", "password": "123456"})
+    with app.app_context():
+        db.session.add(Challenge(title="Любые", duration_days=7, target_count=5))
+        db.session.commit()
+        ch_id = db.session.query(Challenge.id).scalar()
+    client.post(f"/api/challenges/{ch_id}/start")
+    recipe_id = client.post("/api/recipes", json={
+        "title": "Суп",
+        "ingredients": [{"name": "Вода", "quantity": "1 л", "order": 1}],
+        "steps": [{"description": "Сварить", "timer_seconds": 0, "order": 1}],
+        "categories": [],
+    }).get_json()["data"]["id"]
+
+    # офлайн-очередь повторяет запрос, ответ на который не дошёл
+    for _ in range(2):
+        r = client.post(f"/api/cooking/complete/{recipe_id}", json={"client_event_id": "evt-1"})
+        assert r.status_code == 200
+    assert r.get_json()["data"]["progress_updated"] == 0
+    client.post(f"/api/cooking/complete/{recipe_id}", json={"client_event_id": "evt-2"})
+
+    with app.app_context():
+        assert db.session.query(CookingEvent).filter_by(recipe_id=recipe_id).count() == 2
+        assert db.session.query(ChallengeProgress.completed_count).scalar() == 2
+
+
+def test_list_challenges_etag_revalidation(client, app):
+    with app.app_context():
+        db.session.add(Challenge(title="Неделя супов", duration_days=7, target_count=3))
+        db.session.commit()
+
+    r = client.get("/api/challenges")
+    etag = r.headers["ETag"]
+    assert r.headers["Cache-Control"] == "private, no-cache"
+
+    r = client.get("/api/challenges", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.data == b""
+
+    db.session.add(Challenge(title="Неделя каш", duration_days=7, target_count=3))
+    db.session.commit()
+    r = client.get("/api/challenges", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+    items = client.get("/api/challenges?fields=title").get_json()["data"]["items"]
+    assert [set(c) for c in items] == [{"id", "title"}] * 2
+    assert {c["title"] for c in items} == {"Неделя супов", "Неделя каш"}
+
+
+def test_leaderboard_and_my_rank(client, app):
+    with app.app_context():
+        ch = Challenge(title="Гонка", duration_days=7, target_count=3)
+        db.session.add(ch)
+        db.session.commit()
+        ch_id = ch.id
+
+    client.post("/api/auth/register", json={"name": "Первый", "email": "a@a.ru", "password": "123456"})
+    client.post(f"/api/challenges/{ch_id}/start")
+    client.post(f"/api/challenges/{ch_id}/progress", json={"delta": 1})
+    client.post("/api/auth/logout")
+
+    client.post("/api/auth/register", json={"name": "Второй", "email": "b@b.ru", "password": "123456"})
+    client.post(f"/api/challenges/{ch_id}/start")
+    client.post(f"/api/challenges/{ch_id}/progress", json={"delta": 2})
+
+    data = client.get(f"/api/challenges/{ch_id}/leaderboard?limit=1&window=1").get_json()["data"]
+    assert data["participants"] == 2
+    assert [e["user"]["name"] for e in data["items"]] == ["Второй"]
+    assert data["my_rank"] == 1
+    assert [e["rank"] for e in data["around_me"]] == [1, 2]
+
+    items = client.get("/api/challenges/my").get_json()["data"]["items"]
+    assert items[0]["rank"] == 1 and items[0]["participants"] == 2
+
+
+def test_expire_challenges_sweeper(client, app):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "e@e.ru", "password": "123456"})
+
+    with app.app_context():
+        db.session.add_all([
+            Challenge(title="Короткий", duration_days=1, target_count=5),
+            Challenge(title="Длинный", duration_days=30, target_count=5),
+        ])
+        db.session.commit()
+        short_id, long_id = [c.id for c in db.session.query(Challenge).order_by(Challenge.id)]
+
+    client.post(f"/api/challenges/{short_id}/start")
+    client.post(f"/api/challenges/{long_id}/start")
+
+    with app.app_context():
+        p = db.session.query(ChallengeProgress).filter_by(challenge_id=short_id).one()
+        p.started_at = datetime.utcnow() - timedelta(days=2)
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["expire-challenges", "--batch-size", "1"])
+    assert "Expired: 1" in result.output
+
+    items = client.get("/api/challenges/my").get_json()["data"]["items"]
+    assert [i["challenge"]["id"] for i in items] == [long_id]
+
+    r = client.post(f"/api/challenges/{short_id}/progress", json={"delta": 1})
+    assert r.status_code == 409
+
+
+def test_challenge_catalog_reloads_on_version_bump(client, app):
+    with app.app_context():
+        db.session.add(Challenge(title="Первый", duration_days=7, target_count=1))
+        db.session.commit()
+
+    assert [c["title"] for c in client.get("/api/challenges").get_json()["data"]["items"]] == ["Первый"]
+
+    # запись в обход ORM (как из другого процесса) без сдвига версии кэш не видит
+    db.session.execute(insert(Challenge).values(title="Второй", duration_days=7, target_count=1))
+    db.session.commit()
+    assert [c["title"] for c in client.get("/api/challenges").get_json()["data"]["items"]] == ["Первый"]
+
+    bump_catalog_version()
+    db.session.commit()
+    assert [c["title"] for c in client.get("/api/challenges").get_json()["data"]["items"]] == ["Второй", "Первый"]
+
+
+def test_challenge_catalog_counters_and_my_progress(client, app):
+    with app.app_context():
+        # прогресс вставляется напрямую, мимо API, поэтому счётчики задаём так, как их оставил бы API
+        ch = Challenge(title="Счётчики", duration_days=7, target_count=2, participants_count=3, completions_count=1)
+        db.session.add(ch)
+        db.session.flush()
+        now = datetime.utcnow()
+        db.session.execute(insert(User), [
+            {"id": 100 + i, "name": f"U{i}", "email": f"u{i}@s.ru", "password_hash": "x", "created_at": now}
+            for i in range(3)
+        ])
+        db.session.execute(insert(ChallengeProgress), [
+            {"user_id": 100 + i, "challenge_id": ch.id, "completed_count": 2 if i == 0 else 0,
+             "started_at": now, "completed_at": now if i == 0 else None}
+            for i in range(3)
+        ])
+        db.session.commit()
+        ch_id = ch.id
+
+    [item] = client.get("/api/challenges").get_json()["data"]["items"]
+    assert (item["participants"], item["completions"], item["my_progress"]) == (3, 1, None)
+
+    client.post("/api/auth/register", json={"name": "Тест", "email": "s@s.ru", "password": "123456"})
+    client.post(f"/api/challenges/{ch_id}/start")
+    item = client.get(f"/api/challenges/{ch_id}").get_json()["data"]
+    assert (item["participants"], item["completions"]) == (4, 1)
+    assert (item["my_progress"]["completed_count"], item["my_progress"]["is_completed"]) == (0, False)
+
+    client.post(f"/api/challenges/{ch_id}/progress", json={"delta": 2})
+    [item] = client.get("/api/challenges").get_json()["data"]["items"]
+    assert (item["participants"], item["completions"]) == (4, 2)
+    assert item["my_progress"]["is_completed"] is True
+
+    [item] = client.get("/api/challenges?fields=title").get_json()["data"]["items"]
+    assert item == {"id": ch_id, "title": "Счётчики"}
+
+
+def test_leaderboard_reads_consistent_while_updated():
+    start = datetime(2026, 1, 1)
+    Row = namedtuple("Row", "user_id completed_count started_at completed_at")
+    board = ChallengeLeaderboard(1, [Row(u, u % 5, start, None) for u in range(200)])
+    stop, errors = threading.Event(), []
+
+    def read():
+        while not stop.is_set():
+            try:
+                entries = board.top(200)
+                assert len(entries) == 200
+                assert [e["rank"] for e in entries] == sorted(e["rank"] for e in entries)
+                board.around(7, 3)
+                board.rank_of(7)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for t in readers:
+        t.start()
+    for i in range(2000):
+        board.upsert(i % 200, i % 7, start, None)
+    stop.set()
+    for t in readers:
+        t.join()
+    assert errors == []
+
+
+def test_cooking_does_not_count_for_overdue_progress_before_sweep(client, app):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "o@o.ru", "password": "123456"})
+    with app.app_context():
+        db.session.add_all([
+            Challenge(title="Просрочен", duration_days=1, target_count=1),
+            Challenge(title="Идёт", duration_days=1, target_count=5),
+            Challenge(title="Бессрочный", duration_days=None, target_count=5),
+        ])
+        db.session.commit()
+        overdue_id, running_id, open_id = [c.id for c in db.session.query(Challenge).order_by(Challenge.id)]
+    for ch_id in (overdue_id, running_id, open_id):
+        client.post(f"/api/challenges/{ch_id}/start")
+    with app.app_context():
+        p = db.session.query(ChallengeProgress).filter_by(challenge_id=overdue_id).one()
+        p.started_at = datetime.utcnow() - timedelta(days=1, minutes=1)
+        db.session.commit()
+
+    recipe_id = client.post(
+        "/api/recipes", json={"title": "Суп", "ingredients": [], "steps": [], "categories": []}
+    ).get_json()["data"]["id"]
+    # sweeper не запускался: expired_at пуст, но срок уже вышел
+    data = client.post(f"/api/cooking/complete/{recipe_id}").get_json()["data"]
+    assert (data["progress_updated"], data["challenges_completed"]) == (2, 0)
+
+    with app.app_context():
+        p = db.session.query(ChallengeProgress).filter_by(challenge_id=overdue_id).one()
+        assert (p.completed_count, p.completed_at) == (0, None)
+
+
+def test_challenge_counters_maintained_without_scanning_progress(client, app):
+    app.config["CHALLENGE_STATS_TTL_SECONDS"] = 0
+    with app.app_context():
+        ch = Challenge(title="Инкремент", target_count=1)
+        db.session.add(ch)
+        db.session.commit()
+        ch_id = ch.id
+
+    client.post("/api/auth/register", json={"name": "Тест", "email": "c@c.ru", "password": "123456"})
+    client.post(f"/api/challenges/{ch_id}/start")
+    client.post(f"/api/challenges/{ch_id}/start")  # повторный старт не считается вторым участником
+    client.post(f"/api/challenges/{ch_id}/progress", json={"delta": 1})
+
+    with app.app_context():
+        row = db.session.get(Challenge, ch_id)
+        assert (row.participants_count, row.completions_count) == (1, 1)
+
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client.post("/api/auth/logout")
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", on_execute)
+        try:
+            [item] = client.get("/api/challenges").get_json()["data"]["items"]
+        finally:
+            event.remove(db.engine, "before_cursor_execute", on_execute)
+
+    assert (item["participants"], item["completions"]) == (1, 1)
+    assert not [s for s in statements if "challenge_progress" in s]
@@ -1,3 +1,15 @@
+import json
+import queue
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import Comment
+from app.routes.comments import _stream
+from app.utils.comment_stream import Event, comment_broker
+from tests.conftest import TestConfig
+
+
 def test_add_comment_requires_auth(client):
     r = client.post("/api/recipes/1/comments", json={"text": "hi"})
     assert r.status_code == 401  # unauthorized
@@ -22,3 +34,177 @@ def test_add_and_list_comments(client):
     items = r.get_json()["data"]["items"]
     assert len(items) == 1
     assert "<" not in items[0]["text"]  # теги должны быть вычищены
+
+
+def _read_events(stream, count, limit=200):
+    events = []
+    for chunk in stream:
+        chunk = chunk.decode()
+        if chunk.startswith("id:"):
+            fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+            events.append((fields["event"], json.loads(fields["data"])))
+            if len(events) == count:
+                return events
+        limit -= 1
+        assert limit, "событие не пришло"
+    return events
+
+
+def test_comment_stream_resumes_and_pushes_new_comments(tmp_path):
+    # поток брокера ходит в БД параллельно с тестом — нужен файл, а не общий :memory:
+    class StreamConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'stream.db'}"
+        SSE_HEARTBEAT_SECONDS = 0.05
+        SSE_MAX_CONNECTIONS = 1
+
+    app = create_app(StreamConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post("/api/auth/register", json={"name": "Тест", "email": "s@s.ru", "password": "123456"})
+    recipe_id = client.post("/api/recipes", json={
+        "title": "Рецепт",
+        "ingredients": [{"name": "Яйца", "quantity": "2", "order": 1}],
+        "steps": [{"description": "Шаг", "timer_seconds": 0, "order": 1}],
+        "categories": [],
+    }).get_json()["data"]["id"]
+
+    first = client.post(f"/api/recipes/{recipe_id}/comments", json={"text": "Первый"}).get_json()["data"]
+    last_event_id = client.get(f"/api/recipes/{recipe_id}/comments").get_json()["data"]["last_event_id"]
+    second = client.post(f"/api/recipes/{recipe_id}/comments", json={"text": "Второй"}).get_json()["data"]
+    client.delete(f"/api/comments/{first['id']}")
+
+    r = client.get(
+        f"/api/recipes/{recipe_id}/comments/stream",
+        headers={"Last-Event-ID": str(last_event_id)},
+        buffered=False,
+    )
+    assert r.mimetype == "text/event-stream"
+    stream = iter(r.response)
+    # пропущенное после Last-Event-ID
+    assert _read_events(stream, 2) == [("comment_created", second), ("comment_deleted", {"id": first["id"]})]
+
+    busy = client.get(f"/api/recipes/{recipe_id}/comments/stream")
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"]
+
+    third = client.post(f"/api/recipes/{recipe_id}/comments", json={"text": "Третий"}).get_json()["data"]
+    assert _read_events(stream, 1) == [("comment_created", third)]
+
+    r.close()
+    assert app.extensions["comment_broker"].connections == 0
+
+
+def test_comments_stream_ndjson_without_holding_objects(client, monkeypatch):
+    monkeypatch.setattr("app.routes.comments.STREAM_BATCH", 2)
+    client.post("/api/auth/register", json={"name": "Тест", "email": "n@n.ru", "password": "123456"})
+    r = client.post("/api/recipes", json={"title": "Рецепт", "ingredients": [], "steps": [], "categories": []})
+    recipe_id = r.get_json()["data"]["id"]
+    for i in range(5):
+        client.post(f"/api/recipes/{recipe_id}/comments", json={"text": f"Комментарий {i}"})
+
+    data = client.get(f"/api/recipes/{recipe_id}/comments").get_json()["data"]
+    db.session.expunge_all()
+    r = client.get(f"/api/recipes/{recipe_id}/comments", headers={"Accept": "application/x-ndjson"})
+    assert r.mimetype == "application/x-ndjson"
+    assert int(r.headers["X-Last-Event-Id"]) == data["last_event_id"]
+    assert [json.loads(line) for line in r.get_data(as_text=True).splitlines()] == data["items"]
+    # каждая пачка отпущена после сериализации
+    assert not [obj for obj in db.session if isinstance(obj, Comment)]
+
+
+def test_broker_rereads_tail_after_idle(tmp_path):
+    class StreamConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'idle.db'}"
+        SSE_POLL_INTERVAL_SECONDS = 0.01
+
+    app = create_app(StreamConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post("/api/auth/register", json={"name": "Тест", "email": "i@i.ru", "password": "123456"})
+    recipe_id = client.post(
+        "/api/recipes", json={"title": "Рецепт", "ingredients": [], "steps": [], "categories": []}
+    ).get_json()["data"]["id"]
+
+    with app.app_context():
+        broker = comment_broker()
+        q = broker.subscribe(recipe_id)
+        thread = broker._thread
+        broker.unsubscribe(recipe_id, q)
+        thread.join(timeout=5)
+        assert broker._thread is None and broker._last_id is None
+
+        # события, пока подписчиков нет
+        for i in range(3):
+            client.post(f"/api/recipes/{recipe_id}/comments", json={"text": f"Комментарий {i}"})
+        q = broker.subscribe(recipe_id)
+        try:
+            broker.poll()
+            assert q.empty()  # пропущенное достаётся через backlog, а не живыми событиями
+            assert [e.id for e in broker.backlog(recipe_id, 1)] == [2, 3]
+        finally:
+            broker.unsubscribe(recipe_id, q)
+
+
+def test_stream_skips_live_events_up_to_last_event_id():
+    class Broker:
+        def unsubscribe(self, recipe_id, q):
+            pass
+
+    q = queue.Queue()
+    for i in (2, 3, 4):
+        q.put(Event(i, 1, "created", "{}"))
+    config = {"SSE_RETRY_MS": 1000, "SSE_STREAM_MAX_SECONDS": 0.2, "SSE_HEARTBEAT_SECONDS": 0.05}
+    chunks = list(_stream(Broker(), 1, q, 3, [], config))
+    assert [c.split("\n")[0] for c in chunks if c.startswith("id:")] == ["id: 4"]
+
+
+def test_comments_stream_checks_recipe_without_loading_children(client, monkeypatch):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "q@q.ru", "password": "123456"})
+    recipe_id = client.post("/api/recipes", json={
+        "title": "Рецепт",
+        "ingredients": [{"name": "Яйца", "order": 1}],
+        "steps": [{"description": "Шаг", "timer_seconds": 0, "order": 1}],
+        "categories": [],
+    }).get_json()["data"]["id"]
+    for i in range(3):
+        client.post(f"/api/recipes/{recipe_id}/comments", json={"text": f"Комментарий {i}"})
+    db.session.expunge_all()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        r = client.get(
+            f"/api/recipes/{recipe_id}/comments", headers={"Accept": "application/x-ndjson"}, buffered=False
+        )
+        first = next(iter(r.response))
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+        r.close()
+    assert json.loads(first.splitlines()[0])["text"] == "Комментарий 0"
+    # проверка рецепта, last_event_id и сам поток — без комментариев, ингредиентов и шагов в памяти
+    assert len(statements) == 3, statements
+    assert not [s for s in statements if "FROM ingredients" in s or "FROM steps" in s]
+
+
+def test_add_comment_does_not_load_recipe_children(client):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "w@w.ru", "password": "123456"})
+    recipe_id = client.post("/api/recipes", json={
+        "title": "Рецепт",
+        "ingredients": [{"name": "Яйца", "order": 1}],
+        "steps": [{"description": "Шаг", "timer_seconds": 0, "order": 1}],
+        "categories": [],
+    }).get_json()["data"]["id"]
+    db.session.expunge_all()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        assert client.post(f"/api/recipes/{recipe_id}/comments", json={"text": "Вкусно"}).status_code == 201
+        assert client.post("/api/recipes/999999/comments", json={"text": "Вкусно"}).status_code == 404
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert not [s for s in statements if "FROM ingredients" in s or "FROM steps" in s or "FROM comments" in s]
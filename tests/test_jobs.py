@@ -0,0 +1,111 @@
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+from sqlalchemy import select, update
+
+from app import create_app, db
+from app.models import Job
+from app.utils.jobs import claim, enqueue, task, work
+from tests.conftest import TestConfig
+
+
+CALLS = []
+
+
+@task(name="test_record", max_attempts=2)
+def _record(value):
+    CALLS.append(value)
+
+
+@task(name="test_explode", max_attempts=2)
+def _explode():
+    raise ValueError("boom")
+
+
+@pytest.fixture()
+def jobs_app(tmp_path):
+    # потоки воркера ходят в БД своими соединениями — нужен файл, а не общий :memory:
+    class JobsConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'jobs.db'}"
+        UPLOAD_FOLDER = str(tmp_path / "uploads")
+        JOB_RETRY_BASE_SECONDS = 0
+
+    app = create_app(JobsConfig)
+    with app.app_context():
+        db.create_all()
+    CALLS.clear()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _jobs(app):
+    with app.app_context():
+        return db.session.execute(select(Job).order_by(Job.id)).scalars().all()
+
+
+def test_enqueue_is_transactional_and_idempotent(jobs_app):
+    with jobs_app.app_context():
+        enqueue("test_record", {"value": "rolled back"})
+        db.session.rollback()
+
+        enqueue("test_record", {"value": "once"}, idempotency_key="k1")
+        enqueue("test_record", {"value": "twice"}, idempotency_key="k1")
+        enqueue("test_record", {"value": "later"}, delay=3600)
+        db.session.commit()
+
+    work(jobs_app, {"default": 2}, burst=True)
+
+    assert CALLS == ["once"]
+    assert [(j.status, j.attempts) for j in _jobs(jobs_app)] == [("done", 1), ("queued", 0)]
+
+
+def test_failed_job_is_retried_then_marked_failed(jobs_app):
+    with jobs_app.app_context():
+        enqueue("test_explode")
+        db.session.commit()
+
+    work(jobs_app, {"default": 1}, burst=True)
+
+    [job] = _jobs(jobs_app)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert job.last_error == "ValueError: boom"
+
+
+def test_expired_lease_is_reclaimed(jobs_app):
+    with jobs_app.app_context():
+        enqueue("test_record", {"value": "x"})
+        db.session.commit()
+        [row] = claim("default", "crashed-worker")
+        assert claim("default", "other") == []  # пока аренда действует, задачу никто не берёт
+
+        db.session.execute(update(Job).values(locked_until=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+        [again] = claim("default", "other")
+        assert (again.id, again.attempts) == (row.id, 2)
+
+
+def test_uploaded_image_is_optimized_in_background(jobs_app):
+    client = jobs_app.test_client()
+    client.post("/api/auth/register", json={"name": "Тест", "email": "j@j.ru", "password": "123456"})
+
+    buf = io.BytesIO()
+    Image.new("RGB", (2400, 600), "red").save(buf, format="PNG")
+    r = client.post("/api/uploads/image", data={"file": (io.BytesIO(buf.getvalue()), "big.png")})
+    assert r.status_code == 201
+    path = os.path.join(jobs_app.config["UPLOAD_FOLDER"], r.get_json()["data"]["url"].rsplit("/", 1)[1])
+
+    # запрос картинку не трогает — только сохраняет и ставит задачу
+    with Image.open(path) as img:
+        assert img.size == (2400, 600)
+    assert [(j.name, j.queue) for j in _jobs(jobs_app)] == [("optimize_image", "images")]
+
+    work(jobs_app, {"images": 1}, burst=True)
+    with Image.open(path) as img:
+        assert img.size == (1200, 300)
+
+    r = client.post("/api/uploads/image", data={"file": (io.BytesIO(b"not an image"), "x.png")})
+    assert r.status_code == 400
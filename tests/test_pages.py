@@ -0,0 +1,14 @@
+def test_service_worker_served_from_root_with_asset_version(client):
+    r = client.get("/sw.js")
+    assert r.status_code == 200
+    assert r.mimetype in ("text/javascript", "application/javascript")
+    assert r.headers["Service-Worker-Allowed"] == "/"
+    assert r.headers["Cache-Control"] == "no-cache"
+
+    page = client.get("/").get_data(as_text=True)
+    assert 'register("/sw.js?v=' in page
+
+
+def test_csrf_token_can_be_refreshed(client):
+    token = client.get("/api/auth/csrf").get_json()["data"]["csrf_token"]
+    assert token
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import insert, select
+
+from app import db
+from app.models import Ingredient, Recipe, User
+from app.utils.quantities import format_canonical, parse_quantity, scale_quantity
+
+
+@pytest.mark.parametrize("text, amount, unit, family", [
+    ("200 г", 200, "г", "mass"),
+    ("1,5 кг", 1500, "г", "mass"),
+    ("1/2 стакана", 125, "мл", "volume"),
+    ("1 1/2 ст.л.", 22.5, "мл", "volume"),
+    ("2 ст. ложки", 30, "мл", "volume"),
+    ("½ ч.л.", 2.5, "мл", "volume"),
+    ("2-3 шт", 3, "шт", "count"),
+    ("2", 2, "шт", "count"),
+    ("3 зубчика", 3, "зубчик", "count"),
+])
+def test_parse_quantity(text, amount, unit, family):
+    q = parse_quantity(text)
+    assert (q.amount, q.unit, q.family) == (pytest.approx(amount), unit, family)
+
+
+@pytest.mark.parametrize("text", [None, "", "по вкусу", "щепотка соли", "2 горсти"])
+def test_unparsed_quantity(text):
+    assert parse_quantity(text) is None
+
+
+def test_scale_and_format():
+    assert scale_quantity("2 ст. ложки", 1.5) == "3 ст.л."
+    assert scale_quantity("1/2 стакана", 2) == "1 стак."
+    assert scale_quantity("по вкусу", 2) == "по вкусу"
+    # диапазон — с обеих сторон, штуки округляются
+    assert scale_quantity("2-3 шт", 1.5) == "3-5 шт"
+    assert scale_quantity("100-150 г", 0.5) == "50-75 г"
+    assert scale_quantity("3 зубчика", 0.5) == "2 зубч."
+    assert scale_quantity("1 шт", 0.3) == "0,5 шт"
+    assert scale_quantity("1-2 шт", 0.25) == "0,5 шт"
+    assert format_canonical(1500, "г") == "1,5 кг"
+    assert format_canonical(250, "мл") == "250 мл"
+
+
+def test_backfill_quantities(app):
+    user = User(name="u", email="b@b.ru", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    recipe = Recipe(title="Старый рецепт", author_id=user.id)
+    db.session.add(recipe)
+    db.session.flush()
+    # строки до миграции: только текст
+    db.session.execute(insert(Ingredient), [
+        {"recipe_id": recipe.id, "name": n, "name_norm": n, "quantity": q, "order": i}
+        for i, (n, q) in enumerate([("мука", "1 кг"), ("соль", "по вкусу"), ("вода", None)], start=1)
+    ])
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["backfill", "ingredient_quantities", "--batch-size", "2"])
+    assert "done. Batches: 2, seen: 2, changed: 1" in result.output, result.output
+
+    rows = db.session.execute(
+        select(Ingredient.name, Ingredient.amount, Ingredient.unit).order_by(Ingredient.order)
+    ).all()
+    assert [tuple(r) for r in rows] == [("мука", 1000, "г"), ("соль", None, None), ("вода", None, None)]
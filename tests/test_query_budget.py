@@ -0,0 +1,267 @@
+"""
+Регрессионный харнесс для горячих эндпоинтов.
+
+На сгенерированном датасете каждый эндпоинт должен уложиться в бюджет SQL-запросов,
+а для каждого запроса снимается план (EXPLAIN QUERY PLAN / EXPLAIN) и проверяется,
+что горячие запросы не скатываются в полный скан таблицы.
+
+По умолчанию гоняется на SQLite. Для Postgres задайте COOKFLOW_TEST_POSTGRES_URL
+(пустая БД, таблицы создаются и удаляются тестом).
+"""
+import json
+import os
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, insert
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.models import (
+    Category,
+    Challenge,
+    ChallengeProgress,
+    Comment,
+    Ingredient,
+    IngredientTerm,
+    Recipe,
+    RecipeStep,
+    User,
+    recipe_category,
+    user_saved_recipe,
+)
+from app.utils.suggest import suggest_store
+from app.utils.terms import term_key
+from tests.conftest import TestConfig
+
+
+N_USERS = 40
+N_RECIPES = 400
+N_CATEGORIES = 8
+N_CHALLENGES = 6
+
+# маленькие справочники: полный скан дешевле индекса и не растёт вместе с пользователями
+SMALL_TABLES = {"categories", "challenges"}
+
+# name: (method, url, бюджет запросов, таблицы, которые этому эндпоинту разрешено сканировать)
+ENDPOINTS = {
+    # count(*) для пагинации по определению читает всю ленту.
+    # Списки — один Core-запрос на карточки (+ пользователь сессии и версия справочника)
+    "get_all_recipes": ("GET", "/api/recipes?page=3&per_page=12", 4, {"recipes"}),
+    "get_recipe_by_id": ("GET", "/api/recipes/9", 8, set()),
+    # без категорий, автора и is_saved: ни join, ни запросов на страницу
+    "recipe_cards_sparse": ("GET", "/api/recipes?page=3&per_page=12&fields=id,title,image_url", 2, {"recipes"}),
+    "recipe_steps_only": ("GET", "/api/recipes/9?fields=id&include=steps", 2, set()),
+    # подстрока (LIKE '%..%') ищется по маленькому словарю терминов, ингредиенты — по term_id
+    "search_by_ingredients": ("GET", "/api/recipes/search?q=сыр", 3, {"ingredient_terms"}),
+    "my_authored_recipes": ("GET", "/api/recipes/mine", 3, set()),
+    "my_saved_recipes": ("GET", "/api/recipes/my", 3, set()),
+    # список покупок — один GROUP BY по ингредиентам избранного
+    "shopping_list": ("GET", "/api/recipes/shopping-list?saved=1&servings=4", 2, set()),
+    "get_comments": ("GET", "/api/recipes/9/comments", 6, set()),
+    # справочник и счётчики челленджей в памяти: сверка версии + свой прогресс по user_id
+    # (+ пользователь сессии); от числа участников не зависит
+    "list_challenges": ("GET", "/api/challenges", 3, set()),
+    "list_challenges_catalog_only": ("GET", "/api/challenges?fields=id,title", 1, set()),
+    "my_challenges": ("GET", "/api/challenges/my", 6, set()),
+    "complete_cooking": ("POST", "/api/cooking/complete/9", 4, set()),
+    # одна вставка ON CONFLICT DO NOTHING RETURNING (+ пользователь сессии, версия справочника)
+    "save_recipe": ("POST", "/api/recipes/300/save", 2, set()),
+    # повторный старт: вставка ничего не вернула — дочитываем свою строку, без rollback
+    "start_challenge": ("POST", "/api/challenges/1/start", 4, set()),
+    # подсказки — из индекса в памяти воркера, построенного при прогреве
+    "suggest_ingredient": ("GET", "/api/suggest?kind=ingredient&prefix=с", 0, set()),
+    "suggest_title": ("GET", "/api/suggest?kind=title&prefix=рецепт 1", 0, set()),
+}
+
+
+def _backends():
+    params = ["sqlite"]
+    if os.environ.get("COOKFLOW_TEST_POSTGRES_URL"):
+        params.append("postgresql")
+    return params
+
+
+def _seed() -> None:
+    now = datetime.utcnow()
+    stub_hash = generate_password_hash("123456")
+
+    db.session.execute(insert(User), [
+        {"id": u, "name": f"Пользователь {u}", "email": f"u{u}@perf.local", "password_hash": stub_hash, "created_at": now}
+        for u in range(1, N_USERS + 1)
+    ])
+    db.session.execute(insert(Category), [
+        {"id": c, "name": f"Категория {c}", "slug": f"cat-{c}"} for c in range(1, N_CATEGORIES + 1)
+    ])
+    db.session.execute(insert(Recipe), [
+        {
+            "id": r, "title": f"Рецепт {r}", "author_id": r % N_USERS + 1, "cooking_time": 10 + r % 50,
+            "difficulty": "Легко", "servings": 2, "created_at": now, "updated_at": now,
+        }
+        for r in range(1, N_RECIPES + 1)
+    ])
+    names = ["Сыр", "Курица", "Мука", "Яйца", "Молоко", "Соль"]
+    db.session.execute(insert(IngredientTerm), [
+        {"id": t, "key": term_key(name), "name": name} for t, name in enumerate(names, start=1)
+    ])
+    db.session.execute(insert(Ingredient), [
+        {"recipe_id": r, "name": names[(r + i) % len(names)], "name_norm": names[(r + i) % len(names)].lower(),
+         "term_id": (r + i) % len(names) + 1, "quantity": "100 г", "order": i + 1}
+        for r in range(1, N_RECIPES + 1) for i in range(4)
+    ])
+    db.session.execute(insert(RecipeStep), [
+        {"recipe_id": r, "order": i + 1, "description": f"Шаг {i + 1}", "timer_seconds": 60 * i}
+        for r in range(1, N_RECIPES + 1) for i in range(3)
+    ])
+    db.session.execute(insert(recipe_category), [
+        {"recipe_id": r, "category_id": (r + k) % N_CATEGORIES + 1}
+        for r in range(1, N_RECIPES + 1) for k in range(2)
+    ])
+    db.session.execute(insert(Comment), [
+        {"recipe_id": r, "user_id": (r + k) % N_USERS + 1, "text": f"Комментарий {k}", "created_at": now}
+        for r in range(1, N_RECIPES + 1, 4) for k in range(3)
+    ])
+    db.session.execute(insert(user_saved_recipe), [
+        {"user_id": u, "recipe_id": (u * 7 + k) % N_RECIPES + 1, "saved_at": now}
+        for u in range(1, N_USERS + 1) for k in range(10)
+    ])
+    db.session.execute(insert(Challenge), [
+        {"id": ch, "title": f"Челлендж {ch}", "duration_days": 30, "target_count": 5,
+         "category_id": None if ch == 1 else ch % N_CATEGORIES + 1}
+        for ch in range(1, N_CHALLENGES + 1)
+    ])
+    db.session.execute(insert(ChallengeProgress), [
+        {"user_id": u, "challenge_id": ch, "completed_count": (u + ch) % 4, "started_at": now}
+        for u in range(1, N_USERS + 1) for ch in range(1, N_CHALLENGES + 1) if (u + ch) % 2 == 0
+    ])
+    db.session.commit()
+
+
+@pytest.fixture(scope="module", params=_backends())
+def perf_app(request):
+    class PerfConfig(TestConfig):
+        if request.param == "postgresql":
+            SQLALCHEMY_DATABASE_URI = os.environ["COOKFLOW_TEST_POSTGRES_URL"]
+
+    app = create_app(PerfConfig)
+    with app.app_context():
+        db.create_all()
+        _seed()
+        engine = db.engine
+
+    # меряем установившийся режим: справочник категорий/челленджей и подсказки уже в памяти воркера
+    assert app.test_client().get("/api/challenges").status_code == 200
+    with app.app_context():
+        suggest_store(app).load()
+
+    # каждый запрос получает свой app context и свою сессию, как в проде
+    yield app, engine
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+class _Recorder:
+    def __init__(self, engine):
+        self.statements = []
+        self.active = False
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active:
+            self.statements.append((statement, parameters, executemany))
+
+
+def _table_name(name: str, tables: set) -> str | None:
+    # SQLite печатает алиасы (challenges_1) — сводим их к имени таблицы
+    if name in tables:
+        return name
+    base = re.sub(r"_\d+$", "", name)
+    return base if base in tables else None
+
+
+def _sqlite_full_scans(conn, statement, parameters, tables):
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    scans = []
+    for row in rows:
+        detail = row[-1]
+        m = re.match(r"SCAN (\S+)(.*)$", detail)
+        if not m:
+            continue
+        table = _table_name(m.group(1), tables)
+        if not table:
+            continue
+        # обход индекса в нужном порядке под LIMIT — это top-N, а не полный скан
+        if "USING" in m.group(2) and re.search(r"\bLIMIT\b", statement):
+            continue
+        scans.append((table, detail))
+    return scans
+
+
+def _postgres_full_scans(conn, statement, parameters, tables):
+    with conn.begin():
+        # на маленьком датасете Postgres честно выбирает Seq Scan; выключаем его,
+        # чтобы Seq Scan остался только там, где подходящего индекса нет вообще
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans = []
+    stack = [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in tables:
+            scans.append((node["Relation Name"], "Seq Scan"))
+        stack.extend(node.get("Plans", []))
+    return scans
+
+
+def _explain_full_scans(engine, statements):
+    tables = set(db.metadata.tables)
+    finder = _postgres_full_scans if engine.dialect.name == "postgresql" else _sqlite_full_scans
+    found = []
+    with engine.connect() as conn:
+        for statement, parameters, executemany in statements:
+            if executemany or not re.match(r"\s*(SELECT|UPDATE|DELETE)\b", statement, re.I):
+                continue
+            for table, detail in finder(conn, statement, parameters, tables):
+                found.append((table, detail, statement))
+    return found
+
+
+@pytest.mark.parametrize("name", list(ENDPOINTS))
+def test_endpoint_query_budget_and_plans(perf_app, name):
+    app, engine = perf_app
+    method, url, budget, allowed_scans = ENDPOINTS[name]
+
+    client = app.test_client()
+    r = client.post("/api/auth/login", json={"email": "u1@perf.local", "password": "123456"})
+    assert r.status_code == 200
+
+    recorder = _Recorder(engine)
+    recorder.active = True
+    try:
+        r = client.open(url, method=method)
+    finally:
+        recorder.active = False
+        event.remove(engine, "before_cursor_execute", recorder._on_execute)
+
+    assert r.status_code == 200, r.get_json()
+
+    statements = recorder.statements
+    assert len(statements) <= budget, (
+        f"{name}: {len(statements)} SQL-запросов при бюджете {budget}:\n"
+        + "\n".join(s for s, _, _ in statements)
+    )
+
+    scans = [
+        (table, detail, statement)
+        for table, detail, statement in _explain_full_scans(engine, statements)
+        if table not in allowed_scans | SMALL_TABLES
+    ]
+    assert not scans, f"{name}: полный скан таблицы:\n" + "\n".join(
+        f"{table}: {detail}\n  {statement}" for table, detail, statement in scans
+    )
@@ -1,3 +1,9 @@
+import json
+
+from app import db
+from app.models import Category
+
+
 def _register(client):
     client.post("/api/auth/register", json={"name": "Тест", "email": "u@u.ru", "password": "123456"})
 
@@ -36,3 +42,219 @@ def test_search_by_ingredients(client):
     r = client.get("/api/recipes/search?q=сыр")
     assert r.status_code == 200
     assert len(r.get_json()["data"]["items"]) >= 1
+
+
+def test_is_saved_in_lists_and_detail(client):
+    _register(client)
+    ids = []
+    for title in ("Первый", "Второй"):
+        r = client.post("/api/recipes", json={
+            "title": title,
+            "ingredients": [{"name": "Сыр", "quantity": "50 г", "order": 1}],
+            "steps": [{"description": "Шаг", "timer_seconds": 0, "order": 1}],
+            "categories": []
+        })
+        ids.append(r.get_json()["data"]["id"])
+
+    client.post(f"/api/recipes/{ids[0]}/save")
+
+    items = client.get("/api/recipes").get_json()["data"]["items"]
+    assert {i["id"]: i["is_saved"] for i in items} == {ids[0]: True, ids[1]: False}
+
+    items = client.get("/api/recipes/search?q=сыр").get_json()["data"]["items"]
+    assert {i["id"]: i["is_saved"] for i in items} == {ids[0]: True, ids[1]: False}
+
+    assert client.get(f"/api/recipes/{ids[0]}").get_json()["data"]["is_saved"] is True
+    assert client.get(f"/api/recipes/{ids[1]}").get_json()["data"]["is_saved"] is False
+
+
+def test_update_recipe_diffs_children_and_patch(client):
+    _register(client)
+    r = client.post("/api/recipes", json={
+        "title": "Суп",
+        "ingredients": [
+            {"name": "Вода", "quantity": "1 л", "order": 1},
+            {"name": "Соль", "quantity": "5 г", "order": 2},
+        ],
+        "steps": [
+            {"description": "Вскипятить", "timer_seconds": 300, "order": 1},
+            {"description": "Посолить", "timer_seconds": 0, "order": 2},
+        ],
+        "categories": []
+    })
+    recipe = r.get_json()["data"]
+    rid = recipe["id"]
+    ing_ids = [i["id"] for i in recipe["ingredients"]]
+    step_ids = [s["id"] for s in recipe["steps"]]
+
+    # меняем таймер первого шага (по id), второй шаг сопоставляется по order, соль удаляем
+    r = client.put(f"/api/recipes/{rid}", json={
+        "ingredients": [{"id": ing_ids[0], "name": "Вода", "quantity": "2 л", "order": 1},
+                        {"name": "Перец", "order": 2}],
+        "steps": [
+            {"id": step_ids[0], "description": "Вскипятить", "timer_seconds": 600, "order": 1},
+            {"description": "Посолить", "timer_seconds": 0, "order": 2},
+        ],
+    })
+    assert r.status_code == 200
+    data = r.get_json()["data"]
+    assert [s["id"] for s in data["steps"]] == step_ids
+    assert data["steps"][0]["timer_seconds"] == 600
+    # строка с order=2 переиспользована под новый ингредиент
+    assert [i["id"] for i in data["ingredients"]] == ing_ids
+    assert [(i["name"], i["quantity"]) for i in data["ingredients"]] == [("Вода", "2 л"), ("Перец", None)]
+
+    r = client.put(f"/api/recipes/{rid}", json={"steps": [{"id": step_ids[1], "description": "Посолить", "order": 1}]})
+    assert [s["id"] for s in r.get_json()["data"]["steps"]] == [step_ids[1]]
+
+    r = client.patch(f"/api/recipes/{rid}/steps/{step_ids[1]}", json={"timer_seconds": 30})
+    assert r.status_code == 200
+    assert r.get_json()["data"]["timer_seconds"] == 30
+    assert r.get_json()["data"]["description"] == "Посолить"
+
+    r = client.patch(f"/api/recipes/{rid}/ingredients/{ing_ids[1]}", json={"name": "Чёрный перец"})
+    assert r.get_json()["data"]["name"] == "Чёрный перец"
+    r = client.get("/api/recipes/search?q=чёрный")
+    assert [i["id"] for i in r.get_json()["data"]["items"]] == [rid]
+
+    r = client.patch(f"/api/recipes/{rid}/steps/{step_ids[0]}", json={"timer_seconds": 1})
+    assert r.status_code == 404
+    r = client.patch(f"/api/recipes/{rid}/steps/{step_ids[1]}", json={"timer_seconds": -1})
+    assert r.status_code == 400
+
+
+def test_categories_resolved_in_batch_and_reused(client, app):
+    _register(client)
+    payload = {
+        "title": "Блины",
+        "ingredients": [{"name": "Мука", "quantity": "200 г", "order": 1}],
+        "steps": [{"description": "Пожарить", "timer_seconds": 0, "order": 1}],
+        "categories": [{"name": "Завтраки", "slug": "breakfast"}, {"name": "Быстро"}, {"name": "Завтраки"}],
+    }
+    r = client.post("/api/recipes", json=payload)
+    assert r.status_code == 201
+    cats = r.get_json()["data"]["categories"]
+    assert sorted((c["name"], c["slug"]) for c in cats) == [("Быстро", None), ("Завтраки", "breakfast")]
+
+    # существующие категории переиспользуются, недостающим дописывается slug
+    payload["title"] = "Оладьи"
+    payload["categories"] = [{"name": "Быстро", "slug": "quick"}, {"name": "Десерты"}]
+    r = client.post("/api/recipes", json=payload)
+    cats = r.get_json()["data"]["categories"]
+    assert sorted((c["name"], c["slug"]) for c in cats) == [("Быстро", "quick"), ("Десерты", None)]
+
+    assert db.session.query(Category).count() == 3
+    items = client.get("/api/recipes").get_json()["data"]["items"]
+    assert {i["title"]: len(i["categories"]) for i in items} == {"Блины": 2, "Оладьи": 2}
+
+
+def test_sparse_fieldsets(client):
+    _register(client)
+    recipe_id = client.post("/api/recipes", json={
+        "title": "Омлет",
+        "ingredients": [{"name": "Яйца", "quantity": "2", "order": 1}],
+        "steps": [{"description": "Взбить", "timer_seconds": 0, "order": 1}],
+        "categories": [{"name": "Завтрак"}],
+    }).get_json()["data"]["id"]
+
+    items = client.get("/api/recipes?fields=title,image_url").get_json()["data"]["items"]
+    assert items == [{"id": recipe_id, "title": "Омлет", "image_url": None}]
+
+    data = client.get(f"/api/recipes/{recipe_id}?fields=title&include=steps").get_json()["data"]
+    assert set(data) == {"id", "title", "steps"}
+    assert data["steps"][0]["description"] == "Взбить"
+
+    # пустой include — детальная страница без детей
+    data = client.get(f"/api/recipes/{recipe_id}?include=").get_json()["data"]
+    assert "ingredients" not in data and data["categories"][0]["name"] == "Завтрак"
+
+    client.post(f"/api/recipes/{recipe_id}/comments", json={"text": "Вкусно"})
+    items = client.get(f"/api/recipes/{recipe_id}/comments?fields=text").get_json()["data"]["items"]
+    assert [set(c) for c in items] == [{"id", "text"}]
+
+    r = client.get("/api/recipes?fields=title,password")
+    assert r.status_code == 400
+    assert r.get_json()["error"]["code"] == "VALIDATION_ERROR"
+
+
+def test_core_cards_match_orm_serializer(client):
+    _register(client)
+    ids = []
+    for title, cats in (("Борщ", [{"name": "Супы"}, {"name": "Обед"}]), ("Каша", [])):
+        r = client.post("/api/recipes", json={
+            "title": title,
+            "ingredients": [{"name": "Сыр", "quantity": "50 г", "order": 1}],
+            "steps": [{"description": "Шаг", "timer_seconds": 0, "order": 1}],
+            "categories": cats,
+        })
+        ids.append(r.get_json()["data"]["id"])
+    client.post(f"/api/recipes/{ids[0]}/save")
+
+    # карточки списков читаются Core-запросом, детальная — ORM; формат должен совпадать
+    detail = {i: client.get(f"/api/recipes/{i}?include=").get_json()["data"] for i in ids}
+    assert len(detail[ids[0]]["categories"]) == 2
+    for url in ("/api/recipes", "/api/recipes/search?q=сыр", "/api/recipes/mine"):
+        items = client.get(url).get_json()["data"]["items"]
+        assert {i["id"]: i for i in items} == detail, url
+    assert client.get("/api/recipes/my").get_json()["data"]["items"] == [detail[ids[0]]]
+
+
+def _recipe(client, title, servings, ingredients, categories=()):
+    r = client.post("/api/recipes", json={
+        "title": title,
+        "servings": servings,
+        "ingredients": [{"name": n, "quantity": q, "order": i} for i, (n, q) in enumerate(ingredients, start=1)],
+        "steps": [{"description": "Шаг", "timer_seconds": 0, "order": 1}],
+        "categories": list(categories),
+    })
+    return r.get_json()["data"]
+
+
+def test_servings_scaling(client):
+    _register(client)
+    recipe = _recipe(client, "Блины", 2, [("Мука", "1 стакан"), ("Яйца", "2 шт"), ("Соль", "по вкусу")])
+    assert recipe["ingredients"][0]["amount"] == 250 and recipe["ingredients"][0]["unit"] == "мл"
+
+    data = client.get(f"/api/recipes/{recipe['id']}?servings=3").get_json()["data"]
+    assert (data["servings"], data["base_servings"]) == (3, 2)
+    assert [(i["quantity"], i["amount"]) for i in data["ingredients"]] == [
+        ("1,5 стак.", 375), ("3 шт", 3), ("по вкусу", None),
+    ]
+    assert client.get(f"/api/recipes/{recipe['id']}?servings=0").status_code == 400
+
+
+def test_shopping_list_aggregates_across_recipes(client):
+    _register(client)
+    a = _recipe(client, "Омлет", 1, [("Яйца", "2 шт"), ("Молоко", "100 мл"), ("Соль", "по вкусу")])
+    b = _recipe(client, "Блины", 2, [("яйца", "3"), ("Молоко", "0,5 л"), ("Соль", "по вкусу"), ("Мука", "200 г")])
+
+    items = client.get(f"/api/recipes/shopping-list?ids={a['id']},{b['id']}").get_json()["data"]["items"]
+    by_name = {i["name_norm"]: i for i in items}
+    assert (by_name["яйца"]["amount"], by_name["яйца"]["quantity"], by_name["яйца"]["recipes"]) == (5, "5 шт", 2)
+    assert by_name["молоко"]["quantity"] == "600 мл"
+    assert by_name["соль"]["quantity"] == "по вкусу"
+    assert by_name["мука"]["quantity"] == "200 г"
+
+    # на 2 порции: омлет x2, блины как есть
+    client.post(f"/api/recipes/{a['id']}/save")
+    client.post(f"/api/recipes/{b['id']}/save")
+    items = client.get("/api/recipes/shopping-list?saved=1&servings=2").get_json()["data"]["items"]
+    assert {i["name_norm"]: i["amount"] for i in items}["яйца"] == 7
+
+    assert client.get("/api/recipes/shopping-list").status_code == 400
+
+
+def test_lists_stream_ndjson(client, monkeypatch):
+    monkeypatch.setattr("app.utils.streaming.STREAM_BATCH", 2)
+    monkeypatch.setattr("app.routes.recipes.STREAM_BATCH", 2)
+    _register(client)
+    for i in range(5):
+        _recipe(client, f"Сырник {i}", 1, [("Сыр", "100 г")])
+
+    ndjson = {"Accept": "application/x-ndjson"}
+    for url in ("/api/recipes/search?q=сыр", "/api/recipes/mine", "/api/recipes/search?q=сыр&include=ingredients"):
+        expected = client.get(url).get_json()["data"]["items"]
+        r = client.get(url, headers=ndjson)
+        assert r.mimetype == "application/x-ndjson" and "Accept" in r.headers["Vary"]
+        assert [json.loads(line) for line in r.get_data(as_text=True).splitlines()] == expected
+        assert len(expected) == 5
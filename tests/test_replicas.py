@@ -0,0 +1,77 @@
+import pytest
+
+from app import create_app, db
+from app.models import Recipe, User
+from tests.conftest import TestConfig
+
+
+def _make_app(tmp_path, replica_url):
+    class ReplicaConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        SQLALCHEMY_BINDS = {"replica_0": replica_url}
+        REPLICA_BINDS = ["replica_0"]
+        READ_YOUR_WRITES_SECONDS = 60
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all(bind_key=None)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def _forget_replica_metadata():
+    yield
+    # Flask-SQLAlchemy держит MetaData binds на общем объекте db — не отдаём её следующим тестам
+    db.metadatas.pop("replica_0", None)
+
+
+@pytest.fixture()
+def replica_app(tmp_path):
+    app = _make_app(tmp_path, f"sqlite:///{tmp_path / 'replica.db'}")
+    with app.app_context():
+        # "реплика" — отдельный файл с той же схемой, в который приложение само не пишет
+        db.metadata.create_all(db.engines["replica_0"])
+    yield app
+    with app.app_context():
+        db.drop_all(bind_key=None)
+        db.metadata.drop_all(db.engines["replica_0"])
+
+
+def _titles(client):
+    return [i["title"] for i in client.get("/api/recipes").get_json()["data"]["items"]]
+
+
+def test_reads_go_to_replica_and_writes_pin_client_to_primary(replica_app):
+    with replica_app.app_context():
+        db.session.add(User(id=1, name="Автор", email="a@a.ru", password_hash="x"))
+        db.session.add(Recipe(title="Только на primary", author_id=1))
+        db.session.commit()
+
+    anon = replica_app.test_client()
+    assert _titles(anon) == []  # реплика ещё пустая
+
+    writer = replica_app.test_client()
+    writer.post("/api/auth/register", json={"name": "Тест", "email": "w@w.ru", "password": "123456"})
+    r = writer.post("/api/recipes", json={
+        "title": "Свежий",
+        "ingredients": [{"name": "Соль", "quantity": "", "order": 1}],
+        "steps": [{"description": "Шаг", "timer_seconds": 0, "order": 1}],
+        "categories": [],
+    })
+    assert r.status_code == 201
+
+    # автор сразу видит свою запись (read-your-writes), остальные читают реплику
+    assert _titles(writer) == ["Свежий", "Только на primary"]
+    assert _titles(anon) == []
+
+
+def test_unavailable_replica_falls_back_to_primary(tmp_path):
+    app = _make_app(tmp_path, f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    with app.app_context():
+        db.session.add(User(id=1, name="Автор", email="a@a.ru", password_hash="x"))
+        db.session.add(Recipe(title="Рецепт", author_id=1))
+        db.session.commit()
+
+    assert _titles(app.test_client()) == ["Рецепт"]
+    with app.app_context():
+        db.drop_all(bind_key=None)
@@ -0,0 +1,45 @@
+import pytest
+
+from app import create_app, db
+from config import ProductionConfig
+from tests.conftest import TestConfig
+
+
+def test_production_sqlite_profile_applied_to_connections(tmp_path):
+    class SqliteProdConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'prod.db'}"
+        SQLITE_PRAGMAS = ProductionConfig.SQLITE_PRAGMAS
+        SQLITE_MAINTENANCE_INTERVAL_SECONDS = 0
+
+    app = create_app(SqliteProdConfig)
+    with app.app_context():
+        db.create_all()
+        with db.engine.connect() as conn:
+            pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()  # noqa: E731
+            assert pragma("journal_mode") == "wal"
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("foreign_keys") == 1
+            assert pragma("busy_timeout") == ProductionConfig.SQLITE_PRAGMAS["busy_timeout"]
+            assert pragma("temp_store") == 2  # MEMORY
+
+        result = app.test_cli_runner().invoke(args=["sqlite-maintenance", "--checkpoint", "TRUNCATE"])
+        assert result.exit_code == 0, result.output
+        assert "default: wal frames 0" in result.output
+        db.drop_all()
+
+
+def test_production_profile_selected_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("COOKFLOW_CONFIG", "production")
+    monkeypatch.setattr(ProductionConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'env.db'}")
+    monkeypatch.setattr(ProductionConfig, "SQLITE_MAINTENANCE_INTERVAL_SECONDS", 0)
+
+    app = create_app()  # как run.py и asgi.py
+    assert not app.debug
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == ProductionConfig.SQLITE_PRAGMAS["busy_timeout"]
+
+    monkeypatch.setenv("COOKFLOW_CONFIG", "staging")
+    with pytest.raises(RuntimeError):
+        create_app()
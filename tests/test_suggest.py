@@ -0,0 +1,113 @@
+from sqlalchemy import event
+
+from app import db
+from app.utils.suggest import PrefixIndex, suggest_store
+
+
+def _recipe(client, title, names):
+    return client.post("/api/recipes", json={
+        "title": title,
+        "ingredients": [{"name": n, "order": i} for i, n in enumerate(names, start=1)],
+        "steps": [],
+        "categories": [],
+    }).get_json()["data"]
+
+
+def _texts(client, kind, prefix, **params):
+    r = client.get("/api/suggest", query_string={"kind": kind, "prefix": prefix, **params})
+    assert r.status_code == 200
+    return [(i["text"], i["count"]) for i in r.get_json()["data"]["items"]]
+
+
+def test_prefix_index_ranks_by_frequency_and_folds_variants():
+    index = PrefixIndex(
+        [("Сыр", 5, 1), ("сыр", 2, 1), ("Сыр твёрдый", 3, 2), ("Сырок", 3, 3), ("Соль", 9, 4), ("Сырки", 1, 3)],
+        max_entries=100,
+    )
+    assert [i["text"] for i in index.suggest("СЫР")] == ["Сыр", "Сыр твёрдый", "Сырок"]
+    assert index.suggest("сыр")[0] == {"text": "Сыр", "count": 7}
+    assert index.suggest("сыр тверд", limit=1) == [{"text": "Сыр твёрдый", "count": 3}]
+    assert index.suggest("  ") == [] and index.suggest("х") == []
+
+    index.add("Сырники", 10)
+    assert index.suggest("сыр")[0]["text"] == "Сырники"
+    index.add("Сырники", -10)
+    assert [i["text"] for i in index.suggest("сыр")] == ["Сыр", "Сыр твёрдый", "Сырок"]
+
+
+def test_prefix_index_is_bounded():
+    index = PrefixIndex([("Мука", 1, None), ("Мёд", 1, None)], max_entries=2)
+    index.add("Молоко", 1)
+    assert len(index) == 2
+    index.add("Мука", 2)
+    assert index.suggest("м")[0] == {"text": "Мука", "count": 3}
+
+
+def test_suggest_endpoint_follows_writes_without_queries(client, app):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "t@t.ru", "password": "123456"})
+    first = _recipe(client, "Омлет", ["Яйца", "Молоко"])
+    _recipe(client, "Омлет с сыром", ["яйца", "Сыр"])
+    _recipe(client, "Глазунья", ["Яйцо"])
+    suggest_store(app).load()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        r = client.get("/api/suggest?kind=ingredient&prefix=Я")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert statements == []
+    assert r.headers["Cache-Control"] == "public, max-age=60"
+    # «Яйца»/«яйца» — одна строка, «Яйцо» — тот же термин и в ответ не попадает
+    assert [(i["text"], i["count"]) for i in r.get_json()["data"]["items"]] == [("Яйца", 2)]
+
+    # свои записи видны сразу, без перезагрузки индекса
+    _recipe(client, "Омлет пышный", ["Яблоко"])
+    assert _texts(client, "ingredient", "я") == [("Яйца", 2), ("Яблоко", 1)]
+    assert _texts(client, "title", "омлет", limit=2) == [("Омлет", 1), ("Омлет пышный", 1)]
+
+    client.put(f"/api/recipes/{first['id']}", json={"title": "Фриттата"})
+    assert [t for t, _ in _texts(client, "title", "ом")] == ["Омлет пышный", "Омлет с сыром"]
+    assert _texts(client, "title", "фри") == [("Фриттата", 1)]
+
+    client.delete(f"/api/recipes/{first['id']}")
+    assert _texts(client, "title", "фри") == []
+    assert _texts(client, "ingredient", "мол") == []
+
+
+def test_suggest_validation(client):
+    assert client.get("/api/suggest?kind=user&prefix=a").status_code == 400
+    assert client.get("/api/suggest?kind=title&prefix=a&limit=x").status_code == 400
+    assert client.get("/api/suggest?kind=title").get_json()["data"]["items"] == []
+
+
+def test_suggest_forgets_ingredient_removed_by_update(client, app):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "p@p.ru", "password": "123456"})
+    recipe = _recipe(client, "Паэлья", ["Рис", "Шафран"])
+    suggest_store(app).load()
+    assert _texts(client, "ingredient", "шаф") == [("Шафран", 1)]
+
+    # ингредиент убран из коллекции и удалён как сирота при flush
+    client.put(f"/api/recipes/{recipe['id']}", json={"ingredients": [{"name": "Рис", "order": 1}]})
+    assert _texts(client, "ingredient", "шаф") == []
+    assert _texts(client, "ingredient", "рис") == [("Рис", 1)]
+
+
+def test_expired_index_is_served_while_reloading_in_background(client, app, monkeypatch):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "b@b.ru", "password": "123456"})
+    _recipe(client, "Борщ", ["Свёкла"])
+    store = suggest_store(app)
+    # индекс построен до записи («другой воркер») и уже устарел
+    stale = store._indexes["title"] = PrefixIndex([], store.max_entries)
+    stale.loaded_at -= store.ttl_seconds + 1
+
+    started = []
+    monkeypatch.setattr("app.utils.suggest.threading.Thread.start", lambda t: started.append(t))
+    assert _texts(client, "title", "бор") == []
+    assert _texts(client, "title", "бор") == []
+    assert len(started) == 1  # вторая перезагрузка не запускается, пока идёт первая
+
+    started[0].run()
+    assert _texts(client, "title", "бор") == [("Борщ", 1)]
+    assert not store._reloading
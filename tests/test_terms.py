@@ -0,0 +1,72 @@
+from sqlalchemy import event, insert, select
+
+from app import db
+from app.models import Ingredient, IngredientTerm, Recipe, User
+from app.utils.backfill import run_backfill
+from app.utils.terms import term_key
+
+
+def _recipe(client, title, names):
+    r = client.post("/api/recipes", json={
+        "title": title,
+        "ingredients": [{"name": n, "quantity": "1 шт", "order": i} for i, n in enumerate(names, start=1)],
+        "steps": [],
+        "categories": [],
+    })
+    return r.get_json()["data"]
+
+
+def test_term_key_normalization():
+    assert term_key("Яйца") == term_key("  яйцо ") == term_key("ЯЙЦО")
+    assert term_key("Чёрный перец") == term_key("перец чёрный") == term_key("Перец, черный")
+    assert term_key("Помидоры") == term_key("томат")
+    assert term_key("Eggs") == term_key("egg")
+    assert term_key("Сыр") != term_key("Соль")
+    assert term_key("  ") == ""
+
+
+def test_terms_resolved_on_write_and_used_by_search(client, app):
+    client.post("/api/auth/register", json={"name": "Тест", "email": "t@t.ru", "password": "123456"})
+    first = _recipe(client, "Омлет", ["Яйца", "Молоко"])
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        second = _recipe(client, "Глазунья", ["яйцо", "Соль"])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    # "яйцо" — из кэша воркера, в словарь ходили только за новой "Солью"
+    assert sum("ingredient_terms" in s for s in statements) == 2  # SELECT + INSERT
+
+    terms = dict(db.session.execute(select(Ingredient.name, Ingredient.term_id)).all())
+    assert terms["Яйца"] == terms["яйцо"]
+    assert db.session.execute(select(IngredientTerm.key).order_by(IngredientTerm.id)).scalars().all() == ["яйц", "молок", "сол"]
+
+    found = client.get("/api/recipes/search?q=ЯЙЦО").get_json()["data"]["items"]
+    assert sorted(r["id"] for r in found) == sorted([first["id"], second["id"]])
+
+    ing_id = second["ingredients"][0]["id"]
+    client.patch(f"/api/recipes/{second['id']}/ingredients/{ing_id}", json={"name": "Сыр"})
+    found = client.get("/api/recipes/search?q=яйца").get_json()["data"]["items"]
+    assert [r["id"] for r in found] == [first["id"]]
+
+
+def test_terms_backfill_links_existing_rows(app):
+    user = User(name="u", email="tb@t.ru", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    recipe = Recipe(title="Старый рецепт", author_id=user.id)
+    db.session.add(recipe)
+    db.session.flush()
+    # строки до словаря: Core INSERT мимо ORM, term_id пуст
+    db.session.execute(insert(Ingredient), [
+        {"recipe_id": recipe.id, "name": n, "name_norm": n.lower(), "order": i}
+        for i, n in enumerate(["Помидоры", "томат", "Мука"], start=1)
+    ])
+    db.session.commit()
+
+    result = run_backfill(db.engine, "ingredient_terms", batch_size=2)
+    assert (result.finished, result.rows_changed) == (True, 3)
+    term_ids = db.session.execute(select(Ingredient.term_id).order_by(Ingredient.order)).scalars().all()
+    assert term_ids[0] == term_ids[1] != term_ids[2]
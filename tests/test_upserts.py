@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+from sqlalchemy import create_mock_engine, func, select
+
+from app import create_app, db
+from app.models import Category, Challenge, ChallengeProgress, recipe_category, user_saved_recipe
+from app.utils.db import insert_ignore, upsert
+from tests.conftest import TestConfig
+
+
+THREADS = 8
+
+
+@pytest.fixture()
+def race_app(tmp_path):
+    # каждый поток ходит в БД своим соединением — нужен файл, а не общий :memory:
+    class RaceConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'race.db'}"
+        SQLITE_PRAGMAS = {"journal_mode": "WAL", "busy_timeout": 10000}
+        SQLITE_MAINTENANCE_INTERVAL_SECONDS = 0
+
+    app = create_app(RaceConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _hammer(app, cookie, request):
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+
+    def run(i):
+        client = app.test_client()
+        client.set_cookie("session", cookie)
+        barrier.wait()
+        results[i] = request(client)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_save_start_and_category_creation(race_app):
+    client = race_app.test_client()
+    client.post("/api/auth/register", json={"name": "Тест", "email": "r@r.ru", "password": "123456"})
+    cookie = client.get_cookie("session").value
+    recipe_id = client.post("/api/recipes", json={
+        "title": "Рецепт", "ingredients": [], "steps": [], "categories": [],
+    }).get_json()["data"]["id"]
+    with race_app.app_context():
+        ch = Challenge(title="Гонка", duration_days=7, target_count=3)
+        db.session.add(ch)
+        db.session.commit()
+        ch_id = ch.id
+
+    saves = _hammer(race_app, cookie, lambda c: c.post(f"/api/recipes/{recipe_id}/save").get_json())
+    assert all(r["ok"] for r in saves)
+    assert sorted(r["data"]["message"] for r in saves) == ["Сохранено"] + ["Уже в избранном"] * (THREADS - 1)
+
+    starts = _hammer(race_app, cookie, lambda c: c.post(f"/api/challenges/{ch_id}/start"))
+    assert sorted(r.status_code for r in starts) == [200] * (THREADS - 1) + [201]
+    assert len({r.get_json()["data"]["id"] for r in starts}) == 1
+
+    created = _hammer(race_app, cookie, lambda c: c.post("/api/recipes", json={
+        "title": "Ещё", "ingredients": [], "steps": [], "categories": [{"name": "Гонка", "slug": "race"}],
+    }))
+    assert [r.status_code for r in created] == [201] * THREADS
+
+    with race_app.app_context():
+        count = lambda stmt: db.session.execute(stmt).scalar()  # noqa: E731
+        assert count(select(func.count()).select_from(user_saved_recipe)) == 1
+        assert count(select(func.count()).select_from(ChallengeProgress)) == 1
+        [category] = db.session.execute(select(Category).where(Category.name == "Гонка")).scalars().all()
+        assert category.slug == "race"
+        assert count(
+            select(func.count()).select_from(recipe_category).where(recipe_category.c.category_id == category.id)
+        ) == THREADS
+
+
+def test_upsert_do_update_returns_existing_row(app):
+    stmt = upsert(Category.__table__, index_elements=["name"], set_={"slug": "new"})
+    first = db.session.execute(stmt.values(name="Супы", slug="soups").returning(Category.id)).scalar_one()
+    again = db.session.execute(
+        stmt.values(name="Супы", slug="ignored").returning(Category.id, Category.slug)
+    ).one()
+    assert (again.id, again.slug) == (first, "new")
+
+
+def test_upserts_refuse_unsupported_database(app):
+    mysql = create_mock_engine("mysql://", executor=None)
+    for build in (insert_ignore, upsert):
+        with pytest.raises(RuntimeError, match="SQLite и PostgreSQL"):
+            build(Category.__table__, bind=mysql)
@@ -0,0 +1,27 @@
+import json
+import subprocess
+import sys
+
+from app.utils.warmup import warm_up
+
+
+def test_create_app_defers_heavy_imports():
+    code = (
+        "import json, sys\n"
+        "from app import create_app\n"
+        "create_app()\n"
+        "print(json.dumps([m for m in ('bleach', 'PIL.Image', 'alembic') if m in sys.modules]))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert json.loads(out.strip().splitlines()[-1]) == []
+
+
+def test_warm_up_prepares_worker_before_first_request(app, client):
+    timings = warm_up(app)
+
+    assert set(timings) == {"modules", "mappers", "templates", "routes", "pool", "caches"}
+    assert "bleach" in sys.modules
+    assert app.extensions["catalog"]._catalog is not None
+    assert set(app.extensions["suggest"]._indexes) == {"ingredient", "title"}
+    assert any(name == "index.html" for _, name in app.jinja_env.cache)
+    assert client.get("/api/challenges").status_code == 200